@@ -1,34 +1,32 @@
-import numpy as np
-import pandas as pd
-from sklearn.preprocessing import MinMaxScaler
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import Dense, LSTM
 import pickle
+import os
+import sys
 
-def prepare_lstm_data(df, lookback=60):
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from dataset_store import load_dataset
+from sequence_windows import WindowDataset
+
+def prepare_lstm_data(df, lookback=60, features=['Close'], train_fraction=0.8):
     """
     Prepares the stock data for LSTM model training.
     
     Args:
     df (pd.DataFrame): The stock data DataFrame.
     lookback (int): The number of days to look back for LSTM input.
+    features (list): Input columns (the first is predicted).
+    train_fraction (float): Share of history used for training; the scaler only sees this part.
 
     Returns:
     np.array: The feature data for LSTM.
     np.array: The target data for LSTM.
+    MinMaxScaler: The scaler fitted on the training rows.
     """
-    scaler = MinMaxScaler(feature_range=(0,1))
-    scaled_data = scaler.fit_transform(df['Close'].values.reshape(-1, 1))
-
-    X_train, y_train = [], []
-    for i in range(lookback, len(scaled_data)):
-        X_train.append(scaled_data[i-lookback:i, 0])
-        y_train.append(scaled_data[i, 0])
-    
-    X_train, y_train = np.array(X_train), np.array(y_train)
-    X_train = np.reshape(X_train, (X_train.shape[0], X_train.shape[1], 1))
-    
-    return X_train, y_train, scaler
+    dataset = WindowDataset(df, features=features, target=features[0], lookback=lookback,
+                            train_fraction=train_fraction)
+    X_train, y_train = dataset.arrays('train')
+    return X_train, y_train, dataset.scaler
 
 def build_lstm_model(input_shape):
     """
@@ -51,16 +49,24 @@ def build_lstm_model(input_shape):
 
 if __name__ == "__main__":
     # Load preprocessed data
-    df = pd.read_csv('../data/preprocessed_stock_data.csv', index_col='Date', parse_dates=True)
+    df = load_dataset('stock', csv_path='../data/preprocessed_stock_data.csv', columns=['Close'])
 
-    # Prepare data for LSTM
-    X_train, y_train, scaler = prepare_lstm_data(df)
+    # Windows are gathered lazily, one mini-batch at a time
+    dataset = WindowDataset(df, features=['Close'], target='Close', lookback=60, train_fraction=0.8)
+    scaler = dataset.scaler
 
     # Build and train LSTM model
-    lstm_model = build_lstm_model((X_train.shape[1], 1))
-    lstm_model.fit(X_train, y_train, batch_size=1, epochs=1)
+    lstm_model = build_lstm_model((dataset.lookback, len(dataset.features)))
+    batch_size = 32
+    lstm_model.fit(dataset.batches('train', batch_size=batch_size, shuffle=True, seed=0, repeat=True),
+                   steps_per_epoch=dataset.n_batches('train', batch_size), epochs=1)
+
+    X_test, y_test = dataset.arrays('test')
+    if len(X_test):
+        print(f"Test MSE (scaled): {lstm_model.evaluate(X_test, y_test, verbose=0):.6f}")
 
     # Save the trained LSTM model
+    os.makedirs('../models', exist_ok=True)
     lstm_model.save('../models/lstm_model.h5')
 
     # Save the scaler for future use (for scaling test data)
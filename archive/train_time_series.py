@@ -1,6 +1,11 @@
-import pandas as pd
 from statsmodels.tsa.arima.model import ARIMA
-import pickle
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from dataset_store import load_dataset
+from model_registry import save_model
+from time_series import ArimaService
 
 def train_arima_model(df, order=(5, 1, 0)):
     """
@@ -18,14 +23,18 @@ def train_arima_model(df, order=(5, 1, 0)):
     return model_fit
 
 if __name__ == "__main__":
-    # Load the preprocessed stock data
-    df = pd.read_csv('../data/preprocessed_stock_data.csv', index_col='Date', parse_dates=True)
-
-    # Train the ARIMA model
-    arima_model = train_arima_model(df)
+    # Load the preprocessed stock data (every ticker stored in the dataset)
+    df = load_dataset('stock', csv_path='../data/preprocessed_stock_data.csv', columns=['Close'])
+    series = {ticker: group['Close'] for ticker, group in df.groupby('ticker')}
 
-    # Save the trained ARIMA model
-    with open('../models/arima_model.pkl', 'wb') as f:
-        pickle.dump(arima_model, f)
+    # Order search by AIC for every ticker across a process pool
+    service = ArimaService()
+    summary = service.fit(series)
+    print(summary.to_string(index=False))
 
-    print("ARIMA model saved to ../models/arima_model.pkl")
\ No newline at end of file
+    # Register the fitted models (models/arima/v<N>/); later runs can load the
+    # service and call update() to warm-start from these parameters
+    save_model(service, 'arima', ['Close'], target='Close',
+               train_start=df.index.min(), train_end=df.index.max(), tickers=list(series),
+               metrics={'mean_aic': summary['aic'].mean()},
+               params={t: str(m['order']) for t, m in service.models.items()})
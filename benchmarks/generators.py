@@ -0,0 +1,88 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from providers import FakeProvider
+from reddit_sources import FakeRedditSource
+from quote_service import SimulatedFeed
+
+'''
+
+Synthetic data for the benchmarks (no network access)
+
+'''
+
+def _tickers(n):
+    """'T0000', 'T0001', ... (seeds the fake provider per symbol)."""
+    return [f'T{i:04d}' for i in range(n)]
+
+def price_history(n_tickers=1, n_days=1000, seed=0):
+    """
+    Daily OHLCV bars from the seeded random walk of FakeProvider.
+
+    Args:
+    n_tickers (int): Number of tickers.
+    n_days (int): Business days per ticker, starting 2000-01-03.
+    seed (int): Provider seed.
+
+    Returns:
+    dict: ticker -> Date-indexed frame with Open, High, Low, Close and Volume.
+    """
+    provider = FakeProvider(seed=seed)
+    end = pd.bdate_range('2000-01-03', periods=n_days + 1)[-1]
+    return {ticker: provider.download(ticker, '2000-01-03', end) for ticker in _tickers(n_tickers)}
+
+def option_chains(ticker='SPY', n_expirations=4, strikes_per_side=100, seed=0):
+    """
+    yfinance-shaped chains (.calls/.puts) for the next n_expirations Fridays.
+
+    Each expiration has 2 * strikes_per_side + 1 strikes per side (fewer when low
+    strikes would be negative). Prices come from Black-Scholes around the fake spot.
+
+    Returns:
+    list: (expiration date, chain) pairs.
+    float: Spot price of the underlying.
+    """
+    provider = FakeProvider(n_expirations=n_expirations, strikes_per_side=strikes_per_side, seed=seed)
+    chains = [(expiration, provider.option_chain(ticker, expiration))
+              for expiration in provider.options_expirations(ticker)]
+    return chains, float(chains[0][1].underlying['regularMarketPrice'])
+
+def minute_bars(ticker='SPY', n_days=5, seed=0):
+    """
+    Regular-session 1-minute bars (390 per day) for n_days business days from 2024-01-02.
+
+    Returns:
+    pd.DataFrame: UTC-indexed Open, High, Low, Close, Volume.
+    """
+    days = pd.bdate_range('2024-01-02', periods=n_days)
+    index = pd.DatetimeIndex(np.concatenate([
+        pd.date_range(day + pd.Timedelta(hours=14, minutes=30), periods=390, freq='min').values for day in days
+    ])).tz_localize('UTC')
+    return FakeProvider(seed=seed).bars(ticker, index).rename_axis('Datetime')
+
+def reddit_corpus(n_posts=500, comments_per_post=4, tickers=('SPY', 'AMD', 'TSLA', 'NVDA', 'AAPL'), seed=0):
+    """
+    Reddit-style texts (posts and their comments) from FakeRedditSource.
+
+    Returns:
+    pd.DataFrame: id, kind ('post' or 'comment'), created_utc and text columns.
+    """
+    source = FakeRedditSource(n_submissions=n_posts, comments_per_post=comments_per_post, tickers=tickers, seed=seed)
+    rows = []
+    for post in source.submissions('wallstreetbets'):
+        rows.append((post['id'], 'post', post['created_utc'], post['title'] + '\n' + post['body']))
+        rows.extend((c['id'], 'comment', c['created_utc'], c['body']) for c in source.comments(post['id']))
+    return pd.DataFrame(rows, columns=['id', 'kind', 'created_utc', 'text'])
+
+def quote_feed(n_tickers=500, seed=0):
+    """
+    Random-walk quote feed and its watchlist.
+
+    Returns:
+    SimulatedFeed: The feed.
+    list: Ticker symbols.
+    """
+    return SimulatedFeed(seed=seed), _tickers(n_tickers)
@@ -0,0 +1,349 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+_here = os.path.dirname(os.path.abspath(__file__))
+for _folder in ('scripts', 'mvp', 'archive'):
+    sys.path.append(os.path.join(_here, '..', _folder))
+
+import generators
+import database
+from data_collection import get_price
+from data_preprocessing import add_moving_averages, analyze_sentiment, preprocess_options_data
+from analysis import calculate_put_credit_spread, put_credit_spread_matrix
+from option_chain import OptionChain
+from sequence_windows import WindowDataset
+from ticker_mentions import TickerMatcher
+from quote_service import QuoteService
+from bar_store import insert_minute_bars
+
+'''
+
+Benchmarks of the hot paths on synthetic data
+
+Usage (from the repository root):
+    python benchmarks/run_benchmarks.py                       # small and medium scales
+    python benchmarks/run_benchmarks.py --scales large --cases insert_stock_data
+    python benchmarks/run_benchmarks.py --update-baseline     # accept the current numbers
+
+'''
+
+# Each scale multiplies the base data size of every benchmark
+SCALES = {'small': 1, 'medium': 4, 'large': 16}
+
+BASELINE_PATH = os.path.join(_here, 'baseline.json')
+RESULTS_PATH = os.path.join(_here, 'results', 'latest.json')
+
+try:
+    from train_lstm_model import prepare_lstm_data
+except ImportError:
+    # TensorFlow is not installed: time the same windowing prepare_lstm_data does
+    def prepare_lstm_data(df, lookback=60, features=['Close'], train_fraction=0.8):
+        dataset = WindowDataset(df, features=features, target=features[0], lookback=lookback,
+                                train_fraction=train_fraction)
+        X_train, y_train = dataset.arrays('train')
+        return X_train, y_train, dataset.scaler
+
+'''
+
+Benchmark cases
+
+Each case takes the scale multiplier, does its (untimed) setup and returns
+(run, items): run(i) is the timed call for repetition i, items the number of
+rows, contracts or texts it processes.
+
+'''
+
+def bench_insert_stock_data(m):
+    frame = generators.price_history(1, 1000 * m)['T0000']
+    # A new ticker per repetition, so every run inserts rows instead of skipping unchanged ones
+    return lambda i: database.insert_stock_data(f'INS{m}_{i}', frame), len(frame)
+
+def bench_get_stock_data(m):
+    frame = generators.price_history(1, 1000 * m)['T0000']
+    ticker = f'GET{m}'
+    database.insert_stock_data(ticker, frame)
+    start, end = frame.index[0], frame.index[-1]
+    return lambda i: database.get_stock_data(ticker, start, end), len(frame)
+
+def bench_insert_options_data(m):
+    chains, _ = generators.option_chains(n_expirations=4, strikes_per_side=50 * m)
+    chains = [(expiration, preprocess_options_data(chain, expiration)) for expiration, chain in chains]
+
+    def run(i):
+        for expiration, chain in chains:
+            database.insert_options_data(f'OPT{m}_{i}', expiration, chain)
+
+    return run, sum(len(chain) for _, chain in chains)
+
+def bench_record_options_snapshot(m):
+    chains, _ = generators.option_chains(n_expirations=1, strikes_per_side=100 * m)
+    expiration, raw = chains[0]
+    chain = preprocess_options_data(raw, expiration)
+    rng = np.random.default_rng(0)
+    ticker = f'SNAP{m}'
+    database.record_options_snapshot(ticker, expiration, chain, captured_at=0)
+
+    def run(i):
+        # About 5% of the quotes move between pulls
+        moved = rng.random(len(chain)) < 0.05
+        chain.bid[moved] += 0.01
+        database.record_options_snapshot(ticker, expiration, chain, captured_at=60 * (i + 1))
+
+    return run, len(chain)
+
+def bench_calculate_put_credit_spread(m):
+    chains, _ = generators.option_chains(n_expirations=1, strikes_per_side=200 * m)
+    expiration, raw = chains[0]
+    chain = preprocess_options_data(raw, expiration)
+    spot = float(np.median(chain['strike']))
+    return lambda i: calculate_put_credit_spread(chain, spot, height=spot / 2), len(chain)
+
+def bench_put_credit_spread_matrix(m):
+    chains, spot = generators.option_chains(n_expirations=4, strikes_per_side=50 * m)
+    chain = OptionChain.concat([preprocess_options_data(raw, expiration) for expiration, raw in chains])
+    return lambda i: put_credit_spread_matrix(chain, spot, height=spot / 4), len(chain)
+
+def bench_add_moving_averages(m):
+    frame = generators.price_history(1, 5000 * m)['T0000']
+    return lambda i: add_moving_averages(frame.copy()), len(frame)
+
+def bench_analyze_sentiment(m):
+    corpus = generators.reddit_corpus(100 * m, comments_per_post=4)
+    return lambda i: analyze_sentiment(corpus[['text']].copy()), len(corpus)
+
+def bench_ticker_mentions(m):
+    corpus = generators.reddit_corpus(200 * m, comments_per_post=4)
+    matcher = TickerMatcher(['SPY', 'AMD', 'TSLA', 'NVDA', 'AAPL'] + [f'T{i:04d}' for i in range(2000)])
+    return lambda i: matcher.extract_many(corpus['id'], corpus['text']), len(corpus)
+
+def bench_prepare_lstm_data(m):
+    frame = generators.price_history(1, 2000 * m)['T0000']
+    return lambda i: prepare_lstm_data(frame, lookback=60), len(frame)
+
+def bench_mvp_train_predict(m):
+    from sklearn.ensemble import RandomForestClassifier
+    from mvp_preprocessing import build_features
+    from evaluation import walk_forward_evaluate
+    from model_registry import save_model, BatchPredictor
+
+    frames = {ticker: frame[['Close']] for ticker, frame in generators.price_history(5 * m, 750).items()}
+    features = ['MA_7', 'MA_14', 'Sentiment']
+    root = os.path.join(_workdir, 'models')
+
+    def run(i):
+        # Build features, walk-forward evaluate, refit, register and score the latest rows
+        df = build_features(frames).dropna(subset=features)
+        estimator = RandomForestClassifier(n_estimators=50, max_depth=5, random_state=42, n_jobs=1)
+        _, summary = walk_forward_evaluate(estimator, df, features, n_folds=3, gap=1, n_jobs=1)
+        model = estimator.fit(df[features].to_numpy(), df['Target'].to_numpy())
+        version = save_model(model, 'bench_rf', features, target='Target', root=root,
+                             metrics=summary.iloc[0][['accuracy']].to_dict())
+        return BatchPredictor('bench_rf', version, root=root).predict_latest(df)
+
+    return run, 5 * m * 750
+
+def bench_insert_minute_bars(m):
+    bars = generators.minute_bars(n_days=5 * m)
+    return lambda i: insert_minute_bars(f'BAR{m}_{i}', bars), len(bars)
+
+def bench_quote_lookup(m):
+    feed, tickers = generators.quote_feed(500 * m)
+    service = QuoteService(feed, tickers, capacity=256, max_age=3600)
+    for _ in range(10):
+        service.poll_once()
+
+    def run(i):
+        service.get_prices(tickers)
+        for ticker in tickers:
+            get_price(ticker, quotes=service)
+
+    return run, len(tickers)
+
+BENCHMARKS = {
+    'insert_stock_data': bench_insert_stock_data,
+    'get_stock_data': bench_get_stock_data,
+    'insert_options_data': bench_insert_options_data,
+    'record_options_snapshot': bench_record_options_snapshot,
+    'calculate_put_credit_spread': bench_calculate_put_credit_spread,
+    'put_credit_spread_matrix': bench_put_credit_spread_matrix,
+    'add_moving_averages': bench_add_moving_averages,
+    'analyze_sentiment': bench_analyze_sentiment,
+    'ticker_mentions': bench_ticker_mentions,
+    'prepare_lstm_data': bench_prepare_lstm_data,
+    'mvp_train_predict': bench_mvp_train_predict,
+    'insert_minute_bars': bench_insert_minute_bars,
+    'quote_lookup': bench_quote_lookup,
+}
+
+'''
+
+Measurement and baseline comparison
+
+'''
+
+_workdir = None
+
+def measure(run, items, repeat=3):
+    """
+    Times `repeat` calls of run and the peak traced memory of one more.
+
+    Memory is measured in a separate call because tracemalloc slows execution.
+
+    Returns:
+    dict: items, seconds (fastest), median_seconds, throughput (items/s) and peak_mb.
+    """
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        run(i)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        run(repeat)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    best = min(times)
+    return {
+        'items': items,
+        'seconds': best,
+        'median_seconds': statistics.median(times),
+        'throughput': items / best if best > 0 else float('inf'),
+        'peak_mb': peak / 2 ** 20,
+    }
+
+def run_benchmarks(cases=None, scales=('small', 'medium'), repeat=3):
+    """
+    Runs the selected cases at each scale against a throwaway database and model registry.
+
+    Returns:
+    dict: '<case>[<scale>]' -> measurement (or {'skipped': reason} when a dependency is missing).
+    """
+    global _workdir
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='trend-bench-') as _workdir:
+        database.configure_database(os.path.join(_workdir, 'bench.db'))
+        with contextlib.redirect_stdout(io.StringIO()):
+            database.create_database()
+        try:
+            for name in cases or BENCHMARKS:
+                for scale in scales:
+                    key = f'{name}[{scale}]'
+                    try:
+                        with contextlib.redirect_stdout(io.StringIO()):
+                            run, items = BENCHMARKS[name](SCALES[scale])
+                            results[key] = measure(run, items, repeat)
+                        results[key].update(case=name, scale=scale)
+                        print(f"{key:40s} {results[key]['seconds'] * 1000:10.2f} ms "
+                              f"{results[key]['throughput']:14,.0f} items/s {results[key]['peak_mb']:9.2f} MB")
+                    except (ImportError, LookupError) as e:
+                        # e.g. scikit-learn missing or the VADER lexicon not downloaded
+                        results[key] = {'case': name, 'scale': scale, 'skipped': str(e).splitlines()[0]}
+                        print(f"{key:40s} skipped: {results[key]['skipped']}")
+        finally:
+            database.configure_database()
+    return results
+
+def environment():
+    return {
+        'created': pd.Timestamp.now(tz='UTC').isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+def compare(results, baseline, tolerance=0.3, min_seconds=0.005):
+    """
+    Compares results with a baseline run.
+
+    A case regresses when it is more than `tolerance` (relative) slower or
+    uses more than `tolerance` more peak memory. Timings under min_seconds
+    in the baseline are too noisy to flag.
+
+    Returns:
+    pd.DataFrame: One row per case in both runs, with the time and memory ratios and a regression flag.
+    """
+    rows = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None or 'skipped' in result or 'skipped' in base:
+            continue
+        time_ratio = result['seconds'] / base['seconds'] if base['seconds'] > 0 else np.nan
+        memory_ratio = result['peak_mb'] / base['peak_mb'] if base['peak_mb'] > 0 else np.nan
+        slower = base['seconds'] >= min_seconds and time_ratio > 1 + tolerance
+        rows.append({
+            'benchmark': key,
+            'baseline_ms': base['seconds'] * 1000,
+            'ms': result['seconds'] * 1000,
+            'time_ratio': time_ratio,
+            'memory_ratio': memory_ratio,
+            'regression': bool(slower or memory_ratio > 1 + tolerance),
+        })
+    return pd.DataFrame(rows, columns=['benchmark', 'baseline_ms', 'ms', 'time_ratio', 'memory_ratio', 'regression'])
+
+def _write_json(path, payload):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the TrendAnalysis hot paths on synthetic data.")
+    parser.add_argument('--cases', nargs='+', choices=list(BENCHMARKS), help="Cases to run (default: all).")
+    parser.add_argument('--scales', nargs='+', choices=list(SCALES), default=['small', 'medium'])
+    parser.add_argument('--repeat', type=int, default=3, help="Timed repetitions per case (the fastest is kept).")
+    parser.add_argument('--output', default=RESULTS_PATH, help="Where to write the results JSON.")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Baseline JSON to compare against.")
+    parser.add_argument('--tolerance', type=float, default=0.3, help="Allowed relative slowdown or memory growth.")
+    parser.add_argument('--update-baseline', action='store_true', help="Store these results as the new baseline.")
+    parser.add_argument('--check', action='store_true', help="Exit with status 1 when a case regressed.")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.cases, args.scales, args.repeat)
+    payload = {'environment': environment(), 'results': results}
+    _write_json(args.output, payload)
+    print(f"\n✅ Results written to {args.output}")
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)['results']
+        # Cases that were not re-run keep their old baseline
+        _write_json(args.baseline, {'environment': payload['environment'], 'results': {**baseline, **results}})
+        print(f"✅ Baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one.")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    report = compare(results, baseline['results'], args.tolerance)
+    print(f"\nCompared with the baseline from {baseline['environment']['created']} "
+          f"({baseline['environment']['processor']}, {baseline['environment']['cpus']} CPUs):")
+    print(report.to_string(index=False, float_format=lambda x: f'{x:.2f}'))
+    regressions = report[report['regression']]
+    if len(regressions):
+        print(f"\n❌ {len(regressions)} regression(s): {', '.join(regressions['benchmark'])}")
+        return 1 if args.check else 0
+    print("\n✅ No regressions")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,23 +1,42 @@
+import ast
+import os
+import sys
 import pandas as pd
-from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score, classification_report
 
-if __name__ == "__main__":
-    df = pd.read_csv('../data/mvp_dataset.csv', index_col='Date', parse_dates=True)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from dataset_store import dataset_exists, read_dataset
+from evaluation import walk_forward_evaluate
+from model_registry import save_model
 
+if __name__ == "__main__":
     features = ['MA_7', 'MA_14', 'Sentiment']
+    # The dataset is written by mvp_preprocessing.build_mvp_dataset; only the needed columns are read
+    if not dataset_exists('mvp'):
+        raise SystemExit("❌ No 'mvp' dataset found. Build it first: python mvp_preprocessing.py [TICKER ...]")
+    df = read_dataset('mvp', columns=features + ['Target', 'Close', 'Next_Close'])
     df = df.dropna(subset=features)
 
-    X = df[features]
-    y = df['Target']
-
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
+    # Expanding walk-forward folds over every ticker in the dataset, all
+    # parameter combinations and folds evaluated in parallel
+    folds, summary = walk_forward_evaluate(
+        RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=1),
+        df, features,
+        param_grid={'n_estimators': [100, 300], 'max_depth': [None, 5]},
+        n_folds=5, mode='expanding', gap=1,
+    )
 
-    model = RandomForestClassifier(n_estimators=100, random_state=42)
-    model.fit(X_train, y_train)
-    y_pred = model.predict(X_test)
+    pd.set_option('display.width', 200)
+    print(folds[['params', 'fold', 'test_start', 'test_end', 'accuracy', 'f1', 'total_return',
+                 'buy_hold_return', 'sharpe', 'fit_seconds']].to_string(index=False))
+    print("\nMean over folds:")
+    print(summary[['accuracy', 'precision', 'recall', 'f1', 'total_return', 'sharpe', 'max_drawdown',
+                   'fit_seconds']].to_string())
+    print(f"\n✅ Best parameters: {summary.index[0]} (accuracy {summary['accuracy'].iloc[0]:.3f})")
 
-    acc = accuracy_score(y_test, y_pred)
-    print(f"✅ Model accuracy: {acc:.2f}")
-    print(classification_report(y_test, y_pred, digits=3))
+    # Refit the best parameters on all history and register the model
+    best_params = ast.literal_eval(summary.index[0])
+    model = RandomForestClassifier(random_state=42, **best_params).fit(df[features].to_numpy(), df['Target'].to_numpy())
+    save_model(model, 'mvp_rf', features, target='Target',
+               train_start=df.index.min(), train_end=df.index.max(), tickers=df['ticker'].unique().tolist(),
+               metrics=summary.iloc[0][['accuracy', 'f1', 'sharpe']].to_dict(), params=best_params)
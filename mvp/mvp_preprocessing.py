@@ -1,110 +1,268 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
-import time
 import os
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
-def download_stock_data(ticker, start_date, end_date, max_retries=3, pause=1.0):
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from providers import YFinanceProvider
+from provider_cache import CachingProvider
+from collection_scheduler import CollectionScheduler, call_with_retries
+from dataset_store import write_dataset, export_csv
+from features import compute_features
+from database import get_daily_sentiment
+from data_preprocessing import update_daily_sentiment
+
+def _close_frame(df):
+    """
+    Reduce a downloaded OHLC frame to a Close-only frame with a DatetimeIndex.
+    """
+    # FIX: Handle MultiIndex columns - flatten the column structure
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+
+    # Keep only Close and ensure it's a copy (avoid chained-assignment warnings)
+    df = df[['Close']].copy()
+    df.index = pd.to_datetime(df.index)
+    # NOTE: keep trading days only (what yfinance returned).
+    return df
+
+def download_stock_data(ticker, start_date, end_date, max_retries=3, pause=1.0, provider=None):
     """
     Download daily OHLC data using yfinance and return a DataFrame with a Close column.
-    Adds defensive checks and retries.
-    """
-    attempt = 0
-    while attempt < max_retries:
-        try:
-            df = yf.download(ticker, start=start_date, end=end_date, progress=False, auto_adjust=True)
-            # yf.download returns an empty DataFrame if ticker failed — handle that
-            if df is None or df.empty:
-                attempt += 1
-                time.sleep(pause)
-                continue
-            
-            # FIX: Handle MultiIndex columns - flatten the column structure
-            if isinstance(df.columns, pd.MultiIndex):
-                df.columns = df.columns.get_level_values(0)
-            
-            # Keep only Close and ensure it's a copy (avoid chained-assignment warnings)
-            df = df[['Close']].copy()
-            df.index = pd.to_datetime(df.index)
-            # NOTE: keep trading days only (what yfinance returned).
-            return df
-        except Exception as e:
-            # Sometimes yfinance returns malformed JSON or has network issues; retry a few times
-            attempt += 1
-            time.sleep(pause)
-            last_exc = e
-    # If we exit loop, either df was empty every time or we hit exception multiple times
-    msg = f"Failed to download data for {ticker} after {max_retries} attempts."
-    if 'last_exc' in locals():
-        raise RuntimeError(msg + f" Last exception: {last_exc}")
-    else:
-        raise RuntimeError(msg + " The returned DataFrame was empty each attempt.")
+    Adds defensive checks and retries with jittered exponential backoff (pause is the base delay).
+    """
+    provider = provider or CachingProvider(YFinanceProvider())
+    try:
+        # yf.download returns an empty DataFrame if ticker failed — retried like an exception
+        df = call_with_retries(provider.download, ticker, start_date, end_date,
+                               max_retries=max_retries, base_delay=pause,
+                               is_empty=lambda df: df is None or df.empty,
+                               progress=False, auto_adjust=True)
+    except RuntimeError as e:
+        raise RuntimeError(f"Failed to download data for {ticker}. {e}")
+    return _close_frame(df)
+
+def download_many(tickers, start_date, end_date, max_workers=8, rate=5.0, provider=None):
+    """
+    Download Close frames for many tickers concurrently (bounded pool + token bucket).
+
+    Returns:
+    dict: ticker -> DataFrame with a Close column; failed tickers are left out.
+    """
+    scheduler = CollectionScheduler(provider or CachingProvider(YFinanceProvider()), max_workers=max_workers, rate=rate)
+    frames = scheduler.download_stock_data(tickers, start_date, end_date, progress=False, auto_adjust=True)
+    return {ticker: _close_frame(df) for ticker, df in frames.items()}
+
+def add_moving_averages(df, windows=[7, 14], by=None):
+    # columns are added in place; df is the frame built by _close_frame (or a panel), not a view
+    return compute_features(df, {'sma': windows}, min_periods=1, by=by)
+
+def add_fake_sentiment(df, seed=42, by=None):
+    if by is None:
+        np.random.seed(seed)
+        df['Sentiment'] = np.random.normal(0, 1, len(df))
+        return df
+    # one stream per ticker so a ticker's values do not depend on the rest of the universe
+    sentiment = np.empty(len(df))
+    keys = df[by].to_numpy()
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    for lo, hi in zip(starts, np.r_[starts[1:], len(df)]):
+        rng = np.random.RandomState([seed, zlib.crc32(str(keys[lo]).encode())])
+        sentiment[lo:hi] = rng.normal(0, 1, hi - lo)
+    df['Sentiment'] = sentiment
+    return df
+
+def add_sentiment(df, daily, by=None, ticker=None, max_age_days=3):
+    """
+    Joins daily Reddit sentiment onto a price frame with an as-of merge.
+
+    Each row gets the latest aggregate on or before its date (within max_age_days);
+    rows without recent posts get a neutral 0.0 and a post count of 0.
 
-def add_moving_averages(df, windows=[7, 14]):
-    # operate on a copy to avoid chained-assignment warnings
-    out = df.copy()
-    for w in windows:
-        out[f'MA_{w}'] = out['Close'].rolling(window=w, min_periods=1).mean()
-    return out
+    Args:
+    df (pd.DataFrame): Date-indexed price frame or panel.
+    daily (pd.DataFrame): Aggregates with ticker, date, avg_sentiment_score and total_posts
+        (database.get_daily_sentiment or data_preprocessing.daily_sentiment).
+    by (str): Ticker column of a panel.
+    ticker (str): Ticker of a single-ticker frame.
+    max_age_days (int): Oldest aggregate that may be carried forward.
 
-def add_fake_sentiment(df, seed=42):
-    out = df.copy()
-    np.random.seed(seed)
-    out['Sentiment'] = np.random.normal(0, 1, len(out))
-    return out
+    Returns:
+    pd.DataFrame: The same frame with Sentiment and Post_Count columns.
+    """
+    if daily is None or daily.empty:
+        # nothing to merge (and an empty frame's object-dtype keys would not match the panel's)
+        df['Sentiment'] = 0.0
+        df['Post_Count'] = np.zeros(len(df), dtype=np.int64)
+        return df
+
+    keys = pd.DataFrame({
+        'Date': pd.to_datetime(df.index).to_numpy(),
+        'ticker': df[by].to_numpy() if by is not None else ticker,
+        'row': np.arange(len(df)),
+    }).sort_values('Date', kind='stable')
+    right = pd.DataFrame({
+        'Date': pd.to_datetime(daily['date']).to_numpy(),
+        'ticker': daily['ticker'].to_numpy(),
+        'Sentiment': daily['avg_sentiment_score'].to_numpy(dtype=np.float64),
+        'Post_Count': daily['total_posts'].to_numpy(dtype=np.float64),
+    }).sort_values('Date', kind='stable')
+    merged = pd.merge_asof(keys, right, on='Date', by='ticker', tolerance=pd.Timedelta(days=max_age_days))
+
+    # scatter back into the frame's own row order
+    order = merged['row'].to_numpy()
+    for column in ('Sentiment', 'Post_Count'):
+        values = np.zeros(len(df))
+        values[order] = np.nan_to_num(merged[column].to_numpy())
+        df[column] = values
+    df['Post_Count'] = df['Post_Count'].astype(np.int64)
+    return df
 
-def add_labels(df, threshold=0.0):
+def add_labels(df, threshold=0.0, by=None):
     """
     Create next-day Target label.
     threshold can be used to create a 'stay' zone, e.g. threshold=0.001 for 0.1% change.
-    Returns a copy with columns Next_Close and Target (1 if next close > current + threshold, else 0).
-    """
-    out = df.copy()
-    
-    # Calculate next close first
-    out['Next_Close'] = out['Close'].shift(-1)
-    
-    # Drop the last row which will have NaN for Next_Close
-    out = out.iloc[:-1].copy()
-    
-    # Calculate the condition properly - use vectorized operations
-    price_change = (out['Next_Close'] - out['Close']) / out['Close']
-    out['Target'] = (price_change > threshold).astype(int)
-    
-    return out
+    Adds Next_Close and Target (1 if next close > current + threshold, else 0) and returns
+    the frame without each ticker's last row (which has no next close).
+    """
+    close = df['Close'].to_numpy(dtype=np.float64)
+    next_close = np.empty_like(close)
+    next_close[:-1] = close[1:]
+    # the last row of every group has no next close
+    last = np.zeros(len(df), dtype=bool)
+    if len(df):
+        last[-1] = True
+    if by is not None:
+        keys = df[by].to_numpy()
+        last[:-1] |= keys[1:] != keys[:-1]
+    next_close[last] = np.nan
+
+    df['Next_Close'] = next_close
+    with np.errstate(invalid='ignore'):
+        df['Target'] = ((next_close - close) / close > threshold).astype(int)
+    return df[~last]
+
+def build_panel(frames):
+    """
+    Stack per-ticker Close frames into one panel sorted by ticker, then date.
+
+    Args:
+    frames (dict): ticker -> Date-indexed frame (sorted by date, as downloaded).
+
+    Returns:
+    pd.DataFrame: Date-indexed panel with a 'ticker' column.
+    """
+    panel = pd.concat({t: frames[t] for t in sorted(frames)}, names=['ticker', 'Date'])
+    return panel.reset_index('ticker')
+
+def build_features(frames, windows=[7, 14], threshold=0.0, seed=42, sentiment=None):
+    """
+    Features and labels for a group of tickers, computed on one panel with no per-stage copies.
+
+    sentiment is a daily aggregate frame (see add_sentiment); without one the
+    Sentiment column is filled with seeded random values.
+
+    Returns:
+    pd.DataFrame: Labelled panel (see build_panel).
+    """
+    panel = build_panel(frames)
+    add_moving_averages(panel, windows=windows, by='ticker')
+    if sentiment is None:
+        add_fake_sentiment(panel, seed=seed, by='ticker')
+    else:
+        add_sentiment(panel, sentiment, by='ticker')
+    return add_labels(panel, threshold=threshold, by='ticker')
+
+def build_universe_features(frames, windows=[7, 14], threshold=0.0, seed=42, workers=None, chunk_size=50,
+                            sentiment=None):
+    """
+    Builds the labelled panel for a whole ticker universe.
+
+    Tickers are split into chunks of chunk_size, and each chunk is turned into a
+    panel and processed with groupby-vectorized operations in a worker process.
+
+    Args:
+    frames (dict): ticker -> Close frame.
+    windows (list): Moving-average windows.
+    threshold (float): Label threshold (see add_labels).
+    seed (int): Fake sentiment seed.
+    sentiment (pd.DataFrame): Daily sentiment aggregates (default: fake sentiment).
+    workers (int): Worker processes (default: CPU count; 0 runs in-process).
+    chunk_size (int): Tickers per task.
+
+    Returns:
+    pd.DataFrame: Panel sorted by ticker and date.
+    """
+    tickers = sorted(frames)
+    chunks = [{t: frames[t] for t in tickers[i:i + chunk_size]} for i in range(0, len(tickers), chunk_size)]
+    if not chunks:
+        return pd.DataFrame()
+    # ship each worker only its own tickers' sentiment
+    sentiments = [None if sentiment is None else sentiment[sentiment['ticker'].isin(list(chunk))]
+                  for chunk in chunks]
+    if workers == 0 or len(chunks) == 1:
+        parts = [build_features(chunk, windows, threshold, seed, part) for chunk, part in zip(chunks, sentiments)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(build_features, chunks, repeat(windows), repeat(threshold), repeat(seed),
+                                  sentiments))
+    return pd.concat(parts) if len(parts) > 1 else parts[0]
+
+def build_mvp_dataset(tickers, start_date, end_date, name='mvp', windows=[7, 14], threshold=0.0,
+                      workers=None, provider=None, max_download_workers=8, rate=5.0, fake_sentiment=False,
+                      refresh_sentiment=True):
+    """
+    Downloads a ticker universe and writes its features and labels as one partitioned dataset.
+
+    Sentiment comes from the daily_sentiment table. With refresh_sentiment the stored
+    Reddit posts mentioning the tickers (collect_reddit_posts + index_ticker_mentions)
+    are scored and aggregated into that table first; fake_sentiment=True restores the
+    random placeholder.
+
+    Returns:
+    tuple: (panel DataFrame, dataset path).
+    """
+    frames = download_many(tickers, start_date, end_date, max_workers=max_download_workers, rate=rate, provider=provider)
+    missing = sorted(set(tickers) - set(frames))
+    if missing:
+        print(f"⚠️ No data for {len(missing)} tickers: {missing}")
+    if not frames:
+        raise RuntimeError(f"No data downloaded for {tickers}")
+    sentiment = None
+    if not fake_sentiment:
+        if refresh_sentiment:
+            update_daily_sentiment(list(frames), start_date, end_date, workers=workers)
+        sentiment = get_daily_sentiment(list(frames), start_date, end_date)
+    if sentiment is not None and sentiment.empty:
+        print("⚠️ No daily sentiment stored for these tickers; Sentiment will be 0.0")
+    panel = build_universe_features(frames, windows=windows, threshold=threshold, workers=workers,
+                                    sentiment=sentiment)
+    return panel, write_dataset(panel, name)
 
 if __name__ == "__main__":
-    ticker = 'AMD'
+    # usage: python mvp_preprocessing.py [TICKER ...]
+    tickers = sys.argv[1:] or ['AMD']
     start_date = '2020-01-01'
     end_date = '2024-01-01'
 
     try:
-        df = download_stock_data(ticker, start_date, end_date)
-        print(f"✅ Downloaded {len(df)} rows for {ticker}")
-        print(f"Initial columns: {df.columns.tolist()}")
-        print(f"Column type: {type(df.columns)}")
+        df, dataset_path = build_mvp_dataset(tickers, start_date, end_date, windows=[7, 14])
     except RuntimeError as e:
         print("❌", e)
         raise
+    print(f"✅ Built {len(df)} rows for {df['ticker'].nunique()} tickers")
+    print(f"Columns: {df.columns.tolist()}")
+    print("✅ MVP dataset saved to", dataset_path)
 
-    df = add_moving_averages(df, windows=[7, 14])
-    print(f"After moving averages: {df.columns.tolist()}")
-    
-    df = add_fake_sentiment(df)
-    print(f"After sentiment: {df.columns.tolist()}")
-    
-    df = add_labels(df)
-    print(f"After labels: {df.columns.tolist()}")
-    print(f"Final shape: {df.shape}")
-
-    # ensure target directory exists
+    # CSV export for tools that still expect it
     out_dir = os.path.join('..', 'data')
     os.makedirs(out_dir, exist_ok=True)
-    out_path = os.path.join(out_dir, 'mvp_dataset.csv')
-
-    df.to_csv(out_path, index=True)
-    print("✅ MVP dataset saved to", out_path)
+    out_path = export_csv('mvp', os.path.join(out_dir, 'mvp_dataset.csv'), tickers=tickers)
+    print("✅ CSV export written to", out_path)
     print(f"\nFirst few rows:")
     print(df.head(10))
     print(f"\nLast few rows:")
-    print(df.tail(5))
\ No newline at end of file
+    print(df.tail(5))
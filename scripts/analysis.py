@@ -1,4 +1,123 @@
+import numpy as np
 import pandas as pd
+from option_chain import OptionChain
+
+def _otm_puts(option_chain, open_price, height):
+    '''
+    Select OTM puts with strikes between open_price - height and open_price using boolean masks.
+
+    An OptionChain is already sorted by (expiration, type, strike), so its puts in
+    the strike window are found by binary search; only the in-the-money flag needs a mask.
+    '''
+    if isinstance(option_chain, OptionChain):
+        puts = option_chain.select(option_type='put', min_strike=open_price - height, max_strike=open_price,
+                                   inclusive=False)
+        if puts.in_the_money is not None and puts.in_the_money.any():
+            puts = puts.where(~puts.in_the_money)
+        return puts
+    strikes = option_chain['strike']
+    mask = (strikes > open_price - height) & (strikes < open_price)
+    if 'inTheMoney' in option_chain:
+        mask &= ~option_chain['inTheMoney'].astype(bool)
+    if 'option_type' in option_chain:
+        mask &= option_chain['option_type'] == 'put'
+    return option_chain[mask]
+
+def lower_pair_indices(group_ids, values=None, max_gap=None):
+    '''
+    Enumerate every (i, j) pair with j < i inside the same group without Python loops.
+
+    Args:
+    group_ids (np.array): Group label per row, with rows already sorted so each group is contiguous.
+    values (np.array): Ascending values within each group (e.g. strikes), used with max_gap.
+    max_gap (float): Only pair rows whose values differ by at most max_gap (default: no limit).
+
+    Returns:
+    np.array, np.array: Row indices of the upper (i) and lower (j) member of every pair.
+    '''
+    n = len(group_ids)
+    if n == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    # Start row of the group each row belongs to
+    is_start = np.r_[True, group_ids[1:] != group_ids[:-1]]
+    first = np.maximum.accumulate(np.where(is_start, np.arange(n), 0))
+
+    if max_gap is not None:
+        # Offset each group so one searchsorted finds the first row within max_gap
+        span = values.max() - values.min() + max_gap + 1
+        key = np.cumsum(is_start) * span + values
+        first = np.maximum(first, np.searchsorted(key, key - max_gap, side='left'))
+
+    # Row i pairs with every earlier row of its group in range
+    counts = np.arange(n) - first
+    upper = np.repeat(np.arange(n), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    lower = np.repeat(first, counts) + offsets
+    return upper, lower
+
+def top_k_rows(df, column, k):
+    '''
+    Return the k rows with the largest values in column, sorted descending.
+    '''
+    if k is None or len(df) <= k:
+        return df.sort_values(column, ascending=False)
+    values = df[column].to_numpy()
+    idx = np.argpartition(np.nan_to_num(-values, nan=np.inf), k - 1)[:k]
+    return df.iloc[idx].sort_values(column, ascending=False)
+
+def put_credit_spread_matrix(option_chain, open_price, height=20, top_k=10, max_width=None,
+                            sell_price='ask', buy_price='ask'):
+    '''
+    Evaluates every (sell, buy) strike pair of a put credit spread for every expiration at once.
+
+    Args:
+    option_chain (OptionChain or pd.DataFrame): Option chain data, optionally spanning several expirations ('expiration' column).
+    open_price (float): Current stock price at the time of the option chain query.
+    height (float): Distance from open_price to determine the range for selecting the spread.
+    top_k (int): Number of best pairs by ROI to return separately.
+    max_width (float): Widest spread (in strike points) to evaluate (default: every pair).
+    sell_price (str): Price column used for the sold (higher strike) put.
+    buy_price (str): Price column used for the bought (lower strike) put.
+
+    Returns:
+    pd.DataFrame: One row per pair with expiration, strikes, collateral, profit, max loss and ROI.
+    pd.DataFrame: The top_k pairs by ROI.
+    '''
+    put_chain = _otm_puts(option_chain, open_price, height)
+    if isinstance(put_chain, OptionChain):
+        expirations = put_chain['expiration']
+    elif 'expiration' in put_chain:
+        put_chain = put_chain.sort_values(['expiration', 'strike'])
+        expirations = put_chain['expiration'].to_numpy()
+    else:
+        put_chain = put_chain.sort_values('strike')
+        expirations = np.zeros(len(put_chain), dtype=np.int8)
+
+    strikes = np.asarray(put_chain['strike'], dtype=np.float64)
+    sell_prices = np.asarray(put_chain[sell_price], dtype=np.float64)
+    buy_prices = np.asarray(put_chain[buy_price], dtype=np.float64)
+
+    # Sell the higher strike, buy the lower one, within each expiration
+    sell, buy = lower_pair_indices(expirations, strikes, max_width)
+    collateral = (strikes[sell] - strikes[buy]) * 100
+    profit = (sell_prices[sell] - buy_prices[buy]) * 100
+    with np.errstate(divide='ignore', invalid='ignore'):
+        roi = np.where(collateral > 0, profit / collateral * 100, np.nan)
+
+    pairs = pd.DataFrame({
+        'Expiration': expirations[sell],
+        'Sell Strike': strikes[sell],
+        'Buy Strike': strikes[buy],
+        'Collateral': collateral,
+        'Profit': profit,
+        'Max Loss': collateral - profit,
+        'ROI': roi,
+    })
+    if 'expiration' not in put_chain:
+        pairs = pairs.drop(columns='Expiration')
+
+    return pairs, top_k_rows(pairs, 'ROI', top_k)
 
 def calculate_put_credit_spread(option_chain, open_price, height=20):
     '''
@@ -6,55 +125,39 @@ def calculate_put_credit_spread(option_chain, open_price, height=20):
     for a put credit spread strategy.
 
     Args:
-    option_chain (pd.DataFrame): DataFrame containing the option chain data.
+    option_chain (OptionChain or pd.DataFrame): The option chain data.
     open_price (float): Current stock price at the time of the option chain query.
     height (float): Distance from open_price to determine the range for selecting the spread.
 
     Returns:
     pd.DataFrame: A DataFrame with the results for collateral, profit, max loss, ROI, and flags for max ROI.
     '''
-    max_range = open_price - height
-
     # Filter out OTM puts within the range between max_range and open_price
-    put_chain = option_chain.query(f'inTheMoney == False and option_type == "put" and {max_range} < strike < {open_price}')
-
-    # Find the sell strike (highest premium)
-    max_id = put_chain['strike'].idxmax()  # Select strike with highest ask price
-    sell_strike = put_chain.loc[max_id, 'strike']
-    sell_price = put_chain.loc[max_id, 'ask']
-
-    # Initialize lists to hold collateral, profit, max_loss, and ROI values
-    strikes = []
-    collateral = []
-    profit = []
-    max_loss = []
-    roi = []
-
-    # Calculate for each row in the put_chain (potential buy strikes)
-    for idx, row in put_chain.iterrows():
-        # Calculate the collateral (difference between strikes)
-        strikes.append(row['strike'])
-        collateral_amount = (sell_strike - row['strike']) * 100  # Multiply by 100 for contract size
-        premium_received = (sell_price - row['ask']) * 100  # Premium received for selling the option
-
-        collateral.append(collateral_amount)
-        profit.append(premium_received)
-
-        max_loss.append(collateral_amount - premium_received)
-        if(collateral_amount<=0):
-            roi.append(None)
-        else:
-            roi.append((premium_received / collateral_amount) * 100)  # ROI as percentage
+    put_chain = _otm_puts(option_chain, open_price, height)
+
+    strikes = np.asarray(put_chain['strike'], dtype=np.float64)
+    asks = np.asarray(put_chain['ask'], dtype=np.float64)
+
+    # The sell leg is the highest strike in the window
+    max_id = np.argmax(strikes)
+    sell_strike = strikes[max_id]
+    sell_price = asks[max_id]
+
+    # Evaluate every potential buy strike at once
+    collateral = (sell_strike - strikes) * 100  # Multiply by 100 for contract size
+    profit = (sell_price - asks) * 100  # Premium received for selling the option
+    with np.errstate(divide='ignore', invalid='ignore'):
+        roi = np.where(collateral > 0, profit / collateral * 100, np.nan)  # ROI as percentage
 
     # Create a DataFrame from the results and add a flag for max ROI
     result_df = pd.DataFrame({
         'Collateral': collateral,
         'Profit': profit,
-        'Max Loss': max_loss,
+        'Max Loss': collateral - profit,
         'ROI': roi
     }, index = strikes)
 
     # Find the option with the highest ROI and add a flag for it
     result_df['Max ROI Flag'] = result_df['ROI'] == result_df['ROI'].max()
 
-    return result_df, sell_strike, sell_price
\ No newline at end of file
+    return result_df, sell_strike, sell_price
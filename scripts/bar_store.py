@@ -0,0 +1,145 @@
+import re
+import sqlite3
+import time
+import numpy as np
+import pandas as pd
+from database import BARS_QUERY, connect_db
+
+'''
+
+Intraday bar store
+
+'''
+
+# Stored intervals (seconds) and the finer table each rollup is built from
+BAR_INTERVALS = {'1m': 60, '5m': 300, '15m': 900, '1h': 3600, '1d': 86400}
+ROLLUP_SOURCES = {'5m': '1m', '15m': '5m', '1h': '15m', '1d': '1h'}
+
+BAR_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+def interval_seconds(interval):
+    """'5m' -> 300, '2h' -> 7200, '1d' -> 86400."""
+    match = re.fullmatch(r'(\d+)\s*(m|min|h|d)', interval.strip().lower())
+    if match is None:
+        raise ValueError(f"Unsupported bar interval: {interval}")
+    count, unit = int(match.group(1)), match.group(2)
+    return count * {'m': 60, 'min': 60, 'h': 3600, 'd': 86400}[unit]
+
+def _epoch_seconds(index):
+    """Epoch seconds for a DatetimeIndex; naive times are taken as UTC."""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    return index.values.astype('datetime64[s]').astype(np.int64)
+
+def rollup(ts, open_, high, low, close, volume, seconds):
+    """
+    Aggregates time-sorted bars into buckets of `seconds` aligned to the epoch.
+
+    Returns:
+    tuple: (bucket ts, open, high, low, close, volume) arrays.
+    """
+    if len(ts) == 0:
+        return ts, open_, high, low, close, volume
+    buckets = ts - ts % seconds
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(ts)] - 1
+    return (buckets[starts], open_[starts], np.maximum.reduceat(high, starts), np.minimum.reduceat(low, starts),
+            close[ends], np.add.reduceat(volume, starts))
+
+def _upsert(conn, interval, ticker, arrays):
+    conn.executemany(f'''INSERT OR REPLACE INTO bars_{interval} (ticker, ts, open, high, low, close, volume)
+                         VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                     zip([ticker] * len(arrays[0]), *(a.tolist() for a in arrays)))
+
+def _read_bars(conn, interval, ticker, start, end):
+    rows = conn.execute(BARS_QUERY.format(table=f'bars_{interval}'), (ticker, start, end)).fetchall()
+    if not rows:
+        return tuple(np.zeros(0) for _ in range(6))
+    data = np.array(rows, dtype=np.float64)
+    return (data[:, 0].astype(np.int64), *(data[:, i] for i in range(1, 5)), data[:, 5].astype(np.int64))
+
+def insert_minute_bars(ticker, bars):
+    """
+    Stores 1-minute bars and refreshes the rollups they touch, in one transaction.
+
+    Only the rollup buckets overlapping the new minutes are recomputed, each from
+    the next finer table (1m -> 5m -> 15m -> 1h -> 1d), so ingesting a few new
+    minutes costs a few bucket reads rather than a full resample. Revised
+    minutes are handled the same way.
+
+    Args:
+    ticker (str): Ticker symbol.
+    bars (pd.DataFrame): Minute bars indexed by time (tz-aware, or naive UTC) with
+        Open, High, Low, Close and Volume columns.
+
+    Returns:
+    dict: interval -> rows written.
+    """
+    if isinstance(bars.columns, pd.MultiIndex):
+        bars = bars.set_axis(bars.columns.get_level_values(0), axis=1)
+    bars = bars.dropna(subset=['Close'])
+    if bars.empty:
+        return {}
+    ts = _epoch_seconds(bars.index)
+    ts = ts - ts % 60
+    order = np.argsort(ts, kind='stable')
+    arrays = [ts[order]] + [bars[c].to_numpy(dtype=np.float64)[order] for c in BAR_COLUMNS[:4]]
+    # yfinance leaves some minutes' volume empty; count them as no volume rather than cast NaN to int
+    volume = np.nan_to_num(bars['Volume'].to_numpy(dtype=np.float64), nan=0.0)
+    arrays.append(volume[order].astype(np.int64))
+    # Duplicate minutes collapse into one bar
+    arrays = list(rollup(*arrays, 60))
+
+    written = {}
+    start = time.perf_counter()
+    try:
+        with connect_db() as conn:
+            _upsert(conn, '1m', ticker, arrays)
+            written['1m'] = len(arrays[0])
+            first, last = int(arrays[0][0]), int(arrays[0][-1])
+            for interval, source in ROLLUP_SOURCES.items():
+                seconds = BAR_INTERVALS[interval]
+                lo, hi = first - first % seconds, last - last % seconds + seconds
+                bucket_arrays = rollup(*_read_bars(conn, source, ticker, lo, hi), seconds)
+                _upsert(conn, interval, ticker, bucket_arrays)
+                written[interval] = len(bucket_arrays[0])
+    except sqlite3.Error as e:
+        print(f"Error inserting minute bars for {ticker}: {e}")
+        return {}
+    print(f"Inserted {written['1m']} minute bars for {ticker} in {time.perf_counter() - start:.3f}s "
+          f"(rollups: {', '.join(f'{k} {v}' for k, v in written.items() if k != '1m')})")
+    return written
+
+def closest_interval(seconds):
+    """The coarsest stored interval that evenly divides the requested one."""
+    candidates = [name for name, size in BAR_INTERVALS.items() if seconds % size == 0]
+    if not candidates:
+        raise ValueError(f"No stored interval divides {seconds}s bars")
+    return max(candidates, key=BAR_INTERVALS.get)
+
+def get_bars(ticker, start, end, interval='5m'):
+    """
+    Fetches bars of any interval, served from the closest stored rollup.
+
+    Intervals that are stored (1m, 5m, 15m, 1h, 1d) are read directly; others
+    (e.g. 30m, 2h) are aggregated from the coarsest stored table that divides them.
+
+    Args:
+    ticker (str): Ticker symbol.
+    start: First time (inclusive; naive times are UTC).
+    end: Last time (exclusive).
+    interval (str): Bar size such as '1m', '30m', '4h' or '1d'.
+
+    Returns:
+    pd.DataFrame: Open, High, Low, Close, Volume indexed by UTC bar start time.
+    """
+    seconds = interval_seconds(interval)
+    source = closest_interval(seconds)
+    lo, hi = (int(_epoch_seconds([t])[0]) for t in (start, end))
+    with connect_db() as conn:
+        arrays = _read_bars(conn, source, ticker, lo - lo % seconds, hi)
+    if BAR_INTERVALS[source] != seconds:
+        arrays = rollup(*arrays, seconds)
+    index = pd.to_datetime(arrays[0], unit='s', utc=True).rename('Datetime')
+    return pd.DataFrame(dict(zip(BAR_COLUMNS, arrays[1:])), index=index)
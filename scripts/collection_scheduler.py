@@ -0,0 +1,174 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import pandas as pd
+from providers import YFinanceProvider
+
+'''
+
+Concurrent, rate-limited data collection
+
+'''
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: allows `rate` requests per second on average
+    with bursts of up to `capacity` requests.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    """Exponential backoff with full jitter for the given (0-based) retry attempt."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+def call_with_retries(func, *args, max_retries=3, base_delay=0.5, limiter=None, is_empty=None, **kwargs):
+    """
+    Call func(*args, **kwargs), retrying failures with jittered exponential backoff.
+
+    Args:
+    func (callable): The provider call.
+    max_retries (int): Total attempts before giving up.
+    base_delay (float): Backoff base in seconds.
+    limiter (TokenBucket): Rate limiter to acquire before every attempt.
+    is_empty (callable): Treat results for which this returns True as failures (e.g. empty frames).
+
+    Returns:
+    The result of func.
+
+    Raises:
+    RuntimeError: When every attempt failed.
+    """
+    last_exc = None
+    for attempt in range(max_retries):
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            result = func(*args, **kwargs)
+            if is_empty is None or not is_empty(result):
+                return result
+        except Exception as e:
+            last_exc = e
+        if attempt < max_retries - 1:
+            time.sleep(backoff_delay(attempt, base_delay))
+
+    msg = f"{getattr(func, '__name__', 'call')}{args} failed after {max_retries} attempts."
+    if last_exc is not None:
+        raise RuntimeError(msg + f" Last exception: {last_exc}")
+    raise RuntimeError(msg + " The result was empty each attempt.")
+
+def _frame_is_empty(df):
+    return df is None or df.empty
+
+class CollectionScheduler:
+    """
+    Fetches many tickers (and every option expiration) concurrently.
+
+    At most `max_workers` requests are in flight, all requests share one token
+    bucket of `rate` requests per second, and failed requests are retried with
+    jittered exponential backoff.
+    """
+
+    def __init__(self, provider=None, max_workers=8, rate=5.0, burst=None, max_retries=3, base_delay=0.5):
+        self.provider = provider or YFinanceProvider()
+        self.max_workers = max_workers
+        self.limiter = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.errors = {}
+
+    def _call(self, func, *args, is_empty=None, **kwargs):
+        return call_with_retries(func, *args, max_retries=self.max_retries, base_delay=self.base_delay,
+                                 limiter=self.limiter, is_empty=is_empty, **kwargs)
+
+    def map(self, func, keys, *args, is_empty=None, **kwargs):
+        """
+        Run func(*key, *args, **kwargs) for every key tuple through the pool.
+
+        Returns:
+        dict: key -> result for the calls that succeeded; failures are recorded in self.errors.
+        """
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self._call, func, *key, *args, is_empty=is_empty, **kwargs): key
+                       for key in keys}
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    results[key] = future.result()
+                except RuntimeError as e:
+                    self.errors[key] = e
+                    print(f"❌ {e}")
+        return results
+
+    def download_stock_data(self, tickers, start_date, end_date, **kwargs):
+        """
+        Download bars for every ticker concurrently.
+
+        Returns:
+        dict: ticker -> DataFrame.
+        """
+        results = self.map(self.provider.download, [(t,) for t in tickers], start_date, end_date,
+                           is_empty=_frame_is_empty, **kwargs)
+        return {key[0]: df for key, df in results.items()}
+
+    def download_options_data(self, tickers, expirations=None):
+        """
+        Download the option chain of every expiration of every ticker concurrently.
+
+        Args:
+        tickers (list): Underlying ticker symbols.
+        expirations (dict): Optional ticker -> list of expirations; all listed expirations otherwise.
+
+        Returns:
+        dict: (ticker, expiration) -> option chain (with .calls and .puts).
+        """
+        if expirations is None:
+            listed = self.map(self.provider.options_expirations, [(t,) for t in tickers])
+            expirations = {key[0]: dates for key, dates in listed.items()}
+        keys = [(ticker, expiration) for ticker, dates in expirations.items() for expiration in dates]
+        return self.map(self.provider.option_chain, keys)
+
+    def get_latest_bars(self, tickers):
+        """
+        Time and close of the latest 1-minute bar for every ticker.
+
+        Returns:
+        dict: ticker -> (bar close time in epoch seconds, price); naive bar times are taken as UTC.
+        """
+        results = self.map(self.provider.history, [(t,) for t in tickers], is_empty=_frame_is_empty)
+        latest = {}
+        for key, data in results.items():
+            start = pd.Timestamp(data.index[-1])
+            start = start.tz_localize('UTC') if start.tzinfo is None else start
+            # A bar is indexed by its start; its close is the price at the end of the minute
+            latest[key[0]] = (start.timestamp() + 60, data["Close"].iloc[-1])
+        return latest
+
+    def get_prices(self, tickers):
+        """
+        Latest 1-minute close for every ticker.
+
+        Returns:
+        dict: ticker -> price.
+        """
+        return {ticker: price for ticker, (_, price) in self.get_latest_bars(tickers).items()}
@@ -1,6 +1,17 @@
-import yfinance as yf
-from database import insert_stock_data, insert_options_data
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from database import insert_stock_data, insert_options_data, bulk_insert_stock_data, get_latest_dates, update_watermark
+from database import record_options_snapshot, bulk_insert_reddit_posts, get_reddit_checkpoint, update_reddit_checkpoint
 from data_preprocessing import preprocess_stock_data, preprocess_options_data
+from providers import YFinanceProvider
+from provider_cache import CachingProvider
+from collection_scheduler import CollectionScheduler
+from reddit_sources import PrawSource
+from ticker_mentions import TickerMatcher
+from quote_service import StaleQuoteError
+from bar_store import insert_minute_bars
 
 '''
 
@@ -8,85 +19,315 @@ Methods for gathering Stock data
 
 '''
 
-def get_price(ticker):
+_default_provider = None
+
+def _provider(provider=None):
+    """Return the given provider, or a shared yfinance provider behind the on-disk cache."""
+    global _default_provider
+    if provider is not None:
+        return provider
+    if _default_provider is None:
+        _default_provider = CachingProvider(YFinanceProvider())
+    return _default_provider
+
+_quote_service = None
+
+def use_quote_service(service):
+    """Serve get_price from a running QuoteService (None to always download)."""
+    global _quote_service
+    _quote_service = service
 
-    data = yf.Ticker(ticker).history(period="1d", interval="1m")
+def get_price(ticker, provider=None, quotes=None):
+    # Answer from memory when a quote service tracks the ticker and its quote is fresh
+    quotes = quotes or _quote_service
+    if quotes is not None:
+        try:
+            return quotes.get_price(ticker)
+        except StaleQuoteError:
+            pass
+
+    data = _provider(provider).history(ticker, period="1d", interval="1m")
     return data["Close"].iloc[-1]
 
 
-def download_stock_data(ticker, start_date, end_date):
-    # Use yfinance to download stock data
-    stock_data = yf.download(ticker, start=start_date, end=end_date)
+def download_stock_data(ticker, start_date, end_date, provider=None):
+    # Use the provider (yfinance by default) to download stock data
+    stock_data = _provider(provider).download(ticker, start_date, end_date)
     return stock_data
 
-def download_options_data(ticker, expiration_date):
-    # Use yfinance to get options data
-    ticker_obj = yf.Ticker(ticker)
-    options_chain = ticker_obj.option_chain(expiration_date)
-    return preprocess_options_data(options_chain,expiration_date)
+def download_options_data(ticker, expiration_date, provider=None):
+    # Use the provider (yfinance by default) to get options data
+    options_chain = _provider(provider).option_chain(ticker, expiration_date)
+    return preprocess_options_data(options_chain, expiration_date, ticker)
 
-def save_stock_data_to_db(ticker, start_date, end_date):
+def save_stock_data_to_db(ticker, start_date, end_date, provider=None):
     """Download, preprocess, and save stock data to the database."""
-    raw_stock_data = download_stock_data(ticker, start_date, end_date)
+    raw_stock_data = download_stock_data(ticker, start_date, end_date, provider)
     if not raw_stock_data.empty:
         preprocessed_stock_data = preprocess_stock_data(raw_stock_data)
         insert_stock_data(ticker, preprocessed_stock_data)  # Save preprocessed data
 
-def save_options_data_to_db(ticker, expiration_date):
+def save_options_data_to_db(ticker, expiration_date, provider=None, history=True):
     """Download, preprocess, and save options data to the database."""
-    raw_options_chain = download_options_data(ticker, expiration_date)
-    if raw_options_chain:
-        preprocessed_options_data = preprocess_options_data(raw_options_chain,expiration_date)
-        if preprocessed_options_data is not None:
-            insert_options_data(ticker, expiration_date, preprocessed_options_data)  # Save preprocessed data
+    # download_options_data already returns the preprocessed OptionChain
+    options_chain = download_options_data(ticker, expiration_date, provider)
+    if len(options_chain):
+        insert_options_data(ticker, expiration_date, options_chain)  # Save preprocessed data
+        if history:
+            record_options_snapshot(ticker, expiration_date, options_chain)
+    return options_chain
+
+def save_intraday_bars(ticker, period='5d', provider=None):
+    """Download recent 1-minute bars and store them with their rollups (see bar_store)."""
+    bars = _provider(provider).history(ticker, period=period, interval='1m')
+    if bars is None or bars.empty:
+        print(f"No intraday bars to insert for {ticker}.")
+        return {}
+    return insert_minute_bars(ticker, bars)
+
+def collect_stock_data(tickers, start_date, end_date, scheduler=None):
+    """
+    Download many tickers concurrently and save them to the database.
+
+    Args:
+    tickers (list): Ticker symbols.
+    start_date (str): First date to download.
+    end_date (str): End of the range (exclusive, as in yfinance).
+    scheduler (CollectionScheduler): Scheduler to use (default: yfinance with default limits).
+
+    Returns:
+    dict: ticker -> preprocessed DataFrame that was saved.
+    """
+    scheduler = scheduler or CollectionScheduler(_provider())
+    frames = scheduler.download_stock_data(tickers, start_date, end_date)
+    for ticker, raw_stock_data in frames.items():
+        frames[ticker] = preprocess_stock_data(raw_stock_data)
+        insert_stock_data(ticker, frames[ticker])
+    return frames
+
+def collect_options_data(tickers, expirations=None, scheduler=None, history=True):
+    """
+    Download every expiration of every ticker concurrently and save them to the database.
+
+    Args:
+    tickers (list): Underlying ticker symbols.
+    expirations (dict): Optional ticker -> list of expirations (default: all listed).
+    scheduler (CollectionScheduler): Scheduler to use (default: yfinance with default limits).
+    history (bool): Also append the pull to the snapshot history (see record_options_snapshot).
+
+    Returns:
+    dict: (ticker, expiration) -> OptionChain that was saved.
+    """
+    scheduler = scheduler or CollectionScheduler(_provider())
+    captured_at = int(time.time())    # one capture time for the whole pull
+    chains = {}
+    for (ticker, expiration_date), options_chain in scheduler.download_options_data(tickers, expirations).items():
+        chains[(ticker, expiration_date)] = preprocess_options_data(options_chain, expiration_date, ticker)
+        insert_options_data(ticker, expiration_date, chains[(ticker, expiration_date)])
+        if history:
+            record_options_snapshot(ticker, expiration_date, chains[(ticker, expiration_date)], captured_at)
+    return chains
+
+def sync_stock_data(tickers, end_date=None, default_start='2000-01-01', overlap_days=5, scheduler=None):
+    """
+    Incrementally refresh stock data: fetch only bars after each ticker's latest stored date.
+
+    A few days before the watermark are re-fetched so revised bars are picked up;
+    unchanged rows are skipped by the upsert, so only new or changed rows are written.
+
+    Args:
+    tickers (list): Ticker symbols.
+    end_date (str): End of the range, exclusive (default: tomorrow).
+    default_start (str): Start date for tickers with no stored rows.
+    overlap_days (int): Calendar days before the watermark to re-fetch.
+    scheduler (CollectionScheduler): Scheduler to use (default: yfinance with default limits).
+
+    Returns:
+    dict: ticker -> number of rows inserted or changed.
+    """
+    scheduler = scheduler or CollectionScheduler(_provider())
+    end = pd.Timestamp(end_date) if end_date else pd.Timestamp.today().normalize() + pd.Timedelta(days=1)
+    latest = get_latest_dates(tickers)
+
+    # Tickers sharing a start date are downloaded together
+    starts = {}
+    for ticker in tickers:
+        start = latest[ticker] - pd.Timedelta(days=overlap_days) if ticker in latest else pd.Timestamp(default_start)
+        if start < end:
+            starts.setdefault(start, []).append(ticker)
+
+    changed = {}
+    for start, group in starts.items():
+        frames = scheduler.download_stock_data(group, start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'))
+        for ticker, raw_stock_data in frames.items():
+            stock_data = preprocess_stock_data(raw_stock_data)
+            stock_data = stock_data[stock_data.index >= start]
+            if stock_data.empty:
+                continue
+            _, _, changed[ticker] = bulk_insert_stock_data(ticker, stock_data)
+            update_watermark(ticker, stock_data.index.max(), changed[ticker])
+    return changed
+
 '''
 
 Methods for gathering reddit posts
 
 '''
 
-import praw
-import pandas as pd
+def _epoch_seconds(date, end_of_day=False):
+    if date is None:
+        return None
+    seconds = int(pd.Timestamp(date).normalize().timestamp())
+    return seconds + 86399 if end_of_day else seconds
 
+def _post_row(submission):
+    return {
+        'id': submission['id'], 'kind': 'post', 'submission_id': submission['id'],
+        'subreddit': submission['subreddit'], 'created_utc': submission['created_utc'],
+        'author': submission['author'], 'score': submission['score'],
+        'title': submission['title'], 'body': submission['body'], 'url': submission['url'],
+    }
 
-def collect_posts(ticker, start_date, end_date, max_results=10):
-    # Set up Reddit API credentials
-    reddit = praw.Reddit(
-        client_id='0U2AHMjW3xj8TaG1FIwDww',
-        client_secret='Ae0EyU-bCxEl8FVyMlnq9ctWWoUzMg',
-        user_agent='myTrendProjectBot v1.0'
-    )
+def _comment_rows(submission, comments):
+    return [{
+        'id': comment['id'], 'kind': 'comment', 'submission_id': submission['id'],
+        'subreddit': submission['subreddit'], 'created_utc': comment['created_utc'],
+        'author': comment['author'], 'score': comment['score'],
+        'title': None, 'body': comment['body'], 'url': None,
+    } for comment in comments]
 
-    # Define the subreddit and how many posts to fetch
-    subreddit = 'wallstreetbets'
+def stream_reddit(source, subreddit='wallstreetbets', tickers=None, start_date=None, end_date=None,
+                  after=None, stop_before=None, limit=None, comment_workers=4, max_pending=16):
+    """
+    Streams a subreddit's submissions (newest first), each followed by its comments.
 
-    # Initialize lists to hold post and comment data
-    posts = []
+    Submissions outside the time window or not mentioning any of the tickers are
+    skipped without fetching their comments. Comment trees are fetched by a
+    bounded thread pool with at most max_pending submissions in flight, and rows
+    are yielded in listing order as soon as their comments are in.
+
+    Args:
+    source (RedditSource): Where submissions and comments come from.
+    subreddit (str): Subreddit name.
+    tickers (list or TickerMatcher): Only keep submissions mentioning one of these symbols
+        (or matched by this matcher, e.g. with company aliases; default: all).
+    start_date (str): Stop at submissions created before this date (UTC).
+    end_date (str): Skip submissions created after this date (inclusive, UTC).
+    after (str): Continue the listing below this submission id.
+    stop_before (int): Stop at submissions created at or before this epoch time.
+    limit (int): Maximum number of submissions to read from the listing.
+    comment_workers (int): Threads fetching comment trees.
+    max_pending (int): Submissions whose comments may be in flight.
+
+    Yields:
+    dict: Rows with id, kind ('post' or 'comment'), submission_id, subreddit, created_utc,
+        author, score, title, body and url.
+    """
+    start, end = _epoch_seconds(start_date), _epoch_seconds(end_date, end_of_day=True)
+    matcher = tickers if isinstance(tickers, TickerMatcher) else TickerMatcher(tickers) if tickers else None
+
+    with ThreadPoolExecutor(max_workers=comment_workers) as pool:
+        pending = deque()
+        for submission in source.submissions(subreddit, after=after, limit=limit):
+            created = submission['created_utc']
+            if (start is not None and created < start) or (stop_before is not None and created <= stop_before):
+                break
+            if end is not None and created > end:
+                continue
+            if matcher is not None and not matcher.search(f"{submission['title']}\n{submission['body']}"):
+                continue
 
-   # Scrape posts and comments from the specified subreddit
-    for submission in reddit.subreddit(subreddit).hot(limit=max_results):
-        # Post data
-        post_data = {
-            'title': submission.title,
-            'url': submission.url,
-            'upvotes': submission.score,
-            'author': submission.author.name if submission.author else None,
-            'created_at': submission.created_utc,
-            'body': submission.selftext,  # Body of the post (text content)
-        }
+            future = pool.submit(source.comments, submission['id']) if submission.get('num_comments', 1) else None
+            pending.append((submission, future))
+            if len(pending) >= max_pending:
+                submission, future = pending.popleft()
+                yield _post_row(submission)
+                yield from _comment_rows(submission, future.result() if future else [])
+        while pending:
+            submission, future = pending.popleft()
+            yield _post_row(submission)
+            yield from _comment_rows(submission, future.result() if future else [])
 
-        # Get comments for the post
-        submission.comments.replace_more(limit=0)  # Remove "More comments" to get all comments
-        comments = [comment.body for comment in submission.comments.list()]  # List of comment bodies
+def collect_reddit_posts(subreddit='wallstreetbets', tickers=None, start_date=None, end_date=None,
+                         source=None, batch_size=500, comment_workers=4, max_pending=16):
+    """
+    Streams a subreddit into the reddit_posts table, resuming from the last checkpoint.
 
-        # Add the comments as part of the post data
-        post_data['comments'] = comments
+    Rows are written in batches at submission boundaries, and after every batch
+    the oldest written submission is checkpointed, so an interrupted pass resumes
+    below it. A finished pass records its newest submission time and the next
+    pass stops there. The checkpoint is per subreddit, so keep the ticker and
+    date filters the same between runs.
 
-        posts.append(post_data)
+    Args:
+    subreddit (str): Subreddit name.
+    tickers (list): Only keep submissions mentioning one of these symbols (default: all).
+    start_date (str): Oldest creation date to collect (UTC).
+    end_date (str): Newest creation date to collect (inclusive, UTC).
+    source (RedditSource): Reddit source (default: praw).
+    batch_size (int): Rows per database write.
+    comment_workers (int): Threads fetching comment trees.
+    max_pending (int): Submissions whose comments may be in flight.
 
-    # Convert the list of posts into a pandas DataFrame
-    df = pd.DataFrame(posts)
+    Returns:
+    int: Number of rows written.
+    """
+    source = source or PrawSource()
+    checkpoint = get_reddit_checkpoint(subreddit)
+    newest = checkpoint.get('newest_created')
+    cursor = checkpoint.get('cursor_id')
+    pass_newest = checkpoint.get('pass_newest_created') if cursor else None
 
-    print(df.head())
+    batch, written = [], 0
+
+    def flush(last_submission):
+        nonlocal batch, written
+        if batch:
+            bulk_insert_reddit_posts(batch)
+            written += len(batch)
+            batch = []
+            update_reddit_checkpoint(subreddit, newest, last_submission, pass_newest)
+
+    last_submission = None
+    for row in stream_reddit(source, subreddit, tickers, start_date, end_date, after=cursor, stop_before=newest,
+                             comment_workers=comment_workers, max_pending=max_pending):
+        if row['kind'] == 'post':
+            if len(batch) >= batch_size:
+                flush(last_submission)
+            pass_newest = max(pass_newest or row['created_utc'], row['created_utc'])
+            last_submission = row['id']
+        batch.append(row)
+    flush(last_submission)
+
+    # The pass is complete: later passes only need submissions newer than it
+    update_reddit_checkpoint(subreddit, max(filter(None, (newest, pass_newest)), default=None), None, None)
+    print(f"Collected {written} reddit rows from r/{subreddit}")
+    return written
+
+def collect_posts(ticker, start_date, end_date, max_results=10, subreddit='wallstreetbets', source=None):
+    """
+    Collects up to max_results submissions mentioning a ticker, with their comments.
+
+    Args:
+    ticker (str): Ticker symbol the submissions must mention.
+    start_date (str): Oldest creation date (UTC).
+    end_date (str): Newest creation date (inclusive, UTC).
+    max_results (int): Number of submissions to return.
+    subreddit (str): Subreddit name.
+    source (RedditSource): Reddit source (default: praw).
+
+    Returns:
+    pd.DataFrame: One row per submission (title, url, upvotes, author, created_at, body, comments).
+    """
+    posts = []
+    for row in stream_reddit(source or PrawSource(), subreddit, [ticker], start_date, end_date):
+        if row['kind'] == 'post':
+            if len(posts) == max_results:
+                break
+            posts.append({'title': row['title'], 'url': row['url'], 'upvotes': row['score'],
+                          'author': row['author'], 'created_at': row['created_utc'],
+                          'body': row['body'], 'comments': []})
+        else:
+            posts[-1]['comments'].append(row['body'])
 
-    return df
\ No newline at end of file
+    return pd.DataFrame(posts, columns=['title', 'url', 'upvotes', 'author', 'created_at', 'body', 'comments'])
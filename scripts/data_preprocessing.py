@@ -1,5 +1,10 @@
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
+from scipy.special import ndtr
 from database import get_stock_data, get_options_data
+from features import compute_features
+from option_chain import OptionChain
 
 def preprocess_stock_data(stock_df):
     """Clean and preprocess the stock DataFrame."""
@@ -13,31 +18,186 @@ def preprocess_stock_data(stock_df):
     
     return stock_df
 
-def preprocess_options_data(options_chain, expiration_date):
-    """Clean and preprocess the options into DataFrame."""
-    # Convert the call and put options data into DataFrames
-    calls_df = options_chain.calls
-    puts_df = options_chain.puts
-    
-    # Add 'type' column to indicate if it's a call or put option
-    calls_df['option_type'] = 'call'
-    puts_df['option_type'] = 'put'
-    
-    # Add the expiration date to both calls and puts DataFrames
-    calls_df['expiration'] = expiration_date
-    puts_df['expiration'] = expiration_date
-    
-    # Combine calls and puts into a single DataFrame
-    combined_options_df = pd.concat([calls_df, puts_df], ignore_index=True)
-    
-    return combined_options_df
+def preprocess_options_data(options_chain, expiration_date, ticker=None):
+    """
+    Clean and preprocess the options into an OptionChain.
+
+    The calls and puts frames are read, not modified. Use OptionChain.to_frame()
+    for the combined DataFrame this used to return.
+    """
+    return OptionChain.from_yfinance(options_chain, expiration_date, ticker)
+
+'''
+
+Black-Scholes greeks and implied volatility
+
+'''
+
+# Greeks per (ticker, expiration, quote timestamp), least recently used evicted first
+GREEKS_CACHE_SIZE = 256
+_greeks_cache = OrderedDict()
+
+def _norm_pdf(x):
+    return np.exp(-0.5 * x * x) / np.sqrt(2 * np.pi)
+
+def _d1_d2(spot, strike, t, rate, dividend_yield, sigma):
+    vol_sqrt_t = sigma * np.sqrt(t)
+    d1 = (np.log(spot / strike) + (rate - dividend_yield + 0.5 * sigma * sigma) * t) / vol_sqrt_t
+    return d1, d1 - vol_sqrt_t
+
+def black_scholes_price(spot, strike, t, rate, dividend_yield, sigma, is_call):
+    '''
+    Vectorized Black-Scholes price for arrays of calls and puts.
+    '''
+    d1, d2 = _d1_d2(spot, strike, t, rate, dividend_yield, sigma)
+    spot_disc = spot * np.exp(-dividend_yield * t)
+    strike_disc = strike * np.exp(-rate * t)
+    call = spot_disc * ndtr(d1) - strike_disc * ndtr(d2)
+    put = strike_disc * ndtr(-d2) - spot_disc * ndtr(-d1)
+    return np.where(is_call, call, put)
+
+def implied_volatility(price, spot, strike, t, rate, dividend_yield, is_call,
+                       low=1e-4, high=5.0, tol=1e-6, max_iter=50):
+    '''
+    Solves for implied volatility of every option at once.
+
+    Each iteration takes a Newton step for all unconverged options and falls back
+    to bisection of the bracket [low, high] wherever the step would leave it, so
+    the solver is as robust as Brent/bisection and as fast as Newton near the root.
+
+    Returns:
+    np.array: Implied volatility per option (NaN when the price is outside the no-arbitrage bounds).
+    '''
+    price, spot, strike, t = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in (price, spot, strike, t)))
+    is_call = np.broadcast_to(np.asarray(is_call, dtype=bool), price.shape)
+    low = np.full(price.shape, low)
+    high = np.full(price.shape, high)
+
+    # Brenner-Subrahmanyam starting point
+    sigma = np.clip(np.sqrt(2 * np.pi / t) * price / spot, low, high)
+    active = np.isfinite(sigma)
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        diff = black_scholes_price(spot, strike, t, rate, dividend_yield, sigma, is_call) - price
+        d1, _ = _d1_d2(spot, strike, t, rate, dividend_yield, sigma)
+        vega = spot * np.exp(-dividend_yield * t) * _norm_pdf(d1) * np.sqrt(t)
+
+        # Price is increasing in sigma, so the sign of diff tightens the bracket
+        high = np.where(active & (diff > 0), sigma, high)
+        low = np.where(active & (diff <= 0), sigma, low)
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            step = sigma - diff / vega
+        bisect = ~np.isfinite(step) | (step <= low) | (step >= high)
+        new_sigma = np.where(bisect, 0.5 * (low + high), step)
+
+        converged = np.abs(diff) < tol
+        sigma = np.where(active & ~converged, new_sigma, sigma)
+        active &= ~converged
+
+    # Prices below intrinsic or above the bound have no solution
+    lower_bound = black_scholes_price(spot, strike, t, rate, dividend_yield, 1e-4, is_call)
+    upper_bound = black_scholes_price(spot, strike, t, rate, dividend_yield, 5.0, is_call)
+    invalid = (price < lower_bound - tol) | (price > upper_bound + tol) | ~np.isfinite(price) | (t <= 0)
+    return np.where(invalid, np.nan, sigma)
+
+def black_scholes_greeks(spot, strike, t, rate, dividend_yield, sigma, is_call):
+    '''
+    Vectorized Black-Scholes greeks.
 
-def calculate_greek(options_chain):
+    Returns:
+    dict: delta, gamma, theta (per calendar day), vega (per vol point) and rho (per rate point).
+    '''
+    d1, d2 = _d1_d2(spot, strike, t, rate, dividend_yield, sigma)
+    sqrt_t = np.sqrt(t)
+    q_disc = np.exp(-dividend_yield * t)
+    r_disc = np.exp(-rate * t)
+    pdf_d1 = _norm_pdf(d1)
+
+    decay = -spot * q_disc * pdf_d1 * sigma / (2 * sqrt_t)
+    call_theta = decay - rate * strike * r_disc * ndtr(d2) + dividend_yield * spot * q_disc * ndtr(d1)
+    put_theta = decay + rate * strike * r_disc * ndtr(-d2) - dividend_yield * spot * q_disc * ndtr(-d1)
+
+    return {
+        'delta': np.where(is_call, q_disc * ndtr(d1), -q_disc * ndtr(-d1)),
+        'gamma': q_disc * pdf_d1 / (spot * sigma * sqrt_t),
+        'theta': np.where(is_call, call_theta, put_theta) / 365,
+        'vega': spot * q_disc * pdf_d1 * sqrt_t / 100,
+        'rho': np.where(is_call, strike * t * r_disc * ndtr(d2), -strike * t * r_disc * ndtr(-d2)) / 100,
+    }
+
+def _option_prices(chain):
+    '''
+    Mid price where both sides are quoted, last traded price otherwise.
     '''
-    Calculates the greeks of an option
+    bid = chain['bid'].to_numpy(dtype=np.float64)
+    ask = chain['ask'].to_numpy(dtype=np.float64)
+    last = chain['lastPrice'].to_numpy(dtype=np.float64)
+    return np.where((bid > 0) & (ask > 0), 0.5 * (bid + ask), last)
+
+def _greeks_frame(chain, spot, rate, dividend_yield, quote_time):
+    expiries = pd.to_datetime(chain['expiration']).to_numpy()
+    # Options stop trading at the close of the expiration day (approximated as 16:00)
+    seconds = (expiries + np.timedelta64(16, 'h') - np.datetime64(quote_time)) / np.timedelta64(1, 's')
+    t = np.maximum(seconds / (365 * 24 * 3600), 1e-6)
+
+    strike = chain['strike'].to_numpy(dtype=np.float64)
+    is_call = (chain['option_type'] == 'call').to_numpy()
+
+    iv = implied_volatility(_option_prices(chain), spot, strike, t, rate, dividend_yield, is_call)
+    greeks = black_scholes_greeks(spot, strike, t, rate, dividend_yield, iv, is_call)
+    return pd.DataFrame({'iv': iv, **greeks}, index=chain.index)
+
+def calculate_greek(options_chain, spot, rate=0.04, dividend_yield=0.0, quote_time=None, ticker=None):
     '''
+    Calculates the implied volatility and greeks of every option in a chain.
+
+    Results are cached per (ticker, expiration, quote timestamp, spot, rate, dividend
+    yield) when ticker and quote_time are given, so repeated screens of the same
+    quotes are free and what-if screens with another spot or rate are recomputed.
 
+    Args:
+    options_chain (OptionChain or pd.DataFrame): Chain from preprocess_options_data (one or more expirations).
+    spot (float): Underlying price at quote_time.
+    rate (float): Continuously compounded risk-free rate.
+    dividend_yield (float): Continuous dividend yield of the underlying.
+    quote_time (datetime): Time the quotes were taken (default: now).
+    ticker (str): Underlying ticker, used for the cache key.
 
+    Returns:
+    pd.DataFrame: The chain with iv, delta, gamma, theta, vega and rho columns added.
+    '''
+    if isinstance(options_chain, OptionChain):
+        options_chain = options_chain.to_frame()
+    use_cache = ticker is not None and quote_time is not None
+    inputs = (float(spot), float(rate), float(dividend_yield))    # part of the cache key
+    quote_time = pd.Timestamp(quote_time if quote_time is not None else pd.Timestamp.now()).tz_localize(None)
+
+    parts = []
+    missing = np.ones(len(options_chain), dtype=bool)
+    if use_cache:
+        expirations = options_chain['expiration'].to_numpy()
+        for expiration in pd.unique(expirations):
+            key = (ticker, expiration, quote_time, *inputs)
+            cached = _greeks_cache.get(key)
+            if cached is not None and cached.index.equals(options_chain.index[expirations == expiration]):
+                _greeks_cache.move_to_end(key)
+                parts.append(cached)
+                missing &= expirations != expiration
+
+    if missing.any():
+        # Every uncached row goes through one vectorized pass
+        computed = _greeks_frame(options_chain[missing], spot, rate, dividend_yield, quote_time)
+        parts.append(computed)
+        if use_cache:
+            for expiration, frame in computed.groupby(options_chain.loc[missing, 'expiration'].to_numpy()):
+                _greeks_cache[(ticker, expiration, quote_time, *inputs)] = frame
+            while len(_greeks_cache) > GREEKS_CACHE_SIZE:
+                _greeks_cache.popitem(last=False)
+
+    greeks = pd.concat(parts).reindex(options_chain.index)
+    return options_chain.join(greeks)
 
 def add_moving_averages(df, window_short=50, window_long=200):
     """
@@ -51,9 +211,7 @@ def add_moving_averages(df, window_short=50, window_long=200):
     Returns:
     pd.DataFrame: The DataFrame with added moving averages.
     """
-    df[f'MA_{window_short}'] = df['Close'].rolling(window=window_short).mean()
-    df[f'MA_{window_long}'] = df['Close'].rolling(window=window_long).mean()
-    return df
+    return compute_features(df, {'sma': [window_short, window_long]})
 
 
 
@@ -65,10 +223,27 @@ post preprocessing
 
 '''
 
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from nltk.sentiment import SentimentIntensityAnalyzer
+from database import bulk_insert_daily_sentiment, get_ticker_posts
+import os
 import pandas as pd
 import re
 
+# Compiled once; URLs, mentions and hashtags are removed in a single pass
+_LINKS_AND_TAGS_RE = re.compile(r"http\S+|www\S+|https\S+|@\w+|#\w+", flags=re.MULTILINE)
+_NON_ALPHA_RE = re.compile(r"[^a-zA-Z\s]")
+
+# One analyzer per process (the main process or each pool worker)
+_sia = None
+
+def _analyzer():
+    global _sia
+    if _sia is None:
+        _sia = SentimentIntensityAnalyzer()
+    return _sia
+
 def clean_post(post):
     """
     Cleans the post text by removing URLs, mentions, hashtags, emojis, and special characters.
@@ -79,12 +254,37 @@ def clean_post(post):
     Returns:
         str: The cleaned post text.
     """
-    post = re.sub(r"http\S+|www\S+|https\S+", '', post, flags=re.MULTILINE)  # Remove URLs
-    post = re.sub(r"@\w+|#\w+", '', post)  # Remove mentions and hashtags
-    post = re.sub(r"[^a-zA-Z\s]", '', post)  # Remove special characters and emojis
+    post = _LINKS_AND_TAGS_RE.sub('', post)  # Remove URLs, mentions and hashtags
+    post = _NON_ALPHA_RE.sub('', post)  # Remove special characters and emojis
     post = post.lower()  # Convert to lowercase
     return post.strip()
 
+def score_texts(texts):
+    """
+    Cleans and scores a batch of raw texts with VADER.
+
+    Args:
+        texts (list): Raw post or comment texts.
+
+    Returns:
+        list: Compound sentiment score per text.
+    """
+    sia = _analyzer()
+    return [sia.polarity_scores(clean_post(text))['compound'] for text in texts]
+
+def sentiment_labels(scores):
+    """
+    Maps compound scores to 'positive', 'neutral' or 'negative'.
+
+    Args:
+        scores (array-like): Compound sentiment scores.
+
+    Returns:
+        np.array: Label per score.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    return np.select([scores > 0.05, scores < -0.05], ['positive', 'negative'], default='neutral')
+
 def analyze_sentiment(posts_df):
     """
     Performs sentiment analysis on a DataFrame of posts.
@@ -95,21 +295,91 @@ def analyze_sentiment(posts_df):
     Returns:
         pd.DataFrame: The original DataFrame with added sentiment scores and labels.
     """
-    sia = SentimentIntensityAnalyzer()
+    sia = _analyzer()
 
     # Clean the posts
-    posts_df['cleaned_text'] = posts_df['text'].apply(clean_post)
+    posts_df['cleaned_text'] = [clean_post(text) for text in posts_df['text']]
 
     # Apply VADER for sentiment analysis
-    posts_df['sentiment_score'] = posts_df['cleaned_text'].apply(lambda x: sia.polarity_scores(x)['compound'])
+    posts_df['sentiment_score'] = [sia.polarity_scores(text)['compound'] for text in posts_df['cleaned_text']]
 
     # Add sentiment labels
-    posts_df['sentiment_label'] = posts_df['sentiment_score'].apply(
-        lambda score: 'positive' if score > 0.05 else ('negative' if score < -0.05 else 'neutral')
-    )
+    posts_df['sentiment_label'] = sentiment_labels(posts_df['sentiment_score'])
 
     return posts_df
 
+def posts_to_texts(posts_df):
+    """
+    Flattens collected posts into one row per post and per comment.
+
+    Args:
+        posts_df (pd.DataFrame): Posts as returned by collect_posts (title, body, comments, ...).
+
+    Returns:
+        pd.DataFrame: Rows with 'text', 'kind' ('post' or 'comment') and the post's other columns.
+    """
+    meta = posts_df.drop(columns=['comments', 'title', 'body'], errors='ignore')
+    posts = meta.assign(kind='post', text=posts_df['title'].fillna('') + '\n' + posts_df['body'].fillna(''))
+    if 'comments' not in posts_df:
+        return posts.reset_index(drop=True)
+
+    comments = meta.assign(kind='comment', text=posts_df['comments']).explode('text').dropna(subset=['text'])
+    return pd.concat([posts, comments], ignore_index=True)
+
+def _rebatch(chunks, text_column, batch_size):
+    """
+    Re-slices an iterable of DataFrames into frames of at most batch_size rows.
+    """
+    for chunk in chunks:
+        chunk = chunk.dropna(subset=[text_column])
+        for start in range(0, len(chunk), batch_size):
+            yield chunk.iloc[start:start + batch_size]
+
+def stream_sentiment(chunks, text_column='text', batch_size=2000, workers=None, max_pending=None):
+    """
+    Scores a stream of post/comment frames with bounded memory.
+
+    Input chunks (e.g. pd.read_csv(..., chunksize=N) or posts_to_texts over a
+    stream of collected posts) are re-sliced into batches whose texts are fanned
+    out to a process pool; each worker keeps its own analyzer. At most
+    max_pending batches are in flight, and scored batches are yielded in input
+    order as soon as they are ready.
+
+    Args:
+        chunks (iterable): DataFrames with a text column.
+        text_column (str): Column holding the raw text.
+        batch_size (int): Rows per scoring task.
+        workers (int): Worker processes (default: CPU count; 0 scores in-process).
+        max_pending (int): Batches in flight (default: 2 per worker).
+
+    Yields:
+        pd.DataFrame: Each batch with sentiment_score and sentiment_label columns added.
+    """
+    batches = _rebatch(chunks, text_column, batch_size)
+
+    def finish(batch, scores):
+        return batch.assign(sentiment_score=scores, sentiment_label=sentiment_labels(scores))
+
+    if workers == 0:
+        for batch in batches:
+            yield finish(batch, score_texts(batch[text_column].astype(str).tolist()))
+        return
+
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for batch in batches:
+            pending.append((batch, pool.submit(score_texts, batch[text_column].astype(str).tolist())))
+            if len(pending) >= max_pending:
+                batch, future = pending.popleft()
+                yield finish(batch, future.result())
+        while pending:
+            batch, future = pending.popleft()
+            yield finish(batch, future.result())
+
+SENTIMENT_LABELS = ('positive', 'neutral', 'negative')
+
 def aggregate_daily_sentiment(posts_df):
     """
     Aggregates sentiment metrics for a single day.
@@ -120,17 +390,103 @@ def aggregate_daily_sentiment(posts_df):
     Returns:
         dict: Dictionary of aggregated sentiment metrics (counts and averages).
     """
-    total_posts = len(posts_df)
-    positive_count = len(posts_df[posts_df['sentiment_label'] == 'positive'])
-    neutral_count = len(posts_df[posts_df['sentiment_label'] == 'neutral'])
-    negative_count = len(posts_df[posts_df['sentiment_label'] == 'negative'])
-
-    avg_sentiment_score = posts_df['sentiment_score'].mean()
+    counts = posts_df['sentiment_label'].value_counts()
 
     return {
-        'total_posts': total_posts,
-        'positive_count': positive_count,
-        'neutral_count': neutral_count,
-        'negative_count': negative_count,
-        'avg_sentiment_score': avg_sentiment_score
-    }
\ No newline at end of file
+        'total_posts': len(posts_df),
+        'positive_count': int(counts.get('positive', 0)),
+        'neutral_count': int(counts.get('neutral', 0)),
+        'negative_count': int(counts.get('negative', 0)),
+        'avg_sentiment_score': posts_df['sentiment_score'].mean()
+    }
+
+def _post_dates(created):
+    """Normalizes created_at values (epoch seconds or datetimes) to UTC calendar dates."""
+    if pd.api.types.is_numeric_dtype(created):
+        created = pd.to_datetime(created, unit='s')
+    else:
+        created = pd.to_datetime(created)
+    return created.dt.normalize() if created.dt.tz is None else created.dt.tz_convert(None).dt.normalize()
+
+def daily_sentiment(scored_df, ticker=None, ticker_column='ticker', time_column='created_utc'):
+    """
+    Aggregates scored posts per (ticker, date) in one groupby pass.
+
+    Args:
+        scored_df (pd.DataFrame): Rows with sentiment_score, sentiment_label and a timestamp column.
+        ticker (str): Ticker for frames without a ticker column.
+        ticker_column (str): Column holding the ticker each row is about.
+        time_column (str): Post timestamp (epoch seconds or datetime); collect_posts frames use 'created_at'.
+
+    Returns:
+        pd.DataFrame: One row per (ticker, date) with total_posts, positive_count, neutral_count,
+        negative_count and avg_sentiment_score, sorted by ticker and date.
+    """
+    labels = scored_df['sentiment_label'].to_numpy()
+    keys = pd.DataFrame({
+        'ticker': scored_df[ticker_column].to_numpy() if ticker_column in scored_df else ticker,
+        'date': _post_dates(scored_df[time_column]).to_numpy(),
+        'sentiment_score': scored_df['sentiment_score'].to_numpy(dtype=np.float64),
+    })
+    for label in SENTIMENT_LABELS:
+        keys[f'{label}_count'] = (labels == label).astype(np.int64)
+
+    daily = keys.groupby(['ticker', 'date'], sort=True).agg(
+        total_posts=('sentiment_score', 'size'),
+        positive_count=('positive_count', 'sum'),
+        neutral_count=('neutral_count', 'sum'),
+        negative_count=('negative_count', 'sum'),
+        avg_sentiment_score=('sentiment_score', 'mean'),
+    )
+    return daily.reset_index()
+
+def combine_daily_sentiment(daily_frames):
+    """
+    Merges partial daily aggregates (e.g. one per streamed batch) into one row per (ticker, date).
+
+    Args:
+        daily_frames (iterable): Frames returned by daily_sentiment.
+
+    Returns:
+        pd.DataFrame: Combined aggregates; averages are weighted by post counts.
+    """
+    daily = pd.concat(daily_frames, ignore_index=True)
+    daily['score_sum'] = daily['avg_sentiment_score'] * daily['total_posts']
+    combined = daily.groupby(['ticker', 'date'], sort=True)[
+        ['total_posts', 'positive_count', 'neutral_count', 'negative_count', 'score_sum']].sum()
+    combined['avg_sentiment_score'] = combined.pop('score_sum') / combined['total_posts']
+    return combined.reset_index()
+
+def update_daily_sentiment(tickers, start_date, end_date, batch_size=2000, workers=None):
+    """
+    Scores the stored posts and comments mentioning some tickers and stores their daily aggregates.
+
+    Rows come from reddit_posts through the ticker_mentions index (see
+    ticker_mentions.index_ticker_mentions). Each text is scored once, even when it
+    mentions several of the tickers, and counts towards every ticker it mentions.
+
+    Args:
+        tickers (list): Ticker symbols.
+        start_date (str): First date (inclusive, UTC).
+        end_date (str): Last date (inclusive, UTC).
+        batch_size (int): Rows per scoring task (see stream_sentiment).
+        workers (int): Worker processes (default: CPU count; 0 scores in-process).
+
+    Returns:
+        pd.DataFrame: The daily aggregates written (see daily_sentiment).
+    """
+    mentions = get_ticker_posts(tickers, start_date, end_date)
+    if mentions.empty:
+        return pd.DataFrame(columns=['ticker', 'date', 'total_posts', *(f'{label}_count' for label in SENTIMENT_LABELS),
+                                     'avg_sentiment_score'])
+
+    posts = mentions.drop_duplicates('id')
+    texts = pd.DataFrame({'id': posts['id'].to_numpy(),
+                          'text': (posts['title'].fillna('') + '\n' + posts['body'].fillna('')).to_numpy()})
+    scored = pd.concat(stream_sentiment([texts], batch_size=batch_size, workers=workers), ignore_index=True)
+    scored = mentions[['ticker', 'id', 'created_utc']].merge(
+        scored[['id', 'sentiment_score', 'sentiment_label']], on='id')
+
+    daily = daily_sentiment(scored)
+    bulk_insert_daily_sentiment(daily)
+    return daily
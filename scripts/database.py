@@ -1,47 +1,484 @@
 import sqlite3
+import threading
+import time
+from itertools import repeat
 import pandas as pd
+import numpy as np
 import os
+from option_chain import OptionChain
+
+# Default database file; override with the TREND_DB_PATH environment variable
+# or configure_database(path).
+DB_PATH = os.environ.get('TREND_DB_PATH', 'stock_data.db')
+
+# Connection pragmas applied to every connection. WAL lets readers run while a
+# bulk load is writing, NORMAL sync is safe under WAL, and a negative
+# cache_size is expressed in KiB (~64 MB here).
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,
+    'temp_store': 'MEMORY',
+}
+
+def configure_connection(conn, pragmas=None):
+    """Apply the connection pragmas (journal mode, sync level, cache size)."""
+    for name, value in (pragmas or PRAGMAS).items():
+        conn.execute(f'PRAGMA {name} = {value}')
+    return conn
+
+class ConnectionManager:
+    """
+    Hands out one long-lived connection per thread for a database file.
+
+    Connections are opened lazily, configured once with the pragmas and keep
+    sqlite's prepared-statement cache warm between calls. Used as a context
+    manager it yields the calling thread's connection and commits on success
+    or rolls back on error, without closing it.
+
+    Note that every thread gets its own connection, so a ':memory:' path gives
+    each thread a separate database.
+    """
+
+    def __init__(self, path=DB_PATH, pragmas=None, cached_statements=512):
+        self.path = path
+        self.pragmas = pragmas or PRAGMAS
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+
+    def connection(self):
+        """Return the calling thread's connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, cached_statements=self.cached_statements,
+                                   check_same_thread=False)
+            configure_connection(conn, self.pragmas)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def __enter__(self):
+        return self.connection()
+
+    def __exit__(self, exc_type, exc, tb):
+        conn = self.connection()
+        if exc_type is None:
+            conn.commit()
+        else:
+            conn.rollback()
+        return False
+
+    def close(self):
+        """Close every connection opened by this manager."""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+_manager = ConnectionManager(DB_PATH)
+
+def configure_database(path=None, pragmas=None, cached_statements=512):
+    """
+    Point the module at a database file, closing connections to the old one.
+
+    Args:
+    path (str): Database file path (default: DB_PATH).
+    pragmas (dict): Connection pragmas (default: PRAGMAS).
+    cached_statements (int): Size of sqlite's per-connection statement cache.
+
+    Returns:
+    ConnectionManager: The manager now used by every function in this module.
+    """
+    global _manager
+    _manager.close()
+    _manager = ConnectionManager(path or DB_PATH, pragmas, cached_statements)
+    return _manager
 
 def connect_db():
-    """Utility to connect to the database."""
-    return sqlite3.connect('stock_data.db')
+    """
+    Utility to get the shared connection manager.
+
+    Use it as `with connect_db() as conn:`; the connection stays open for reuse.
+    """
+    return _manager
 
 def create_database():
-    # check if database file already exists
-    if os.path.exists('stock_data.db'):
-        print("Database already exists")
-        return
+    # Safe to run on an existing database: tables are only created if missing and migrations resume
+    if os.path.exists(_manager.path):
+        print("Database found, applying migrations")
+
+    with connect_db() as conn:
+        # Create stock data table
+        conn.execute('''CREATE TABLE IF NOT EXISTS stock_data (
+                            ticker TEXT,
+                            date TEXT,
+                            open REAL,
+                            high REAL,
+                            low REAL,
+                            close REAL,
+                            volume INTEGER,
+                            PRIMARY KEY (ticker, date)
+                        )''')
+
+        # Create options data table
+        conn.execute('''CREATE TABLE IF NOT EXISTS options_data (
+                            ticker TEXT,
+                            expiration_date TEXT,
+                            strike_price REAL,
+                            option_type TEXT,
+                            last_price REAL,
+                            bid REAL,
+                            ask REAL,
+                            volume INTEGER,
+                            PRIMARY KEY (ticker, expiration_date, strike_price, option_type)
+                        )''')
+
+        migrate_database(conn)
+
+'''
+
+Schema migrations
+
+'''
+
+# Layout shared by the intraday bar tables (1m bars and their rollups)
+BAR_TABLE = '''CREATE TABLE IF NOT EXISTS {table} (
+                   ticker TEXT,
+                   ts INTEGER,
+                   open REAL,
+                   high REAL,
+                   low REAL,
+                   close REAL,
+                   volume INTEGER,
+                   PRIMARY KEY (ticker, ts)
+               ) WITHOUT ROWID'''
+
+# Bars of one ticker in a time range, from one of the bar tables (read by bar_store)
+BARS_QUERY = '''
+    SELECT ts, open, high, low, close, volume
+    FROM {table}
+    WHERE ticker = ? AND ts >= ? AND ts < ?
+    ORDER BY ts
+'''
+
+# Each entry upgrades the schema by one version (tracked in PRAGMA user_version).
+# Dates are kept as TEXT for readability, but queries filter on the integer
+# epoch-day columns so range scans compare integers through the indexes.
+MIGRATIONS = [
+    [
+        'ALTER TABLE stock_data ADD COLUMN day INTEGER',
+        "UPDATE stock_data SET day = CAST(julianday(date) - 2440587.5 AS INTEGER)",
+        'ALTER TABLE options_data ADD COLUMN expiration_day INTEGER',
+        "UPDATE options_data SET expiration_day = CAST(julianday(expiration_date) - 2440587.5 AS INTEGER)",
+        # Covering index for single/multi-ticker date ranges
+        '''CREATE INDEX IF NOT EXISTS idx_stock_ticker_day
+           ON stock_data (ticker, day, date, open, high, low, close, volume)''',
+        # Cross-ticker scans of one date range
+        'CREATE INDEX IF NOT EXISTS idx_stock_day ON stock_data (day, ticker)',
+        # Chain lookups by expiration
+        '''CREATE INDEX IF NOT EXISTS idx_options_ticker_exp
+           ON options_data (ticker, expiration_day, option_type, strike_price)''',
+        # Strike windows across every expiration
+        '''CREATE INDEX IF NOT EXISTS idx_options_ticker_type_strike
+           ON options_data (ticker, option_type, strike_price, expiration_day)''',
+    ],
+    [
+        # Per-ticker record of the last incremental sync
+        '''CREATE TABLE IF NOT EXISTS sync_watermarks (
+               ticker TEXT PRIMARY KEY,
+               last_date TEXT,
+               last_day INTEGER,
+               rows_changed INTEGER,
+               synced_at TEXT
+           )''',
+    ],
+    [
+        # Scored Reddit posts aggregated per ticker and day
+        '''CREATE TABLE IF NOT EXISTS daily_sentiment (
+               ticker TEXT,
+               date TEXT,
+               day INTEGER,
+               total_posts INTEGER,
+               positive_count INTEGER,
+               neutral_count INTEGER,
+               negative_count INTEGER,
+               avg_sentiment_score REAL,
+               PRIMARY KEY (ticker, day)
+           )''',
+        'CREATE INDEX IF NOT EXISTS idx_sentiment_day ON daily_sentiment (day, ticker)',
+    ],
+    [
+        # Collected Reddit submissions and comments (comments point at their submission)
+        '''CREATE TABLE IF NOT EXISTS reddit_posts (
+               id TEXT PRIMARY KEY,
+               kind TEXT,
+               submission_id TEXT,
+               subreddit TEXT,
+               created_utc INTEGER,
+               day INTEGER,
+               author TEXT,
+               score INTEGER,
+               title TEXT,
+               body TEXT,
+               url TEXT
+           )''',
+        'CREATE INDEX IF NOT EXISTS idx_reddit_day ON reddit_posts (day)',
+        'CREATE INDEX IF NOT EXISTS idx_reddit_submission ON reddit_posts (submission_id)',
+        # Resume point of the collector per subreddit
+        '''CREATE TABLE IF NOT EXISTS reddit_checkpoints (
+               subreddit TEXT PRIMARY KEY,
+               newest_created INTEGER,
+               cursor_id TEXT,
+               pass_newest_created INTEGER,
+               updated_at TEXT
+           )''',
+    ],
+    [
+        # Inverted index of ticker mentions in reddit_posts, clustered by ticker
+        '''CREATE TABLE IF NOT EXISTS ticker_mentions (
+               ticker TEXT,
+               post_id TEXT,
+               count INTEGER,
+               PRIMARY KEY (ticker, post_id)
+           ) WITHOUT ROWID''',
+        'CREATE INDEX IF NOT EXISTS idx_mentions_post ON ticker_mentions (post_id)',
+    ],
+    # Intraday bars keyed on integer epoch seconds (bucket start, UTC): 1-minute
+    # bars plus rollups maintained by bar_store.insert_minute_bars
+    [BAR_TABLE.format(table=f'bars_{interval}') for interval in ('1m', '5m', '15m', '1h', '1d')],
+    # Options chain history: one row per contract, a quote row only when the
+    # contract's quote changed since its previous snapshot (listed = 0 marks a
+    # contract that dropped out of the chain), and a log of every pull
+    [
+        '''CREATE TABLE IF NOT EXISTS option_contracts (
+               id INTEGER PRIMARY KEY,
+               ticker TEXT NOT NULL,
+               expiration_day INTEGER NOT NULL,
+               option_type TEXT NOT NULL,
+               strike_price REAL NOT NULL,
+               UNIQUE (ticker, expiration_day, option_type, strike_price)
+           )''',
+        '''CREATE TABLE IF NOT EXISTS option_quotes (
+               contract_id INTEGER,
+               captured_at INTEGER,
+               last_price REAL,
+               bid REAL,
+               ask REAL,
+               volume INTEGER,
+               listed INTEGER NOT NULL DEFAULT 1,
+               PRIMARY KEY (contract_id, captured_at)
+           ) WITHOUT ROWID''',
+        '''CREATE TABLE IF NOT EXISTS option_snapshots (
+               ticker TEXT,
+               expiration_day INTEGER,
+               captured_at INTEGER,
+               contracts INTEGER,
+               quotes_written INTEGER,
+               PRIMARY KEY (ticker, expiration_day, captured_at)
+           ) WITHOUT ROWID''',
+    ],
+]
+
+def migrate_database(conn):
+    """Apply any pending schema migrations on the given connection."""
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    for target, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+        for statement in statements:
+            conn.execute(statement)
+        conn.execute(f'PRAGMA user_version = {target}')
+        print(f"Migrated database schema to version {target}")
+    conn.execute('PRAGMA optimize')
+
+def to_epoch_day(date):
+    """Convert a date (string, datetime or Timestamp) to days since 1970-01-01."""
+    return int(np.datetime64(pd.Timestamp(date).date(), 'D').astype(np.int64))
+
+def _epoch_days(index):
+    """Vectorized epoch-day conversion for a DatetimeIndex."""
+    return pd.to_datetime(index).values.astype('datetime64[D]').astype(np.int64)
+
+# Rows whose values did not change are left untouched, so re-syncing an
+# overlapping range only writes new or revised bars.
+STOCK_UPSERT = '''INSERT INTO stock_data (ticker, date, day, open, high, low, close, volume)
+                  VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                  ON CONFLICT (ticker, date) DO UPDATE SET
+                      day = excluded.day, open = excluded.open, high = excluded.high,
+                      low = excluded.low, close = excluded.close, volume = excluded.volume
+                  WHERE stock_data.open IS NOT excluded.open OR stock_data.high IS NOT excluded.high
+                     OR stock_data.low IS NOT excluded.low OR stock_data.close IS NOT excluded.close
+                     OR stock_data.volume IS NOT excluded.volume OR stock_data.day IS NOT excluded.day'''
+
+OPTIONS_UPSERT = '''INSERT OR REPLACE INTO options_data (ticker, expiration_date, expiration_day, strike_price, option_type, last_price, bid, ask, volume)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)'''
+
+def _flatten_columns(df):
+    """Drop the ticker level yfinance adds to single-ticker downloads."""
+    if isinstance(df.columns, pd.MultiIndex):
+        df = df.set_axis(df.columns.get_level_values(0), axis=1)
+    return df
+
+def _stock_rows(ticker, stock_data):
+    """Turn a stock frame into parameter tuples, converting each column once."""
+    stock_data = _flatten_columns(stock_data)
+    dates = pd.to_datetime(stock_data.index).strftime('%Y-%m-%d').tolist()
+    days = _epoch_days(stock_data.index).tolist()
+    columns = [stock_data[col].tolist() for col in ('Open', 'High', 'Low', 'Close', 'Volume')]
+    return list(zip(repeat(ticker), dates, days, *columns))
 
-    conn = connect_db()
-    cursor = conn.cursor()
-
-    # Create stock data table
-    cursor.execute('''CREATE TABLE IF NOT EXISTS stock_data (
-                        ticker TEXT,
-                        date TEXT,
-                        open REAL,
-                        high REAL,
-                        low REAL,
-                        close REAL,
-                        volume INTEGER,
-                        PRIMARY KEY (ticker, date)
-                    )''')
-
-    # Create options data table
-    cursor.execute('''CREATE TABLE IF NOT EXISTS options_data (
-                        ticker TEXT,
-                        expiration_date TEXT,
-                        strike_price REAL,
-                        option_type TEXT,
-                        last_price REAL,
-                        bid REAL,
-                        ask REAL,
-                        volume INTEGER,
-                        PRIMARY KEY (ticker, expiration_date, strike_price, option_type)
-                    )''')
-
-    conn.commit()
-    conn.close()
+def _options_frame(options_data):
+    """Return an OptionChain or a combined calls/puts frame with an option_type column."""
+    if isinstance(options_data, (OptionChain, pd.DataFrame)):
+        return options_data
+    calls = options_data.calls.assign(option_type='call')
+    puts = options_data.puts.assign(option_type='put')
+    return pd.concat([calls, puts], ignore_index=True)
+
+def _options_rows(ticker, expiration_date, options_data):
+    """Turn an options chain into parameter tuples, converting each column once."""
+    chain = _options_frame(options_data)
+    # Same column names on an OptionChain (decoded arrays) and on a frame (Series)
+    columns = [chain[col].tolist() for col in ('strike', 'option_type', 'lastPrice', 'bid', 'ask', 'volume')]
+    return list(zip(repeat(ticker), repeat(expiration_date), repeat(to_epoch_day(expiration_date)), *columns))
+
+def _bulk_write(statement, rows, label):
+    """
+    Write all rows with a single executemany inside one transaction.
+
+    Returns:
+    tuple: (rows processed, rows per second, rows actually inserted or changed).
+    """
+    start = time.perf_counter()
+    try:
+        with connect_db() as conn:
+            before = conn.total_changes
+            conn.executemany(statement, rows)
+            changed = conn.total_changes - before
+    except sqlite3.Error as e:
+        print(f"Error inserting {label}: {e}")
+        return 0, 0.0, 0
+
+    elapsed = time.perf_counter() - start
+    rate = len(rows) / elapsed if elapsed > 0 else float('inf')
+    print(f"Inserted {len(rows)} rows of {label} ({changed} changed) in {elapsed:.3f}s ({rate:,.0f} rows/s)")
+    return len(rows), rate, changed
+
+def bulk_insert_stock_data(ticker, stock_data):
+    """
+    Insert or update a whole stock frame in one batched transaction.
+
+    Args:
+    ticker (str): Ticker symbol the rows belong to.
+    stock_data (pd.DataFrame): Date-indexed frame with Open, High, Low, Close and Volume columns.
+
+    Returns:
+    tuple: (rows processed, rows per second, rows inserted or changed).
+    """
+    return _bulk_write(STOCK_UPSERT, _stock_rows(ticker, stock_data), f"stock data for {ticker}")
+
+def bulk_insert_options_data(ticker, expiration_date, options_data):
+    """
+    Insert or update a whole options chain in one batched transaction.
+
+    Args:
+    ticker (str): Underlying ticker symbol.
+    expiration_date (str): Expiration date of the chain ('%Y-%m-%d').
+    options_data: An OptionChain (from preprocess_options_data), a yfinance
+        option chain (with .calls/.puts) or a combined frame.
+
+    Returns:
+    tuple: (rows processed, rows per second, rows inserted or changed).
+    """
+    rows = _options_rows(ticker, expiration_date, options_data)
+    return _bulk_write(OPTIONS_UPSERT, rows, f"options data for {ticker} {expiration_date}")
+
+SENTIMENT_UPSERT = '''INSERT OR REPLACE INTO daily_sentiment (ticker, date, day, total_posts, positive_count,
+                                                         neutral_count, negative_count, avg_sentiment_score)
+                      VALUES (?, ?, ?, ?, ?, ?, ?, ?)'''
+
+def bulk_insert_daily_sentiment(daily):
+    """
+    Insert or replace daily sentiment aggregates in one batched transaction.
+
+    Args:
+    daily (pd.DataFrame): Rows from data_preprocessing.daily_sentiment (ticker, date, counts, average).
+        Each row must cover the whole day, since it replaces what is stored.
+
+    Returns:
+    tuple: (rows processed, rows per second, rows inserted or changed).
+    """
+    dates = pd.to_datetime(daily['date'])
+    columns = [daily[col].tolist() for col in ('total_posts', 'positive_count', 'neutral_count',
+                                               'negative_count', 'avg_sentiment_score')]
+    rows = list(zip(daily['ticker'].tolist(), dates.dt.strftime('%Y-%m-%d').tolist(),
+                    _epoch_days(dates).tolist(), *columns))
+    return _bulk_write(SENTIMENT_UPSERT, rows, "daily sentiment")
+
+REDDIT_UPSERT = '''INSERT OR REPLACE INTO reddit_posts (id, kind, submission_id, subreddit, created_utc, day,
+                                                     author, score, title, body, url)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'''
+
+def bulk_insert_reddit_posts(posts):
+    """
+    Insert or update collected submissions and comments in one batched transaction.
+
+    Args:
+    posts (list): Row dicts from data_collection.stream_reddit (kind 'post' or 'comment').
+
+    Returns:
+    tuple: (rows processed, rows per second, rows inserted or changed).
+    """
+    rows = [(p['id'], p['kind'], p['submission_id'], p.get('subreddit'), p['created_utc'],
+             p['created_utc'] // 86400, p.get('author'), p.get('score'), p.get('title'), p.get('body'), p.get('url'))
+            for p in posts]
+    return _bulk_write(REDDIT_UPSERT, rows, "reddit posts")
+
+MENTIONS_UPSERT = '''INSERT OR REPLACE INTO ticker_mentions (ticker, post_id, count) VALUES (?, ?, ?)'''
+
+def bulk_insert_ticker_mentions(mentions):
+    """
+    Insert or update (post_id, ticker, count) mention rows in one batched transaction.
+
+    Returns:
+    tuple: (rows processed, rows per second, rows inserted or changed).
+    """
+    rows = list(zip(mentions['ticker'].tolist(), mentions['post_id'].tolist(), mentions['count'].tolist()))
+    return _bulk_write(MENTIONS_UPSERT, rows, "ticker mentions")
+
+def replace_ticker_mentions(post_ids, mentions):
+    """
+    Replace the stored mentions of some posts in one transaction.
+
+    Every existing row of the given posts is deleted before the new rows are
+    inserted, so a ticker no longer matched in a re-indexed post does not keep
+    its old row.
+
+    Args:
+    post_ids (list): Posts being re-indexed (including those with no mentions now).
+    mentions (pd.DataFrame): Their (post_id, ticker, count) rows.
+
+    Returns:
+    tuple: (rows deleted, rows inserted).
+    """
+    post_ids = [(post_id,) for post_id in post_ids]
+    rows = list(zip(mentions['ticker'].tolist(), mentions['post_id'].tolist(), mentions['count'].tolist()))
+    start = time.perf_counter()
+    try:
+        with connect_db() as conn:
+            before = conn.total_changes
+            conn.executemany('DELETE FROM ticker_mentions WHERE post_id = ?', post_ids)
+            deleted = conn.total_changes - before
+            conn.executemany(MENTIONS_UPSERT, rows)
+    except sqlite3.Error as e:
+        print(f"Error replacing ticker mentions: {e}")
+        return 0, 0
+
+    print(f"Replaced ticker mentions of {len(post_ids)} posts ({deleted} removed, {len(rows)} inserted) "
+          f"in {time.perf_counter() - start:.3f}s")
+    return deleted, len(rows)
 
 def insert_stock_data(ticker, stock_data):
     """Insert or update stock data in the database."""
@@ -49,77 +486,455 @@ def insert_stock_data(ticker, stock_data):
         print(f"No stock data to insert for {ticker}.")
         return
 
-    conn = connect_db()
-    cursor = conn.cursor()
-
-    try:
-        for index, row in stock_data.iterrows():
-            cursor.execute('''INSERT OR REPLACE INTO stock_data (ticker, date, open, high, low, close, volume) 
-                              VALUES (?, ?, ?, ?, ?, ?, ?)''',
-                           (ticker, index.strftime('%Y-%m-%d'), row['Open'], row['High'], row['Low'], row['Close'], row['Volume']))
-        conn.commit()
-    except sqlite3.Error as e:
-        print(f"Error inserting stock data: {e}")
-    finally:
-        conn.close()
+    bulk_insert_stock_data(ticker, stock_data)
 
 def insert_options_data(ticker, expiration_date, options_data):
     """Insert or update options data in the database."""
-    if options_data.calls.empty and options_data.puts.empty:
+    if len(_options_frame(options_data)) == 0:
         print(f"No options data to insert for {ticker} on {expiration_date}.")
         return
 
-    conn = connect_db()
-    cursor = conn.cursor()
+    bulk_insert_options_data(ticker, expiration_date, options_data)
 
+STOCK_COLUMNS = 'ticker, date, open, high, low, close, volume'
+OPTIONS_COLUMNS = 'ticker, expiration_date, strike_price, option_type, last_price, bid, ask, volume'
+
+# Read statements shared with HOT_QUERIES; {tickers} takes the IN-list placeholders
+STOCK_QUERY = f'''
+    SELECT {STOCK_COLUMNS}
+    FROM stock_data
+    WHERE ticker = ? AND day BETWEEN ? AND ?
+    ORDER BY day
+'''
+
+STOCK_RANGE_QUERY = f'''
+    SELECT {STOCK_COLUMNS}
+    FROM stock_data
+    WHERE ticker IN ({{tickers}}) AND day BETWEEN ? AND ?
+    ORDER BY ticker, day
+'''
+
+STOCK_ALL_TICKERS_QUERY = f'''
+    SELECT {STOCK_COLUMNS}
+    FROM stock_data
+    WHERE day BETWEEN ? AND ?
+    ORDER BY ticker, day
+'''
+
+OPTIONS_QUERY = f'''
+    SELECT {OPTIONS_COLUMNS}
+    FROM options_data
+    WHERE ticker = ? AND expiration_day = ?
+'''
+
+# {expirations} takes the optional expiration bounds (' AND expiration_day >= ?', ...)
+OPTIONS_STRIKE_WINDOW_QUERY = f'''
+    SELECT {OPTIONS_COLUMNS}
+    FROM options_data
+    WHERE ticker IN ({{tickers}}) AND option_type = ? AND strike_price BETWEEN ? AND ?{{expirations}}
+    ORDER BY ticker, expiration_day, strike_price
+'''
+
+def _placeholders(values):
+    return ', '.join('?' * len(values))
+
+def _as_list(tickers):
+    return [tickers] if isinstance(tickers, str) else list(tickers)
+
+def _read_query(query, params, label):
+    """Run a query through the shared connection, returning an empty frame on error."""
     try:
-        for _, row in options_data.calls.iterrows():
-            cursor.execute('''INSERT OR REPLACE INTO options_data (ticker, expiration_date, strike_price, option_type, last_price, bid, ask, volume) 
-                              VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
-                           (ticker, expiration_date, row['strike'], 'call', row['lastPrice'], row['bid'], row['ask'], row['volume']))
-
-        for _, row in options_data.puts.iterrows():
-            cursor.execute('''INSERT OR REPLACE INTO options_data (ticker, expiration_date, strike_price, option_type, last_price, bid, ask, volume) 
-                              VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
-                           (ticker, expiration_date, row['strike'], 'put', row['lastPrice'], row['bid'], row['ask'], row['volume']))
-        conn.commit()
+        with connect_db() as conn:
+            return pd.read_sql_query(query, conn, params=params)
     except sqlite3.Error as e:
-        print(f"Error inserting options data: {e}")
-    finally:
-        conn.close()
+        print(f"Error fetching {label}: {e}")
+        return pd.DataFrame()  # Return empty DataFrame on error
 
 def get_stock_data(ticker, start_date, end_date):
     """Fetch stock data from the database as a Pandas DataFrame."""
-    conn = connect_db()
-
-    query = '''
-        SELECT * 
-        FROM stock_data 
-        WHERE ticker = ? AND date BETWEEN ? AND ?
-    '''
-    try:
-        df = pd.read_sql_query(query, conn, params=(ticker, start_date, end_date))
-    except sqlite3.Error as e:
-        print(f"Error fetching stock data: {e}")
-        df = pd.DataFrame()  # Return empty DataFrame on error
-    finally:
-        conn.close()
-    return df
+    return _read_query(STOCK_QUERY, (ticker, to_epoch_day(start_date), to_epoch_day(end_date)), "stock data")
 
 def get_options_data(ticker, expiration_date):
     """Fetch options data from the database as a Pandas DataFrame."""
-    conn = connect_db()
+    return _read_query(OPTIONS_QUERY, (ticker, to_epoch_day(expiration_date)), "options data")
 
-    query = '''
-        SELECT * 
-        FROM options_data 
-        WHERE ticker = ? AND expiration_date = ?
-    '''
+QUOTE_FIELDS = ['last_price', 'bid', 'ask', 'volume']
+
+def _capture_time(captured_at):
+    """Epoch seconds for a capture time (None: now; naive times are UTC)."""
+    if captured_at is None:
+        return int(time.time())
+    if isinstance(captured_at, (int, np.integer)):
+        return int(captured_at)
+    return int(pd.Timestamp(captured_at).timestamp())
+
+# Quote of every contract of one expiration as of a time; contracts without a quote yet have NULLs
+LATEST_OPTION_QUOTES = '''
+    SELECT c.id AS contract_id, c.option_type, c.strike_price, q.last_price, q.bid, q.ask, q.volume, q.listed
+    FROM option_contracts c
+    LEFT JOIN option_quotes q ON q.contract_id = c.id AND q.captured_at = (
+        SELECT MAX(captured_at) FROM option_quotes WHERE contract_id = c.id AND captured_at <= ?)
+    WHERE c.ticker = ? AND c.expiration_day = ?
+'''
+
+def record_options_snapshot(ticker, expiration_date, options_data, captured_at=None):
+    """
+    Append one pull of an options chain to the snapshot history.
+
+    Quotes are compared with each contract's latest stored quote and only the
+    changed ones are written, so polling a quiet chain costs a snapshot log row
+    rather than a copy of the chain. Contracts that were listed before but are
+    missing from this pull get a tombstone (listed = 0).
+
+    Args:
+    ticker (str): Underlying ticker symbol.
+    expiration_date (str): Expiration date of the chain ('%Y-%m-%d').
+    options_data: An OptionChain (from preprocess_options_data), a yfinance
+        option chain (with .calls/.puts) or a combined frame.
+    captured_at: Time of the pull (epoch seconds or timestamp; default: now).
+
+    Returns:
+    tuple: (contracts in the pull, quotes written, contracts delisted).
+    """
+    chain = _options_frame(options_data)
+    captured_at = _capture_time(captured_at)
+    expiration_day = to_epoch_day(expiration_date)
+    current = pd.DataFrame({
+        'option_type': np.asarray(chain['option_type']),
+        'strike_price': np.asarray(chain['strike'], dtype=np.float64),
+        'last_price': np.asarray(chain['lastPrice'], dtype=np.float64),
+        'bid': np.asarray(chain['bid'], dtype=np.float64),
+        'ask': np.asarray(chain['ask'], dtype=np.float64),
+        'volume': np.asarray(chain['volume'], dtype=np.float64),
+    }).drop_duplicates(['option_type', 'strike_price'], keep='last')
+
+    start = time.perf_counter()
     try:
-        df = pd.read_sql_query(query, conn, params=(ticker, expiration_date))
+        with connect_db() as conn:
+            conn.executemany('''INSERT OR IGNORE INTO option_contracts (ticker, expiration_day, option_type, strike_price)
+                                VALUES (?, ?, ?, ?)''',
+                             zip(repeat(ticker), repeat(expiration_day), current['option_type'].tolist(),
+                                 current['strike_price'].tolist()))
+            previous = pd.read_sql_query(LATEST_OPTION_QUOTES, conn, params=(captured_at, ticker, expiration_day))
+            merged = previous.merge(current, on=['option_type', 'strike_price'], how='left',
+                                    suffixes=('_prev', ''), indicator=True)
+            pulled = (merged['_merge'] == 'both').to_numpy()
+            was_listed = (merged['listed'] == 1).to_numpy()
+
+            # NaN-aware comparison of every quote field with the previous quote
+            changed = ~was_listed
+            for field in QUOTE_FIELDS:
+                new, old = merged[field].to_numpy(dtype=np.float64), merged[f'{field}_prev'].to_numpy(dtype=np.float64)
+                changed |= ~((new == old) | (np.isnan(new) & np.isnan(old)))
+            quotes = merged[pulled & changed]
+            delisted = merged[~pulled & was_listed]
+
+            prices = [quotes[f].astype(object).where(quotes[f].notna(), None).tolist() for f in QUOTE_FIELDS[:3]]
+            volume = [None if np.isnan(v) else int(v) for v in quotes['volume'].tolist()]
+            rows = list(zip(quotes['contract_id'].tolist(), repeat(captured_at), *prices, volume, repeat(1)))
+            rows += [(contract_id, captured_at, None, None, None, None, 0) for contract_id in delisted['contract_id'].tolist()]
+            conn.executemany('''INSERT OR REPLACE INTO option_quotes
+                                (contract_id, captured_at, last_price, bid, ask, volume, listed)
+                                VALUES (?, ?, ?, ?, ?, ?, ?)''', rows)
+            conn.execute('''INSERT OR REPLACE INTO option_snapshots
+                            (ticker, expiration_day, captured_at, contracts, quotes_written) VALUES (?, ?, ?, ?, ?)''',
+                         (ticker, expiration_day, captured_at, len(current), len(rows)))
     except sqlite3.Error as e:
-        print(f"Error fetching options data: {e}")
-        df = pd.DataFrame()  # Return empty DataFrame on error
-    finally:
-        conn.close()
-    return df
\ No newline at end of file
+        print(f"Error recording options snapshot for {ticker} {expiration_date}: {e}")
+        return 0, 0, 0
+
+    print(f"Recorded options snapshot for {ticker} {expiration_date}: {len(current)} contracts, "
+          f"{len(quotes)} changed, {len(delisted)} delisted in {time.perf_counter() - start:.3f}s")
+    return len(current), len(quotes), len(delisted)
+
+# Chain columns named as in OptionChain.to_frame(), so the frame feeds analysis directly
+# (or OptionChain.from_frame)
+OPTIONS_AS_OF_COLUMNS = '''c.ticker, date(c.expiration_day * 86400, 'unixepoch') AS expiration, c.strike_price AS strike,
+                           c.option_type, q.last_price AS lastPrice, q.bid, q.ask, q.volume, q.captured_at'''
+
+# {expiration} is the expiration condition: one expiration, or every one not yet expired
+OPTIONS_AS_OF_QUERY = f'''
+    SELECT {OPTIONS_AS_OF_COLUMNS}
+    FROM option_contracts c
+    JOIN option_quotes q ON q.contract_id = c.id AND q.captured_at = (
+        SELECT MAX(captured_at) FROM option_quotes WHERE contract_id = c.id AND captured_at <= ?)
+    WHERE c.ticker = ? AND {{expiration}} AND q.listed = 1
+    ORDER BY c.expiration_day, c.option_type, c.strike_price
+'''
+OPTIONS_AS_OF_UNEXPIRED = 'c.expiration_day >= ?'
+OPTIONS_AS_OF_EXPIRATION = 'c.expiration_day = ?'
+
+def get_options_chain_as_of(ticker, as_of, expiration_date=None):
+    """
+    Reconstruct an options chain as it was at a point in time.
+
+    Each contract takes its latest quote captured at or before as_of; contracts
+    delisted by then are left out.
+
+    Args:
+    ticker (str): Underlying ticker symbol.
+    as_of: Time (epoch seconds or timestamp; naive times are UTC).
+    expiration_date (str): Only this expiration (default: every expiration not yet expired at as_of).
+
+    Returns:
+    pd.DataFrame: expiration, strike, option_type, lastPrice, bid, ask, volume and the
+        captured_at (epoch seconds) of each quote, ordered by expiration, type and strike.
+    """
+    as_of = _capture_time(as_of)
+    if expiration_date is None:
+        condition, params = OPTIONS_AS_OF_UNEXPIRED, (as_of // 86400,)
+    else:
+        condition, params = OPTIONS_AS_OF_EXPIRATION, (to_epoch_day(expiration_date),)
+    query = OPTIONS_AS_OF_QUERY.format(expiration=condition)
+    return _read_query(query, (as_of, ticker, *params), "options chain history")
+
+OPTION_CONTRACT_HISTORY_QUERY = '''
+    SELECT q.captured_at, q.last_price, q.bid, q.ask, q.volume, q.listed
+    FROM option_contracts c
+    JOIN option_quotes q ON q.contract_id = c.id
+    WHERE c.ticker = ? AND c.expiration_day = ? AND c.option_type = ? AND c.strike_price = ?
+      AND q.captured_at BETWEEN ? AND ?
+    ORDER BY q.captured_at
+'''
+
+def get_option_contract_history(ticker, expiration_date, option_type, strike, start=None, end=None,
+                                every_snapshot=False):
+    """
+    Quote history of one contract.
+
+    Args:
+    ticker (str): Underlying ticker symbol.
+    expiration_date (str): Expiration date ('%Y-%m-%d').
+    option_type (str): 'call' or 'put'.
+    strike (float): Strike price.
+    start, end: Optional capture time range (inclusive).
+    every_snapshot (bool): Repeat the quote at every pull of the chain instead of
+        returning only the pulls where it changed.
+
+    Returns:
+    pd.DataFrame: captured_at (UTC), last_price, bid, ask, volume, listed.
+    """
+    lo = 0 if start is None else _capture_time(start)
+    hi = 2 ** 62 if end is None else _capture_time(end)
+    expiration_day = to_epoch_day(expiration_date)
+    history = _read_query(OPTION_CONTRACT_HISTORY_QUERY, (ticker, expiration_day, option_type, strike, 0 if every_snapshot else lo, hi),
+                          "option contract history")
+    if every_snapshot and not history.empty:
+        pulls = _read_query('''SELECT captured_at FROM option_snapshots
+                               WHERE ticker = ? AND expiration_day = ? AND captured_at BETWEEN ? AND ?
+                               ORDER BY captured_at''', (ticker, expiration_day, lo, hi), "option snapshots")
+        history = pd.merge_asof(pulls, history, on='captured_at')
+        history = history[history['listed'].notna()]
+    history['captured_at'] = pd.to_datetime(history['captured_at'], unit='s', utc=True)
+    return history.reset_index(drop=True)
+
+def get_stock_data_range(tickers, start_date, end_date):
+    """
+    Fetch stock data for several tickers over one date range.
+
+    Args:
+    tickers (str or list): Ticker symbols, or None for every ticker in the table.
+    start_date (str): First date (inclusive).
+    end_date (str): Last date (inclusive).
+
+    Returns:
+    pd.DataFrame: Rows ordered by ticker and date.
+    """
+    days = (to_epoch_day(start_date), to_epoch_day(end_date))
+    if tickers is None:
+        return _read_query(STOCK_ALL_TICKERS_QUERY, days, "stock data")
+
+    tickers = _as_list(tickers)
+    query = STOCK_RANGE_QUERY.format(tickers=_placeholders(tickers))
+    return _read_query(query, (*tickers, *days), "stock data")
+
+def get_options_strike_window(tickers, option_type, min_strike, max_strike,
+                              start_expiration=None, end_expiration=None):
+    """
+    Fetch contracts of one type within a strike window across expirations.
+
+    For example all puts within $20 of spot:
+    get_options_strike_window('SPY', 'put', spot - 20, spot + 20)
+
+    Args:
+    tickers (str or list): Underlying ticker symbol(s).
+    option_type (str): 'call' or 'put'.
+    min_strike (float): Lowest strike (inclusive).
+    max_strike (float): Highest strike (inclusive).
+    start_expiration (str): Earliest expiration to include (default: all).
+    end_expiration (str): Latest expiration to include (default: all).
+
+    Returns:
+    pd.DataFrame: Matching contracts ordered by ticker, expiration and strike.
+    """
+    tickers = _as_list(tickers)
+    expirations = ''
+    params = [*tickers, option_type, min_strike, max_strike]
+    # Only constrain expirations when asked, so the planner can use the strike index
+    if start_expiration:
+        expirations += ' AND expiration_day >= ?'
+        params.append(to_epoch_day(start_expiration))
+    if end_expiration:
+        expirations += ' AND expiration_day <= ?'
+        params.append(to_epoch_day(end_expiration))
+
+    query = OPTIONS_STRIKE_WINDOW_QUERY.format(tickers=_placeholders(tickers), expirations=expirations)
+    return _read_query(query, params, "options data")
+
+SENTIMENT_COLUMNS = 'ticker, date, total_posts, positive_count, neutral_count, negative_count, avg_sentiment_score'
+
+DAILY_SENTIMENT_QUERY = f'''
+    SELECT {SENTIMENT_COLUMNS}
+    FROM daily_sentiment
+    WHERE ticker IN ({{tickers}}) AND day BETWEEN ? AND ?
+    ORDER BY ticker, day
+'''
+
+def get_daily_sentiment(tickers, start_date, end_date):
+    """
+    Fetch daily sentiment aggregates for several tickers over one date range.
+
+    Args:
+    tickers (str or list): Ticker symbols.
+    start_date (str): First date (inclusive).
+    end_date (str): Last date (inclusive).
+
+    Returns:
+    pd.DataFrame: Rows ordered by ticker and date.
+    """
+    tickers = _as_list(tickers)
+    query = DAILY_SENTIMENT_QUERY.format(tickers=_placeholders(tickers))
+    return _read_query(query, (*tickers, to_epoch_day(start_date), to_epoch_day(end_date)), "daily sentiment")
+
+def get_latest_dates(tickers):
+    """
+    Latest stored date per ticker, read from the stock_data index.
+
+    Returns:
+    dict: ticker -> pd.Timestamp for tickers that have any rows.
+    """
+    tickers = _as_list(tickers)
+    query = f'''
+        SELECT ticker, MAX(day)
+        FROM stock_data
+        WHERE ticker IN ({_placeholders(tickers)})
+        GROUP BY ticker
+    '''
+    with connect_db() as conn:
+        rows = conn.execute(query, tickers).fetchall()
+    return {ticker: pd.Timestamp(day, unit='D') for ticker, day in rows if day is not None}
+
+def update_watermark(ticker, last_date, rows_changed):
+    """Record the outcome of an incremental sync for a ticker."""
+    with connect_db() as conn:
+        conn.execute('''INSERT OR REPLACE INTO sync_watermarks (ticker, last_date, last_day, rows_changed, synced_at)
+                        VALUES (?, ?, ?, ?, datetime('now'))''',
+                     (ticker, pd.Timestamp(last_date).strftime('%Y-%m-%d'), to_epoch_day(last_date), rows_changed))
+
+def get_watermarks():
+    """Fetch the per-ticker sync watermarks as a Pandas DataFrame."""
+    return _read_query('SELECT * FROM sync_watermarks ORDER BY ticker', (), "sync watermarks")
+
+def get_reddit_checkpoint(subreddit):
+    """
+    Collector checkpoint for a subreddit.
+
+    Returns:
+    dict: newest_created (newest submission time of the last finished pass), cursor_id (oldest
+        submission written by an unfinished pass) and pass_newest_created; empty if never collected.
+    """
+    with connect_db() as conn:
+        row = conn.execute('''SELECT newest_created, cursor_id, pass_newest_created
+                              FROM reddit_checkpoints WHERE subreddit = ?''', (subreddit,)).fetchone()
+    if row is None:
+        return {}
+    return dict(zip(('newest_created', 'cursor_id', 'pass_newest_created'), row))
+
+def update_reddit_checkpoint(subreddit, newest_created, cursor_id, pass_newest_created):
+    """Record the collector's progress for a subreddit."""
+    with connect_db() as conn:
+        conn.execute('''INSERT OR REPLACE INTO reddit_checkpoints
+                        (subreddit, newest_created, cursor_id, pass_newest_created, updated_at)
+                        VALUES (?, ?, ?, ?, datetime('now'))''',
+                     (subreddit, newest_created, cursor_id, pass_newest_created))
+
+def get_reddit_posts(start_date, end_date, kind=None):
+    """
+    Fetch collected posts and comments created in a date range.
+
+    Args:
+    start_date (str): First date (inclusive, UTC).
+    end_date (str): Last date (inclusive, UTC).
+    kind (str): 'post' or 'comment' (default: both).
+
+    Returns:
+    pd.DataFrame: Rows ordered by creation time.
+    """
+    params = [to_epoch_day(start_date), to_epoch_day(end_date)]
+    condition = 'day BETWEEN ? AND ?'
+    if kind is not None:
+        condition += ' AND kind = ?'
+        params.append(kind)
+    query = f'''
+        SELECT *
+        FROM reddit_posts
+        WHERE {condition}
+        ORDER BY created_utc
+    '''
+    return _read_query(query, params, "reddit posts")
+
+TICKER_POSTS_QUERY = '''
+    SELECT m.ticker, m.count AS mentions, p.*
+    FROM ticker_mentions m
+    JOIN reddit_posts p ON p.id = m.post_id
+    WHERE m.ticker IN ({tickers}) AND p.day BETWEEN ? AND ?
+    ORDER BY m.ticker, p.created_utc
+'''
+
+def get_ticker_posts(tickers, start_date, end_date):
+    """
+    Fetch the posts and comments mentioning some tickers, through the mention index.
+
+    Args:
+    tickers (str or list): Ticker symbols.
+    start_date (str): First date (inclusive, UTC).
+    end_date (str): Last date (inclusive, UTC).
+
+    Returns:
+    pd.DataFrame: reddit_posts rows with ticker and mentions columns (a post mentioning
+        two of the tickers appears once per ticker), ordered by ticker and creation time.
+    """
+    tickers = _as_list(tickers)
+    query = TICKER_POSTS_QUERY.format(tickers=_placeholders(tickers))
+    return _read_query(query, (*tickers, to_epoch_day(start_date), to_epoch_day(end_date)), "ticker posts")
+
+# Representative statements for the hot read paths, checked by check_query_plans()
+HOT_QUERIES = {
+    'stock_by_ticker': (STOCK_QUERY, ('SPY', 0, 1)),
+    'stock_multi_ticker': (STOCK_RANGE_QUERY.format(tickers='?, ?'), ('SPY', 'QQQ', 0, 1)),
+    'stock_all_tickers': (STOCK_ALL_TICKERS_QUERY, (0, 1)),
+    'options_by_expiration': (OPTIONS_QUERY, ('SPY', 0)),
+    'options_strike_window': (OPTIONS_STRIKE_WINDOW_QUERY.format(tickers='?', expirations=''), ('SPY', 'put', 0, 1)),
+    'daily_sentiment': (DAILY_SENTIMENT_QUERY.format(tickers='?, ?'), ('SPY', 'QQQ', 0, 1)),
+    'ticker_posts': (TICKER_POSTS_QUERY.format(tickers='?, ?'), ('SPY', 'QQQ', 0, 1)),
+    'intraday_bars': (BARS_QUERY.format(table='bars_5m'), ('SPY', 0, 1)),
+    'options_as_of': (OPTIONS_AS_OF_QUERY.format(expiration=OPTIONS_AS_OF_UNEXPIRED), (0, 'SPY', 0)),
+    'option_contract_history': (OPTION_CONTRACT_HISTORY_QUERY, ('SPY', 0, 'put', 1.0, 0, 1)),
+}
+
+def check_query_plans():
+    """
+    Run EXPLAIN QUERY PLAN over HOT_QUERIES and report any full table scan.
+
+    Returns:
+    dict: Query name -> list of plan steps that scan a table instead of searching an index.
+    """
+    problems = {}
+    with connect_db() as conn:
+        for name, (query, params) in HOT_QUERIES.items():
+            plan = conn.execute(f'EXPLAIN QUERY PLAN {query}', params).fetchall()
+            scans = [row[-1] for row in plan if row[-1].startswith('SCAN ')]
+            if scans:
+                problems[name] = scans
+                print(f"Query plan check failed for {name}: {scans}")
+    return problems
@@ -0,0 +1,147 @@
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from pyarrow import fs
+
+'''
+
+Columnar dataset store for feature frames
+
+'''
+
+# Datasets live under data/datasets/<name>/ticker=<T>/year=<Y>/*.parquet
+DATASET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'datasets')
+
+def _dataset_path(name, root=None):
+    return os.path.join(root or DATASET_DIR, name)
+
+def dataset_exists(name, root=None):
+    """True when the named dataset has been written."""
+    return os.path.isdir(_dataset_path(name, root))
+
+def _to_table(df, ticker):
+    """
+    Turn a Date-indexed frame into an Arrow table with ticker/year partition columns.
+    Floats are stored as float32 and the date as a timestamp column.
+    """
+    table = df.reset_index()
+    table = table.rename(columns={table.columns[0]: 'Date'}) if 'Date' not in table else table
+    table['Date'] = pd.to_datetime(table['Date'])
+    if 'ticker' not in table:
+        if ticker is None:
+            raise ValueError("A ticker is required when the frame has no 'ticker' column.")
+        table['ticker'] = ticker
+    table['year'] = table['Date'].dt.year.astype(np.int32)
+
+    floats = table.select_dtypes(include='float').columns
+    table[floats] = table[floats].astype(np.float32)
+    return pa.Table.from_pandas(table, preserve_index=False)
+
+def write_dataset(df, name, ticker=None, root=None, mode='overwrite_partitions'):
+    """
+    Writes a feature frame as Parquet files partitioned by ticker and year.
+
+    Args:
+    df (pd.DataFrame): Date-indexed frame, optionally with a 'ticker' column (for panels).
+    name (str): Dataset name (a directory under the dataset root).
+    ticker (str): Ticker for single-ticker frames without a 'ticker' column.
+    root (str): Dataset root directory (default: data/datasets).
+    mode (str): 'overwrite_partitions' replaces only the ticker/year partitions being written,
+        'overwrite' replaces the whole dataset.
+
+    Returns:
+    str: Path of the dataset directory.
+    """
+    path = _dataset_path(name, root)
+    if mode == 'overwrite' and os.path.isdir(path):
+        shutil.rmtree(path)
+
+    ds.write_dataset(_to_table(df, ticker), path, format='parquet',
+                     partitioning=['ticker', 'year'], partitioning_flavor='hive',
+                     existing_data_behavior='delete_matching')
+    return path
+
+def read_dataset(name, columns=None, tickers=None, start_date=None, end_date=None, root=None, memory_map=True):
+    """
+    Reads (part of) a dataset back into a Date-indexed frame.
+
+    Only the requested columns are decoded, ticker and year partitions outside the
+    filters are skipped without being opened, and the date filter is pushed down
+    to the Parquet row-group statistics.
+
+    Args:
+    name (str): Dataset name.
+    columns (list): Columns to read (default: all).
+    tickers (str or list): Tickers to read (default: all).
+    start_date (str): First date to include.
+    end_date (str): Last date to include.
+    root (str): Dataset root directory (default: data/datasets).
+    memory_map (bool): Memory-map the Parquet files instead of reading them into buffers.
+
+    Returns:
+    pd.DataFrame: Frame indexed by Date (with a 'ticker' column), sorted by ticker and date.
+    """
+    filesystem = fs.LocalFileSystem(use_mmap=memory_map)
+    dataset = ds.dataset(_dataset_path(name, root), format='parquet', partitioning='hive', filesystem=filesystem)
+
+    conditions = []
+    if tickers is not None:
+        conditions.append(ds.field('ticker').isin([tickers] if isinstance(tickers, str) else list(tickers)))
+    if start_date is not None:
+        start = pd.Timestamp(start_date)
+        conditions.append(ds.field('year') >= start.year)
+        conditions.append(ds.field('Date') >= pa.scalar(start.to_pydatetime(), type=pa.timestamp('us')))
+    if end_date is not None:
+        end = pd.Timestamp(end_date)
+        conditions.append(ds.field('year') <= end.year)
+        conditions.append(ds.field('Date') <= pa.scalar(end.to_pydatetime(), type=pa.timestamp('us')))
+
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+
+    if columns is not None:
+        columns = ['Date', 'ticker'] + [c for c in columns if c not in ('Date', 'ticker')]
+    table = dataset.to_table(columns=columns, filter=expression)
+
+    df = table.to_pandas()
+    df['ticker'] = df['ticker'].astype(str)
+    df = df.drop(columns='year', errors='ignore')
+    return df.sort_values(['ticker', 'Date']).set_index('Date')
+
+def import_csv(csv_path, name, ticker, index_col='Date', root=None):
+    """
+    Converts a legacy CSV (e.g. data/preprocessed_stock_data.csv) into a dataset.
+
+    Returns:
+    str: Path of the dataset directory.
+    """
+    df = pd.read_csv(csv_path, index_col=index_col, parse_dates=True)
+    return write_dataset(df, name, ticker=ticker, root=root, mode='overwrite')
+
+# Symbol of the rows of data/preprocessed_stock_data.csv, the legacy CSV the
+# archive trainers import, which has no ticker column
+LEGACY_CSV_TICKER = 'SPY'
+
+def load_dataset(name, csv_path=None, ticker=LEGACY_CSV_TICKER, **read_kwargs):
+    """
+    Reads a dataset, importing it from csv_path first if it has not been written yet.
+
+    ticker names the rows of a CSV without a ticker column; it is ignored otherwise.
+    """
+    if not dataset_exists(name, read_kwargs.get('root')) and csv_path is not None:
+        import_csv(csv_path, name, ticker, root=read_kwargs.get('root'))
+    return read_dataset(name, **read_kwargs)
+
+def export_csv(name, csv_path, **read_kwargs):
+    """
+    Exports (part of) a dataset as CSV for tools that need it.
+
+    Returns:
+    str: The CSV path.
+    """
+    read_dataset(name, **read_kwargs).to_csv(csv_path, index=True)
+    return csv_path
@@ -0,0 +1,193 @@
+import time
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+from sklearn.model_selection import ParameterGrid
+
+'''
+
+Walk-forward model evaluation
+
+'''
+
+def walk_forward_splits(dates, n_folds=5, mode='expanding', train_size=None, test_size=None, gap=0):
+    """
+    Builds walk-forward train/test row indices over (possibly repeated) dates.
+
+    Folds are cut on distinct dates, so every ticker of a panel shares the same
+    fold boundaries and no test date is ever seen in training.
+
+    Args:
+    dates (array-like): Date of every row (a panel may repeat dates across tickers).
+    n_folds (int): Number of test windows.
+    mode (str): 'expanding' trains on all history before the test window, 'rolling' on the last train_size dates.
+    train_size (int): Training dates per fold for 'rolling' (default: test_size * 2) and the first
+        'expanding' fold (default: what is left before the test windows).
+    test_size (int): Dates per test window (default: distinct dates // (n_folds + 1)).
+    gap (int): Dates skipped between training and testing (e.g. 1 for next-day labels).
+
+    Returns:
+    list: (train_rows, test_rows, test_start_date, test_end_date) per fold.
+    """
+    unique, codes = np.unique(np.asarray(dates, dtype='datetime64[ns]'), return_inverse=True)
+    n_dates = len(unique)
+    test_size = test_size or n_dates // (n_folds + 1)
+    if test_size < 1:
+        raise ValueError(f"Not enough dates ({n_dates}) for {n_folds} folds.")
+    first_test = n_dates - n_folds * test_size
+    if mode == 'rolling':
+        train_size = train_size or 2 * test_size
+    elif mode != 'expanding':
+        raise ValueError(f"Unknown walk-forward mode: {mode}")
+    if first_test - gap < 1:
+        raise ValueError(f"Not enough dates ({n_dates}) for {n_folds} folds of {test_size} dates.")
+
+    # Rows sorted by date code make every fold two contiguous slices of one order array
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(n_dates + 1))
+
+    splits = []
+    for fold in range(n_folds):
+        test_start = first_test + fold * test_size
+        test_end = test_start + test_size
+        train_end = test_start - gap
+        if mode == 'rolling':
+            train_start = max(0, train_end - train_size)
+        else:
+            train_start = max(0, first_test - gap - train_size) if train_size else 0
+        train_rows = order[bounds[train_start]:bounds[train_end]]
+        test_rows = order[bounds[test_start]:bounds[test_end]]
+        splits.append((train_rows, test_rows, pd.Timestamp(unique[test_start]), pd.Timestamp(unique[test_end - 1])))
+    return splits
+
+def classification_metrics(y_true, y_pred, y_score=None):
+    """Accuracy, precision, recall, F1 and (when scores and both classes exist) ROC AUC."""
+    metrics = {
+        'accuracy': accuracy_score(y_true, y_pred),
+        'precision': precision_score(y_true, y_pred, zero_division=0),
+        'recall': recall_score(y_true, y_pred, zero_division=0),
+        'f1': f1_score(y_true, y_pred, zero_division=0),
+    }
+    if y_score is not None and len(np.unique(y_true)) == 2:
+        metrics['roc_auc'] = roc_auc_score(y_true, y_score)
+    return metrics
+
+def signal_backtest(signals, returns, dates, cost=0.0, periods_per_year=252):
+    """
+    Equal-weight P&L of holding every ticker with a long signal for one period.
+
+    Args:
+    signals (np.array): 1 to be long for the next period, 0 to be flat.
+    returns (np.array): The next-period return of each row.
+    dates (np.array): Row dates; rows of the same date form one portfolio.
+    cost (float): Cost per unit of position taken, charged on every long row.
+    periods_per_year (int): For annualizing the Sharpe ratio.
+
+    Returns:
+    dict: Total and buy-and-hold return, Sharpe ratio, max drawdown, hit rate and exposure.
+    """
+    signals = np.asarray(signals, dtype=np.float64)
+    returns = np.asarray(returns, dtype=np.float64)
+    _, codes = np.unique(np.asarray(dates, dtype='datetime64[ns]'), return_inverse=True)
+    n_dates = codes.max() + 1 if len(codes) else 0
+
+    rows = np.bincount(codes, minlength=n_dates)
+    strategy = np.bincount(codes, weights=signals * returns - cost * signals, minlength=n_dates) / np.maximum(rows, 1)
+    market = np.bincount(codes, weights=returns, minlength=n_dates) / np.maximum(rows, 1)
+
+    equity = np.cumprod(1.0 + strategy)
+    drawdown = equity / np.maximum.accumulate(equity) - 1.0 if n_dates else np.zeros(0)
+    std = strategy.std()
+    traded = signals > 0
+    return {
+        'total_return': equity[-1] - 1.0 if n_dates else 0.0,
+        'buy_hold_return': np.prod(1.0 + market) - 1.0,
+        'sharpe': strategy.mean() / std * np.sqrt(periods_per_year) if std > 0 else 0.0,
+        'max_drawdown': drawdown.min() if n_dates else 0.0,
+        'hit_rate': (returns[traded] > 0).mean() if traded.any() else np.nan,
+        'exposure': traded.mean() if len(traded) else 0.0,
+    }
+
+def _run_fold(estimator, params, X, y, returns, dates, train_rows, test_rows, cost):
+    """Fit and score one (parameters, fold) task on the shared matrices."""
+    model = clone(estimator).set_params(**params)
+    start = time.perf_counter()
+    model.fit(X[train_rows], y[train_rows])
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = model.predict(X[test_rows])
+    y_score = model.predict_proba(X[test_rows])[:, -1] if hasattr(model, 'predict_proba') else None
+    predict_seconds = time.perf_counter() - start
+
+    result = classification_metrics(y[test_rows], y_pred, y_score)
+    if returns is not None:
+        result.update(signal_backtest(y_pred, returns[test_rows], dates[test_rows], cost))
+    result.update(fit_seconds=fit_seconds, predict_seconds=predict_seconds)
+    return result
+
+def walk_forward_evaluate(estimator, df, features, target='Target', param_grid=None, n_folds=5,
+                          mode='expanding', train_size=None, test_size=None, gap=0,
+                          returns_column=None, cost=0.0, n_jobs=-1):
+    """
+    Walk-forward evaluation of an estimator over every parameter combination.
+
+    The feature matrix, labels and returns are converted to NumPy once; each
+    (parameters, fold) task only receives row indices into them. Tasks run in
+    parallel through joblib's process pool, which memory-maps large arrays
+    instead of copying them into every worker.
+
+    Args:
+    estimator: scikit-learn classifier (cloned for every task).
+    df (pd.DataFrame): Date-indexed frame or panel with the features and target.
+    features (list): Feature columns.
+    target (str): Label column.
+    param_grid (dict): Parameter name -> values to try (default: the estimator as given).
+    n_folds (int): Number of walk-forward folds.
+    mode (str): 'expanding' or 'rolling' (see walk_forward_splits).
+    train_size (int): Training dates (see walk_forward_splits).
+    test_size (int): Test dates per fold.
+    gap (int): Dates between training and testing.
+    returns_column (str): Next-period return column for the P&L backtest; derived from
+        Next_Close/Close when those columns exist.
+    cost (float): Cost per position in the backtest.
+    n_jobs (int): Parallel workers (-1: all CPUs).
+
+    Returns:
+    tuple: (per-fold results DataFrame, per-parameter summary DataFrame sorted by mean accuracy).
+    """
+    df = df.dropna(subset=list(features) + [target])
+    X = np.ascontiguousarray(df[features].to_numpy(dtype=np.float64))
+    y = df[target].to_numpy()
+    dates = pd.to_datetime(df.index).to_numpy()
+    if returns_column is not None:
+        returns = df[returns_column].to_numpy(dtype=np.float64)
+    elif {'Next_Close', 'Close'} <= set(df.columns):
+        returns = df['Next_Close'].to_numpy(dtype=np.float64) / df['Close'].to_numpy(dtype=np.float64) - 1.0
+    else:
+        returns = None
+
+    splits = walk_forward_splits(dates, n_folds, mode, train_size, test_size, gap)
+    grid = list(ParameterGrid(param_grid or {}))
+    tasks = [(params, fold) for params in grid for fold in range(len(splits))]
+
+    start = time.perf_counter()
+    outputs = Parallel(n_jobs=n_jobs)(
+        delayed(_run_fold)(estimator, params, X, y, returns, dates, splits[fold][0], splits[fold][1], cost)
+        for params, fold in tasks)
+    elapsed = time.perf_counter() - start
+    print(f"Evaluated {len(grid)} parameter sets x {len(splits)} folds in {elapsed:.2f}s")
+
+    rows = []
+    for (params, fold), output in zip(tasks, outputs):
+        train_rows, test_rows, test_start, test_end = splits[fold]
+        rows.append({'params': str(params), 'fold': fold, 'test_start': test_start, 'test_end': test_end,
+                     'train_rows': len(train_rows), 'test_rows': len(test_rows), **output})
+    folds = pd.DataFrame(rows)
+
+    metrics = [c for c in folds.columns if c not in ('params', 'fold', 'test_start', 'test_end', 'train_rows', 'test_rows')]
+    summary = folds.groupby('params', sort=False)[metrics].mean()
+    summary = summary.sort_values('accuracy', ascending=False)
+    return folds, summary
@@ -0,0 +1,280 @@
+from collections import deque
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+'''
+
+Technical indicator engine
+
+'''
+
+# Indicators computed by default: name -> windows (periods)
+DEFAULT_FEATURES = {
+    'sma': [50, 200],
+    'ema': [12, 26],
+    'rsi': [14],
+    'bollinger': [20],
+    'atr': [14],
+    'returns': [1],
+}
+
+def _prefix_sums(x):
+    return np.concatenate(([0.0], np.cumsum(x)))
+
+def group_starts(groups):
+    """
+    For each row of a group-sorted array, the position of the first row of its group.
+
+    Args:
+    groups (np.array): Group keys (e.g. tickers), with equal keys adjacent.
+
+    Returns:
+    np.array: First-row position per row.
+    """
+    groups = np.asarray(groups)
+    n = len(groups)
+    first = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]]) if n else np.array([], dtype=np.int64)
+    return np.repeat(first, np.diff(np.r_[first, n]))
+
+def _window_sum(prefix, window, starts=None):
+    """Sum of the last `window` values (fewer at the start of a group) and how many values it covers."""
+    n = len(prefix) - 1
+    end = np.arange(1, n + 1)
+    start = np.maximum(end - window, 0 if starts is None else starts)
+    return prefix[end] - prefix[start], end - start
+
+def sma(x, window, min_periods=None, starts=None):
+    """
+    Simple moving average from one cumulative sum.
+
+    Args:
+    x (np.array): Values.
+    window (int): Window length.
+    min_periods (int): Values needed before a result is produced (default: window).
+    starts (np.array): Per-row group start (group_starts) so windows never cross groups.
+
+    Returns:
+    np.array: Moving average (NaN before min_periods values).
+    """
+    total, count = _window_sum(_prefix_sums(x), window, starts)
+    out = total / count
+    out[count < (min_periods or window)] = np.nan
+    return out
+
+def _smooth(x, alpha):
+    """Exponential smoothing y[i] = alpha * x[i] + (1 - alpha) * y[i-1], seeded with x[0]."""
+    if len(x) == 0:
+        return x.astype(np.float64)
+    y, _ = lfilter([alpha], [1.0, alpha - 1.0], x, zi=[(1.0 - alpha) * x[0]])
+    return y
+
+def ema(x, span):
+    """Exponential moving average (pandas ewm(span=span, adjust=False))."""
+    return _smooth(np.asarray(x, dtype=np.float64), 2.0 / (span + 1))
+
+def rsi(close, period=14):
+    """Relative Strength Index with Wilder smoothing (NaN for the first `period` bars)."""
+    delta = np.diff(close, prepend=close[:1])
+    avg_gain = _smooth(np.maximum(delta, 0.0), 1.0 / period)
+    avg_loss = _smooth(np.maximum(-delta, 0.0), 1.0 / period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    out[avg_loss == 0] = 100.0
+    out[:period] = np.nan
+    return out
+
+def bollinger(close, window=20, num_std=2.0, starts=None):
+    """
+    Bollinger bands from running sums of x and x^2 (population standard deviation).
+
+    Returns:
+    tuple: (middle, upper, lower) bands.
+    """
+    # Centering on the group's first value keeps the sum of squares well conditioned
+    offset = close[starts] if starts is not None else np.full(len(close), close[0] if len(close) else 0.0)
+    centered = close - offset
+    total, count = _window_sum(_prefix_sums(centered), window, starts)
+    total_sq, _ = _window_sum(_prefix_sums(centered * centered), window, starts)
+    mean = total / count
+    std = np.sqrt(np.maximum(total_sq / count - mean * mean, 0.0))
+    middle = mean + offset
+    middle[count < window] = np.nan
+    std[count < window] = np.nan
+    return middle, middle + num_std * std, middle - num_std * std
+
+def true_range(high, low, close):
+    prev_close = np.concatenate((close[:1], close[:-1]))
+    return np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+def atr(high, low, close, period=14):
+    """Average True Range with Wilder smoothing (NaN for the first `period` - 1 bars)."""
+    out = _smooth(true_range(high, low, close), 1.0 / period)
+    out[:period - 1] = np.nan
+    return out
+
+def _per_group(func, bounds, *arrays):
+    """Apply func to each group's contiguous slice of the arrays and stitch the results."""
+    if len(bounds) == 2:
+        return func(*arrays)
+    out = np.empty(len(arrays[0]))
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        out[lo:hi] = func(*(a[lo:hi] for a in arrays))
+    return out
+
+def compute_features(df, spec=None, min_periods=None, by=None):
+    """
+    Adds indicator columns to a price frame in place.
+
+    Every indicator is computed from the same contiguous float64 Close (and
+    High/Low) arrays; only the new columns are written, the frame is not copied.
+
+    Args:
+    df (pd.DataFrame): Frame with a Close column (High and Low for ATR), sorted by date.
+    spec (dict): Indicator name -> list of windows (default: DEFAULT_FEATURES).
+        Names: 'sma' (MA_w), 'ema' (EMA_w), 'rsi' (RSI_w), 'bollinger' (BB_MID_w, BB_UP_w,
+        BB_LOW_w), 'atr' (ATR_w), 'returns' (RET_w).
+    min_periods (int): Minimum values for moving averages (default: the full window).
+    by (str): Group column of a panel (e.g. 'ticker'); rows must be sorted by it, then by date.
+        Windows and smoothing restart at every group.
+
+    Returns:
+    pd.DataFrame: The same frame with indicator columns added.
+    """
+    spec = DEFAULT_FEATURES if spec is None else spec
+    close = df['Close'].to_numpy(dtype=np.float64)
+    n = len(close)
+    starts = group_starts(df[by].to_numpy()) if by is not None else None
+    bounds = np.r_[np.unique(starts), n] if starts is not None and n else np.array([0, n])
+
+    for w in spec.get('sma', []):
+        df[f'MA_{w}'] = sma(close, w, min_periods, starts)
+    for w in spec.get('ema', []):
+        df[f'EMA_{w}'] = _per_group(lambda c: ema(c, w), bounds, close)
+    for w in spec.get('rsi', []):
+        df[f'RSI_{w}'] = _per_group(lambda c: rsi(c, w), bounds, close)
+    for w in spec.get('bollinger', []):
+        df[f'BB_MID_{w}'], df[f'BB_UP_{w}'], df[f'BB_LOW_{w}'] = bollinger(close, w, starts=starts)
+    if spec.get('atr') and {'High', 'Low'} <= set(df.columns):
+        high = df['High'].to_numpy(dtype=np.float64)
+        low = df['Low'].to_numpy(dtype=np.float64)
+        for w in spec['atr']:
+            df[f'ATR_{w}'] = _per_group(lambda h, l, c: atr(h, l, c, w), bounds, high, low, close)
+    positions = np.arange(n)
+    for w in spec.get('returns', []):
+        returns = np.full(n, np.nan)
+        returns[w:] = close[w:] / close[:-w] - 1.0
+        if starts is not None:
+            returns[positions - w < starts] = np.nan
+        df[f'RET_{w}'] = returns
+    return df
+
+class IncrementalFeatures:
+    """
+    Keeps O(window) state per ticker and updates indicators one bar at a time.
+
+    Seed each ticker from its history once (seed()), then call update() as new bars
+    arrive; no history is recomputed. Values match compute_features with the same spec.
+    """
+
+    def __init__(self, spec=None):
+        self.spec = DEFAULT_FEATURES if spec is None else spec
+        windows = self.spec.get('sma', []) + self.spec.get('bollinger', []) + [w + 1 for w in self.spec.get('returns', [])]
+        self.max_window = max(windows, default=1)
+        self.state = {}
+
+    def _new_state(self):
+        return {
+            'closes': deque(maxlen=self.max_window),
+            'sums': {},        # window -> running sum of closes
+            'sq_sums': {},     # bollinger window -> running sum of squared closes
+            'ema': {},
+            'rsi': {},         # period -> [avg_gain, avg_loss, bars]
+            'atr': {},         # period -> [value, bars]
+        }
+
+    def seed(self, ticker, df):
+        """
+        Initialise a ticker's state from its history.
+
+        Returns:
+        dict: Indicator values for the last bar.
+        """
+        self.state.pop(ticker, None)
+        values = None
+        for close, high, low in zip(df['Close'].to_numpy(dtype=np.float64),
+                                    df['High'].to_numpy(dtype=np.float64) if 'High' in df else [None] * len(df),
+                                    df['Low'].to_numpy(dtype=np.float64) if 'Low' in df else [None] * len(df)):
+            values = self.update(ticker, close, high, low)
+        return values
+
+    def update(self, ticker, close, high=None, low=None):
+        """
+        Apply one new bar.
+
+        Returns:
+        dict: Column name -> indicator value for this bar (NaN until enough bars were seen).
+        """
+        state = self.state.get(ticker)
+        if state is None:
+            state = self.state[ticker] = self._new_state()
+        closes = state['closes']
+        prev_close = closes[-1] if closes else None
+        values = {}
+
+        # Running window sums: add the new close, drop the one leaving the window
+        for w in set(self.spec.get('sma', [])) | set(self.spec.get('bollinger', [])):
+            leaving = closes[-w] if len(closes) >= w else 0.0
+            state['sums'][w] = state['sums'].get(w, 0.0) + close - leaving
+        for w in self.spec.get('bollinger', []):
+            leaving = closes[-w] if len(closes) >= w else 0.0
+            state['sq_sums'][w] = state['sq_sums'].get(w, 0.0) + close * close - leaving * leaving
+        closes.append(close)
+        n = len(closes)
+
+        for w in self.spec.get('sma', []):
+            values[f'MA_{w}'] = state['sums'][w] / w if n >= w else np.nan
+        for w in self.spec.get('ema', []):
+            alpha = 2.0 / (w + 1)
+            previous = state['ema'].get(w, close)
+            values[f'EMA_{w}'] = state['ema'][w] = alpha * close + (1 - alpha) * previous
+        for w in self.spec.get('rsi', []):
+            gain, loss, bars = state['rsi'].get(w, [0.0, 0.0, 0])
+            delta = close - prev_close if prev_close is not None else 0.0
+            gain += (max(delta, 0.0) - gain) / w
+            loss += (max(-delta, 0.0) - loss) / w
+            state['rsi'][w] = [gain, loss, bars + 1]
+            if bars + 1 <= w:
+                values[f'RSI_{w}'] = np.nan
+            else:
+                values[f'RSI_{w}'] = 100.0 if loss == 0 else 100.0 - 100.0 / (1.0 + gain / loss)
+        for w in self.spec.get('bollinger', []):
+            if n >= w:
+                mean = state['sums'][w] / w
+                std = np.sqrt(max(state['sq_sums'][w] / w - mean * mean, 0.0))
+                values[f'BB_MID_{w}'], values[f'BB_UP_{w}'], values[f'BB_LOW_{w}'] = mean, mean + 2 * std, mean - 2 * std
+            else:
+                values[f'BB_MID_{w}'] = values[f'BB_UP_{w}'] = values[f'BB_LOW_{w}'] = np.nan
+        if high is not None and low is not None:
+            reference = prev_close if prev_close is not None else close
+            tr = max(high - low, abs(high - reference), abs(low - reference))
+            for w in self.spec.get('atr', []):
+                value, bars = state['atr'].get(w, [tr, 0])
+                value += (tr - value) / w if bars else 0.0
+                state['atr'][w] = [value, bars + 1]
+                values[f'ATR_{w}'] = value if bars + 1 >= w else np.nan
+        for w in self.spec.get('returns', []):
+            values[f'RET_{w}'] = close / closes[-w - 1] - 1.0 if n > w else np.nan
+        return values
+
+    def update_frame(self, ticker, new_bars):
+        """
+        Apply several new bars in order.
+
+        Returns:
+        pd.DataFrame: Indicator values for the new bars, indexed like new_bars.
+        """
+        highs = new_bars['High'] if 'High' in new_bars else [None] * len(new_bars)
+        lows = new_bars['Low'] if 'Low' in new_bars else [None] * len(new_bars)
+        rows = [self.update(ticker, c, h, l) for c, h, l in zip(new_bars['Close'], highs, lows)]
+        return pd.DataFrame(rows, index=new_bars.index)
@@ -0,0 +1,226 @@
+import copy
+import json
+import os
+import shutil
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from dataset_store import read_dataset
+
+'''
+
+Versioned model registry
+
+'''
+
+# Models live under models/<name>/v<version>/ (model.joblib + metadata.json);
+# override with the TREND_MODEL_DIR environment variable.
+MODEL_DIR = os.environ.get('TREND_MODEL_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models'))
+
+# Loaded models kept in memory, keyed by artifact path
+_loaded = {}
+
+def _model_path(name, root=None):
+    return os.path.join(root or MODEL_DIR, name)
+
+def _version_dirs(name, root=None):
+    """Every v<N> directory of a model, including versions still being written."""
+    path = _model_path(name, root)
+    if not os.path.isdir(path):
+        return []
+    return sorted(int(entry[1:]) for entry in os.listdir(path) if entry.startswith('v') and entry[1:].isdigit())
+
+def list_versions(name, root=None):
+    """Saved versions of a model, oldest first (a version counts once its metadata is written)."""
+    path = _model_path(name, root)
+    return [version for version in _version_dirs(name, root)
+            if os.path.exists(os.path.join(path, f'v{version:04d}', 'metadata.json'))]
+
+def save_model(model, name, features, target=None, train_start=None, train_end=None, tickers=None,
+               metrics=None, params=None, root=None):
+    """
+    Saves a trained model as the next version of `name`.
+
+    The model is written uncompressed with joblib so its NumPy arrays (e.g. a
+    forest's tree nodes) can be memory-mapped on load. The version directory
+    is claimed with an exclusive create, so concurrent saves get distinct
+    versions, and metadata.json is written last (atomically), so readers never see a
+    half-written version.
+
+    Args:
+    model: The fitted model.
+    name (str): Model name (e.g. 'mvp_rf').
+    features (list): Feature columns, in the order the model expects them.
+    target (str): Label column.
+    train_start (str): First training date.
+    train_end (str): Last training date.
+    tickers (list): Tickers the training data covered.
+    metrics (dict): Evaluation metrics to keep with the model.
+    params (dict): Hyper-parameters.
+    root (str): Registry root (default: MODEL_DIR).
+
+    Returns:
+    int: The new version number.
+    """
+    while True:
+        version = (_version_dirs(name, root) or [0])[-1] + 1
+        final = os.path.join(_model_path(name, root), f'v{version:04d}')
+        try:
+            os.makedirs(final, exist_ok=False)
+            break
+        except FileExistsError:
+            continue    # another process claimed this version first
+
+    metadata = {
+        'name': name,
+        'version': version,
+        'created_at': pd.Timestamp.now(tz='UTC').isoformat(),
+        'model_class': f'{type(model).__module__}.{type(model).__name__}',
+        'features': list(features),
+        'target': target,
+        'train_start': None if train_start is None else str(pd.Timestamp(train_start).date()),
+        'train_end': None if train_end is None else str(pd.Timestamp(train_end).date()),
+        'tickers': None if tickers is None else sorted(tickers),
+        'metrics': {k: float(v) for k, v in (metrics or {}).items()},
+        'params': params or {},
+    }
+    try:
+        joblib.dump(model, os.path.join(final, 'model.joblib'))
+        tmp = os.path.join(final, f'metadata.json.tmp{os.getpid()}')
+        with open(tmp, 'w') as f:
+            json.dump(metadata, f, indent=2, default=str)
+        os.replace(tmp, os.path.join(final, 'metadata.json'))
+    except Exception:
+        shutil.rmtree(final, ignore_errors=True)
+        raise
+    print(f"✅ Saved {name} v{version} to {final}")
+    return version
+
+def load_metadata(name, version=None, root=None):
+    """Metadata of a saved version (default: the latest)."""
+    versions = list_versions(name, root)
+    if not versions:
+        raise FileNotFoundError(f"No saved versions of model '{name}'")
+    version = version or versions[-1]
+    with open(os.path.join(_model_path(name, root), f'v{version:04d}', 'metadata.json')) as f:
+        return json.load(f)
+
+def load_model(name, version=None, root=None, mmap_mode='r'):
+    """
+    Loads a saved model (default: the latest version).
+
+    Large arrays are memory-mapped (mmap_mode='r') instead of read into memory,
+    and a loaded version is cached for the life of the process.
+
+    Returns:
+    tuple: (model, metadata dict).
+    """
+    metadata = load_metadata(name, version, root)
+    path = os.path.join(_model_path(name, root), f"v{metadata['version']:04d}", 'model.joblib')
+    model = _loaded.get(path)
+    if model is None:
+        model = _loaded[path] = joblib.load(path, mmap_mode=mmap_mode)
+    return model, metadata
+
+def list_models(root=None):
+    """
+    Every saved version of every model.
+
+    Returns:
+    pd.DataFrame: One row of metadata per version.
+    """
+    root = root or MODEL_DIR
+    if not os.path.isdir(root):
+        return pd.DataFrame()
+    rows = [load_metadata(name, version, root) for name in sorted(os.listdir(root))
+            for version in list_versions(name, root)]
+    return pd.DataFrame(rows)
+
+def latest_rows(panel, by='ticker'):
+    """
+    Last row of every ticker in a panel sorted by ticker, then date.
+
+    Returns:
+    pd.DataFrame: One row per ticker.
+    """
+    keys = panel[by].to_numpy()
+    last = np.ones(len(panel), dtype=bool)
+    last[:-1] = keys[1:] != keys[:-1]
+    return panel[last]
+
+class BatchPredictor:
+    """
+    Scores many tickers with one saved model in a single call.
+
+    The model and its feature schema are loaded once. Each call converts the
+    latest feature row of every ticker into one contiguous matrix and makes a
+    single predict_proba call. Models with an n_jobs setting score with
+    `n_jobs` threads (default one, because thread start-up dominates the cost
+    of small batches) through a shallow copy, so the cached model that
+    load_model shares is not modified.
+    """
+
+    def __init__(self, name, version=None, root=None, threshold=0.5, n_jobs=1):
+        model, self.metadata = load_model(name, version, root)
+        if hasattr(model, 'n_jobs') and model.n_jobs != n_jobs:
+            # The copy shares the fitted arrays (e.g. the trees) with the cached model
+            model = copy.copy(model)
+            model.n_jobs = n_jobs
+        self.model = model
+        self.features = self.metadata['features']
+        self.threshold = threshold
+        self.last_latency = None
+
+    def predict(self, rows):
+        """
+        Scores feature rows.
+
+        Args:
+        rows (pd.DataFrame): Rows holding (at least) the model's feature columns.
+
+        Returns:
+        np.array: Probability of the positive class per row.
+        """
+        missing = [f for f in self.features if f not in rows.columns]
+        if missing:
+            raise KeyError(f"Rows are missing model features: {missing}")
+        start = time.perf_counter()
+        X = np.ascontiguousarray(rows[self.features].to_numpy(dtype=np.float64))
+        if hasattr(self.model, 'predict_proba'):
+            scores = self.model.predict_proba(X)[:, -1]
+        else:
+            scores = np.asarray(self.model.predict(X), dtype=np.float64)
+        self.last_latency = time.perf_counter() - start
+        return scores
+
+    def predict_latest(self, panel, by='ticker'):
+        """
+        Scores the most recent row of every ticker in a panel.
+
+        Args:
+        panel (pd.DataFrame): Date-indexed feature panel sorted by ticker, then date.
+        by (str): Ticker column.
+
+        Returns:
+        pd.DataFrame: ticker, Date, probability and signal (1 when probability >= threshold).
+        """
+        rows = latest_rows(panel.dropna(subset=self.features), by)
+        scores = self.predict(rows)
+        return pd.DataFrame({
+            'ticker': rows[by].to_numpy(),
+            'Date': pd.to_datetime(rows.index).to_numpy(),
+            'probability': scores,
+            'signal': (scores >= self.threshold).astype(int),
+        })
+
+    def predict_dataset(self, dataset, tickers=None, as_of=None, lookback_days=14, root=None):
+        """
+        Scores the latest rows of a stored feature dataset (see dataset_store) on or
+        before as_of (default: today), reading only the model's features over the
+        preceding lookback_days.
+        """
+        end = pd.Timestamp(as_of or pd.Timestamp.today()).normalize()
+        panel = read_dataset(dataset, columns=self.features, tickers=tickers,
+                             start_date=end - pd.Timedelta(days=lookback_days), end_date=end, root=root)
+        return self.predict_latest(panel)
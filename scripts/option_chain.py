@@ -0,0 +1,271 @@
+import numpy as np
+import pandas as pd
+
+'''
+
+Array-backed option chain
+
+'''
+
+OPTION_TYPES = ('call', 'put')
+
+# Frame column (as yfinance / preprocess_options_data name it) -> float32 array attribute
+PRICE_COLUMNS = {
+    'lastPrice': 'last_price',
+    'bid': 'bid',
+    'ask': 'ask',
+    'volume': 'volume',
+    'openInterest': 'open_interest',
+    'impliedVolatility': 'implied_volatility',
+}
+
+# Decimals restored when decoding: quotes trade in cents, and float32 keeps about
+# 7 significant digits, so rounding removes the conversion noise exactly
+PRICE_DECIMALS = {'lastPrice': 2, 'bid': 2, 'ask': 2, 'volume': 0, 'openInterest': 0, 'impliedVolatility': 6}
+
+# Column names used by the database tables
+_DB_COLUMNS = {'strike_price': 'strike', 'expiration_date': 'expiration', 'last_price': 'lastPrice'}
+
+def _to_days(values):
+    """Dates (strings, datetimes) -> datetime64[D] array."""
+    return pd.to_datetime(np.asarray(values)).values.astype('datetime64[D]')
+
+def _to_cents(strikes):
+    return np.round(np.asarray(strikes, dtype=np.float64) * 100).astype(np.int32)
+
+def _bound_cents(strike):
+    """
+    A strike bound in cents for comparing with the int32 strikes.
+
+    0.29 * 100 is 28.999999999999996, which would put the 0.29 strike on the
+    wrong side of an exclusive bound; rounding to a millionth of a cent drops
+    that error but keeps genuine fractions (e.g. a spot of 449.995).
+    """
+    return round(float(strike) * 100, 6)
+
+class OptionChain:
+    """
+    Option contracts stored as a struct of typed NumPy arrays.
+
+    Every contract is one position in parallel arrays: expiration (uint16 code
+    into the sorted `expirations` table), option_type (uint8 code into
+    OPTION_TYPES), strike (int32 cents) and float32 quote columns. Rows are
+    sorted by (expiration, type, strike) and `offsets` holds the first row of
+    each (expiration, type) group, so selecting an expiration, or a strike range
+    within one expiration and type, is a slice: a view on the same arrays.
+
+    Indexing by the usual frame column names ('strike', 'bid', 'option_type',
+    'expiration', ...) returns decoded NumPy arrays, so code written against the
+    combined DataFrame keeps working; to_frame() builds that DataFrame.
+    """
+
+    def __init__(self, expirations, expiration, option_type, strike, columns, in_the_money=None, ticker=None,
+                 offsets=None):
+        """
+        Args:
+        expirations (np.array): Sorted unique expiration dates (datetime64[D]).
+        expiration (np.array): uint16 index into expirations for every contract.
+        option_type (np.array): uint8 index into OPTION_TYPES for every contract.
+        strike (np.array): int32 strikes in cents.
+        columns (dict): Array attribute name (see PRICE_COLUMNS) -> float32 array.
+        in_the_money (np.array): Optional bool flag per contract.
+        ticker (str): Underlying ticker symbol.
+        offsets (np.array): Group offsets, when already known (rows must be sorted).
+        """
+        self.ticker = ticker
+        self.expirations = expirations
+        self.expiration = expiration
+        self.option_type = option_type
+        self.strike = strike
+        for name in PRICE_COLUMNS.values():
+            setattr(self, name, columns[name])
+        self.in_the_money = in_the_money
+        if offsets is None:
+            groups = self.expiration.astype(np.int64) * len(OPTION_TYPES) + self.option_type
+            offsets = np.searchsorted(groups, np.arange(len(self.expirations) * len(OPTION_TYPES) + 1))
+        self.offsets = offsets
+
+    @classmethod
+    def from_columns(cls, expiration_dates, option_types, strikes, columns, in_the_money=None, ticker=None):
+        """
+        Encode and sort unsorted per-contract columns.
+
+        Args:
+        expiration_dates: Expiration date of every contract.
+        option_types: 'call' or 'put' for every contract.
+        strikes: Strike prices in dollars.
+        columns (dict): Frame column name (see PRICE_COLUMNS) -> values; missing columns are NaN.
+        in_the_money: Optional bool flag per contract.
+        ticker (str): Underlying ticker symbol.
+        """
+        days = _to_days(expiration_dates)
+        expirations, expiration = np.unique(days, return_inverse=True)
+        option_type = (np.asarray(option_types) == 'put').astype(np.uint8)
+        strike = _to_cents(strikes)
+        expiration = expiration.astype(np.uint16)
+
+        order = np.lexsort((strike, option_type, expiration))
+        n = len(strike)
+        arrays = {attr: (np.asarray(columns[col], dtype=np.float32) if col in columns else np.full(n, np.nan, np.float32))[order]
+                  for col, attr in PRICE_COLUMNS.items()}
+        if in_the_money is not None:
+            in_the_money = np.asarray(in_the_money, dtype=bool)[order]
+        return cls(expirations, expiration[order], option_type[order], strike[order], arrays, in_the_money, ticker)
+
+    @classmethod
+    def from_yfinance(cls, options_chain, expiration_date, ticker=None):
+        """Chain for one expiration from a yfinance-style object with .calls and .puts frames."""
+        calls, puts = options_chain.calls, options_chain.puts
+        n_calls, n_puts = len(calls), len(puts)
+        columns = {col: np.concatenate([calls[col].to_numpy(dtype=np.float64), puts[col].to_numpy(dtype=np.float64)])
+                   for col in PRICE_COLUMNS if col in calls and col in puts}
+        in_the_money = None
+        if 'inTheMoney' in calls and 'inTheMoney' in puts:
+            in_the_money = np.concatenate([calls['inTheMoney'].to_numpy(dtype=bool), puts['inTheMoney'].to_numpy(dtype=bool)])
+        return cls.from_columns(np.repeat(np.datetime64(pd.Timestamp(expiration_date).date(), 'D'), n_calls + n_puts),
+                                np.repeat(np.array(OPTION_TYPES), [n_calls, n_puts]),
+                                np.concatenate([calls['strike'].to_numpy(dtype=np.float64),
+                                                puts['strike'].to_numpy(dtype=np.float64)]),
+                                columns, in_the_money, ticker)
+
+    @classmethod
+    def from_frame(cls, frame, ticker=None):
+        """
+        Chain from a combined frame, either shaped like preprocess_options_data's
+        (strike, option_type, expiration, lastPrice, ...) or like the database tables
+        (strike_price, expiration_date, last_price, ...).
+        """
+        frame = frame.rename(columns=_DB_COLUMNS)
+        if ticker is None and 'ticker' in frame and len(frame):
+            ticker = frame['ticker'].iloc[0]
+        in_the_money = frame['inTheMoney'].to_numpy(dtype=bool) if 'inTheMoney' in frame else None
+        return cls.from_columns(frame['expiration'], frame['option_type'], frame['strike'],
+                                {col: frame[col] for col in PRICE_COLUMNS if col in frame}, in_the_money, ticker)
+
+    @classmethod
+    def concat(cls, chains):
+        """Merge chains (e.g. one per expiration) into one sorted chain."""
+        chains = [chain for chain in chains if len(chain)]
+        if not chains:
+            return cls.empty()
+        in_the_money = None
+        if all(chain.in_the_money is not None for chain in chains):
+            in_the_money = np.concatenate([chain.in_the_money for chain in chains])
+        return cls.from_columns(np.concatenate([chain.expiration_dates for chain in chains]),
+                                np.concatenate([chain['option_type'] for chain in chains]),
+                                np.concatenate([chain['strike'] for chain in chains]),
+                                {col: np.concatenate([getattr(chain, attr) for chain in chains])
+                                 for col, attr in PRICE_COLUMNS.items()},
+                                in_the_money, chains[0].ticker)
+
+    @classmethod
+    def empty(cls, ticker=None):
+        return cls.from_columns([], [], [], {}, ticker=ticker)
+
+    def __len__(self):
+        return len(self.strike)
+
+    def __repr__(self):
+        return (f"OptionChain({self.ticker or ''!s}, {len(self)} contracts, "
+                f"{len(self.expirations)} expirations)")
+
+    @property
+    def expiration_dates(self):
+        """Expiration of every contract (datetime64[D])."""
+        return self.expirations[self.expiration]
+
+    @property
+    def columns(self):
+        columns = ['strike', 'option_type', 'expiration', *PRICE_COLUMNS]
+        return columns + ['inTheMoney'] if self.in_the_money is not None else columns
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __getitem__(self, name):
+        """Decoded column under its frame name (strike in dollars, prices as float64)."""
+        if name == 'strike':
+            return self.strike / 100.0
+        if name == 'option_type':
+            return np.array(OPTION_TYPES)[self.option_type]
+        if name == 'expiration':
+            return np.datetime_as_string(self.expiration_dates, unit='D')
+        if name == 'inTheMoney' and self.in_the_money is not None:
+            return self.in_the_money
+        if name in PRICE_COLUMNS:
+            return np.round(getattr(self, PRICE_COLUMNS[name]).astype(np.float64), PRICE_DECIMALS[name])
+        raise KeyError(name)
+
+    def _take(self, rows):
+        """Sub-chain for a slice (views, offsets shifted) or an index array (copies)."""
+        offsets = None
+        if isinstance(rows, slice):
+            offsets = np.clip(self.offsets - rows.start, 0, rows.stop - rows.start)
+        columns = {attr: getattr(self, attr)[rows] for attr in PRICE_COLUMNS.values()}
+        in_the_money = self.in_the_money[rows] if self.in_the_money is not None else None
+        return OptionChain(self.expirations, self.expiration[rows], self.option_type[rows], self.strike[rows],
+                           columns, in_the_money, self.ticker, offsets)
+
+    def where(self, mask):
+        """Contracts where a boolean mask (one flag per contract) is set, as a new chain."""
+        return self._take(np.flatnonzero(mask))
+
+    def select(self, expiration=None, option_type=None, min_strike=None, max_strike=None, inclusive=True):
+        """
+        Contracts of some expiration, type and strike range.
+
+        The result shares memory with this chain whenever the selected rows are
+        contiguous: one expiration, or one (expiration, type) with a strike
+        range. Other selections (e.g. puts across several expirations) gather
+        the matching runs into new arrays.
+
+        Args:
+        expiration: Expiration date (default: all).
+        option_type (str): 'call' or 'put' (default: both).
+        min_strike (float): Lowest strike in dollars (default: no bound).
+        max_strike (float): Highest strike in dollars (default: no bound).
+        inclusive (bool): Whether contracts exactly at min_strike/max_strike are included.
+
+        Returns:
+        OptionChain: The selected contracts, still sorted by (expiration, type, strike).
+        """
+        if expiration is None:
+            expiration_codes = range(len(self.expirations))
+        else:
+            day = np.datetime64(pd.Timestamp(expiration).date(), 'D')
+            code = int(np.searchsorted(self.expirations, day))
+            found = code < len(self.expirations) and self.expirations[code] == day
+            expiration_codes = [code] if found else []
+        type_codes = range(len(OPTION_TYPES)) if option_type is None else [OPTION_TYPES.index(option_type)]
+
+        ranges = []
+        for e in expiration_codes:
+            for t in type_codes:
+                group = e * len(OPTION_TYPES) + t
+                lo, hi = int(self.offsets[group]), int(self.offsets[group + 1])
+                strikes = self.strike[lo:hi]
+                if min_strike is not None:
+                    start = lo + int(np.searchsorted(strikes, _bound_cents(min_strike), 'left' if inclusive else 'right'))
+                else:
+                    start = lo
+                if max_strike is not None:
+                    hi = lo + int(np.searchsorted(strikes, _bound_cents(max_strike), 'right' if inclusive else 'left'))
+                if start >= hi:
+                    continue
+                if ranges and ranges[-1][1] == start:
+                    ranges[-1][1] = hi
+                else:
+                    ranges.append([start, hi])
+
+        if not ranges:
+            return self._take(slice(0, 0))
+        if len(ranges) == 1:
+            return self._take(slice(*ranges[0]))
+        return self._take(np.concatenate([np.arange(lo, hi) for lo, hi in ranges]))
+
+    def to_frame(self):
+        """The combined DataFrame preprocess_options_data used to return."""
+        frame = pd.DataFrame({name: self[name] for name in self.columns})
+        if self.ticker is not None:
+            frame.insert(0, 'ticker', self.ticker)
+        return frame
@@ -0,0 +1,188 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import pandas as pd
+from providers import MarketDataProvider, OptionChainData, YFinanceProvider
+
+'''
+
+On-disk cache for provider responses
+
+'''
+
+CACHE_DIR = os.environ.get('TREND_CACHE_DIR', os.path.join('.cache', 'market_data'))
+
+class CachingProvider(MarketDataProvider):
+    """
+    Provider wrapper that keeps responses as Parquet files on disk.
+
+    Closed historical bars never change, so downloads that end before today are
+    cached without expiry; intraday history, option chains and expiration lists
+    get short TTLs. When the cache grows past max_bytes the least recently used
+    entries are evicted. Entry metadata lives in a small SQLite index next to
+    the files.
+    """
+
+    def __init__(self, provider=None, cache_dir=CACHE_DIR, max_bytes=512 * 1024 * 1024,
+                 intraday_ttl=60, chain_ttl=300, expirations_ttl=3600):
+        self.provider = provider or YFinanceProvider()
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.intraday_ttl = intraday_ttl
+        self.chain_ttl = chain_ttl
+        self.expirations_ttl = expirations_ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._index = sqlite3.connect(os.path.join(cache_dir, 'index.db'), check_same_thread=False)
+        self._index.execute('''CREATE TABLE IF NOT EXISTS entries (
+                                   key TEXT PRIMARY KEY,
+                                   path TEXT,
+                                   bytes INTEGER,
+                                   expires_at REAL,
+                                   last_access REAL
+                               )''')
+        self._index.execute('CREATE INDEX IF NOT EXISTS idx_entries_access ON entries (last_access)')
+        self._index.commit()
+
+    def _get(self, key):
+        while True:
+            with self._lock:
+                row = self._index.execute('SELECT path, expires_at FROM entries WHERE key = ?', (key,)).fetchone()
+                if row is not None and row[1] is not None and row[1] < time.time():
+                    self._remove(key, row[0])
+                    self._index.commit()
+                    row = None
+                if row is None:
+                    self.misses += 1
+                    return None
+            path = row[0]
+
+            # Read without the lock so concurrent hits do not queue behind each other. Every
+            # _put writes a fresh path and files are only ever deleted, so a racing _put or
+            # _evict can make the file vanish but never change it mid-read
+            try:
+                df = pd.read_parquet(path)
+            except OSError:
+                df = None
+
+            with self._lock:
+                current = self._index.execute('SELECT path FROM entries WHERE key = ?', (key,)).fetchone()
+                same_entry = current is not None and current[0] == path
+                if df is not None:
+                    if same_entry:
+                        self._index.execute('UPDATE entries SET last_access = ? WHERE key = ?', (time.time(), key))
+                        self._index.commit()
+                    self.hits += 1
+                    return df
+                if current is None or same_entry:
+                    # Evicted meanwhile, or the file is gone while still indexed
+                    if same_entry:
+                        self._remove(key, path)
+                        self._index.commit()
+                    self.misses += 1
+                    return None
+            # Replaced by a newer file while we read: look it up again
+
+    def _put(self, key, df, ttl=None):
+        digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+        path = os.path.join(self.cache_dir, f"{digest}_{int(time.time() * 1e6)}.parquet")
+        tmp = path + '.tmp'
+        df.to_parquet(tmp)
+        os.replace(tmp, path)
+
+        now = time.time()
+        with self._lock:
+            old = self._index.execute('SELECT path FROM entries WHERE key = ?', (key,)).fetchone()
+            if old is not None:
+                self._remove(key, old[0])
+            self._index.execute('INSERT INTO entries VALUES (?, ?, ?, ?, ?)',
+                                (key, path, os.path.getsize(path), now + ttl if ttl else None, now))
+            self._evict()
+            self._index.commit()
+
+    def _remove(self, key, path):
+        self._index.execute('DELETE FROM entries WHERE key = ?', (key,))
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        total = self._index.execute('SELECT COALESCE(SUM(bytes), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, path, size in self._index.execute(
+                'SELECT key, path, bytes FROM entries ORDER BY last_access').fetchall():
+            if total <= self.max_bytes:
+                break
+            self._remove(key, path)
+            total -= size
+            self.evictions += 1
+
+    def _cached(self, key, ttl, fetch):
+        df = self._get(key)
+        if df is None:
+            df = fetch()
+            if df is not None and not df.empty:
+                self._put(key, df, ttl)
+        return df
+
+    def stats(self):
+        """Hit/miss/eviction counters and current cache size."""
+        with self._lock:
+            entries, size = self._index.execute('SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM entries').fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': entries,
+            'bytes': size,
+        }
+
+    def clear(self):
+        """Remove every cached entry."""
+        with self._lock:
+            for key, path in self._index.execute('SELECT key, path FROM entries').fetchall():
+                self._remove(key, path)
+            self._index.commit()
+
+    def download(self, ticker, start_date, end_date, interval='1d', **kwargs):
+        key = f"download|{ticker}|{interval}|{start_date}|{end_date}|{sorted(kwargs.items())}"
+        # Ranges ending before today only contain closed bars and never change
+        closed = pd.Timestamp(end_date) <= pd.Timestamp.today().normalize()
+        ttl = None if closed else self.intraday_ttl
+        return self._cached(key, ttl, lambda: self.provider.download(ticker, start_date, end_date, interval, **kwargs))
+
+    def history(self, ticker, period='1d', interval='1m'):
+        key = f"history|{ticker}|{period}|{interval}"
+        return self._cached(key, self.intraday_ttl, lambda: self.provider.history(ticker, period, interval))
+
+    def options_expirations(self, ticker):
+        key = f"expirations|{ticker}"
+        df = self._cached(key, self.expirations_ttl,
+                          lambda: pd.DataFrame({'expiration': self.provider.options_expirations(ticker)}))
+        return df['expiration'].tolist()
+
+    def option_chain(self, ticker, expiration_date):
+        key = f"chain|{ticker}|{expiration_date}"
+
+        def fetch():
+            chain = self.provider.option_chain(ticker, expiration_date)
+            df = pd.concat([chain.calls.assign(_side='call'), chain.puts.assign(_side='put')], ignore_index=True)
+            # The underlying quote (a plain dict) travels in the Parquet metadata
+            df.attrs['underlying'] = chain.underlying
+            return df
+
+        df = self._cached(key, self.chain_ttl, fetch)
+        side = df.pop('_side')
+        calls = df[side == 'call'].reset_index(drop=True)
+        puts = df[side == 'put'].reset_index(drop=True)
+        return OptionChainData(calls, puts, df.attrs.get('underlying'))
@@ -0,0 +1,160 @@
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+'''
+
+Market data providers
+
+'''
+
+# Same shape as the object yfinance returns from Ticker.option_chain()
+OptionChainData = namedtuple('OptionChainData', ['calls', 'puts', 'underlying'])
+
+class MarketDataProvider(ABC):
+    """
+    Interface for every market data call the collectors make.
+
+    Implementations return frames shaped like yfinance's so the preprocessing
+    code does not care where the data came from.
+    """
+
+    @abstractmethod
+    def download(self, ticker, start_date, end_date, interval='1d', **kwargs):
+        """Daily (or interval) OHLCV bars indexed by date."""
+
+    @abstractmethod
+    def history(self, ticker, period='1d', interval='1m'):
+        """Recent bars for a ticker, e.g. the current day's minute bars."""
+
+    @abstractmethod
+    def options_expirations(self, ticker):
+        """Available option expiration dates ('%Y-%m-%d')."""
+
+    @abstractmethod
+    def option_chain(self, ticker, expiration_date):
+        """Chain for one expiration with .calls and .puts frames."""
+
+class YFinanceProvider(MarketDataProvider):
+    """Provider backed by the yfinance package."""
+
+    def __init__(self):
+        import yfinance as yf
+        self._yf = yf
+
+    def download(self, ticker, start_date, end_date, interval='1d', **kwargs):
+        return self._yf.download(ticker, start=start_date, end=end_date, interval=interval, **kwargs)
+
+    def history(self, ticker, period='1d', interval='1m'):
+        return self._yf.Ticker(ticker).history(period=period, interval=interval)
+
+    def options_expirations(self, ticker):
+        return list(self._yf.Ticker(ticker).options)
+
+    def option_chain(self, ticker, expiration_date):
+        return self._yf.Ticker(ticker).option_chain(expiration_date)
+
+class FakeProvider(MarketDataProvider):
+    """
+    Deterministic synthetic provider for tests and benchmarks.
+
+    Prices follow a geometric random walk seeded by the ticker symbol, so the same
+    request always returns the same data. `latency` simulates a network round trip
+    and `failure_rate` makes calls raise to exercise retry logic.
+    """
+
+    def __init__(self, latency=0.0, failure_rate=0.0, n_expirations=8, strikes_per_side=40, seed=0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.n_expirations = n_expirations
+        self.strikes_per_side = strikes_per_side
+        self.seed = seed
+        self.calls = 0
+        self._failures = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+
+    def _request(self):
+        with self._lock:
+            self.calls += 1
+            failed = self.failure_rate and self._failures.random() < self.failure_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if failed:
+            raise ConnectionError("Simulated provider failure")
+
+    def _rng(self, ticker, salt=0):
+        return np.random.default_rng([zlib.crc32(ticker.encode()), self.seed, salt])
+
+    def bars(self, ticker, index, salt=0):
+        """
+        Seeded OHLCV bars for a ticker at the given timestamps (any frequency).
+
+        The same ticker, salt and length always give the same bars, so tests and
+        benchmarks can build e.g. minute bars without going through download().
+        """
+        # One generator per series keeps prefixes stable when the range grows
+        n = len(index)
+        start = 20 + zlib.crc32(ticker.encode()) % 480
+        close = start * np.exp(np.cumsum(self._rng(ticker, salt).normal(0.0003, 0.015, n)))
+        spread = np.abs(self._rng(ticker, salt + 1).normal(0, 0.006, n)) * close
+        open_ = close * (1 + self._rng(ticker, salt + 2).normal(0, 0.004, n))
+        return pd.DataFrame({
+            'Open': open_,
+            'High': np.maximum(open_, close) + spread,
+            'Low': np.minimum(open_, close) - spread,
+            'Close': close,
+            'Volume': self._rng(ticker, salt + 3).integers(1_000_000, 50_000_000, n),
+        }, index=pd.DatetimeIndex(index, name='Date'))
+
+    def download(self, ticker, start_date, end_date, interval='1d', **kwargs):
+        self._request()
+        # Generate from a fixed origin so overlapping ranges agree
+        index = pd.bdate_range('2000-01-03', end_date, inclusive='left')
+        bars = self.bars(ticker, index)
+        return bars[bars.index >= pd.Timestamp(start_date)]
+
+    def history(self, ticker, period='1d', interval='1m'):
+        self._request()
+        day = pd.Timestamp.now().normalize()
+        index = pd.date_range(day + pd.Timedelta(hours=9, minutes=30), periods=390, freq='min')
+        return self.bars(ticker, index, salt=int(day.value // 10**9))
+
+    def options_expirations(self, ticker):
+        self._request()
+        fridays = pd.date_range(pd.Timestamp.now().normalize(), periods=self.n_expirations, freq='W-FRI')
+        return list(fridays.strftime('%Y-%m-%d'))
+
+    def option_chain(self, ticker, expiration_date):
+        self._request()
+        spot = float(self.bars(ticker, pd.bdate_range('2000-01-03', pd.Timestamp.now().normalize()))['Close'].iloc[-1])
+        step = max(0.5, round(spot * 0.005 * 2) / 2)
+        strikes = np.round(spot / step) * step + step * np.arange(-self.strikes_per_side, self.strikes_per_side + 1)
+        strikes = strikes[strikes > 0]
+        t = max((pd.Timestamp(expiration_date) - pd.Timestamp.now()).days, 1) / 365
+        vol = 0.2 + 0.1 * np.abs(np.log(strikes / spot))
+        d1 = (np.log(spot / strikes) + 0.5 * vol ** 2 * t) / (vol * np.sqrt(t))
+        d2 = d1 - vol * np.sqrt(t)
+        call = np.maximum(spot * ndtr(d1) - strikes * ndtr(d2), 0.01)
+        put = np.maximum(strikes * ndtr(-d2) - spot * ndtr(-d1), 0.01)
+        rng = self._rng(ticker, zlib.crc32(expiration_date.encode()))
+
+        def frame(prices, kind):
+            half_spread = np.maximum(0.01, prices * 0.02)
+            return pd.DataFrame({
+                'contractSymbol': [f"{ticker}{expiration_date.replace('-', '')[2:]}{kind[0].upper()}{int(k * 1000):08d}" for k in strikes],
+                'strike': strikes,
+                'lastPrice': np.round(prices, 2),
+                'bid': np.round(prices - half_spread, 2),
+                'ask': np.round(prices + half_spread, 2),
+                'volume': rng.integers(0, 5000, len(strikes)).astype(float),
+                'openInterest': rng.integers(0, 50000, len(strikes)),
+                'impliedVolatility': vol,
+                'inTheMoney': strikes < spot if kind == 'call' else strikes > spot,
+            })
+
+        return OptionChainData(frame(call, 'call'), frame(put, 'put'), {'regularMarketPrice': spot})
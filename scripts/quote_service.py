@@ -0,0 +1,219 @@
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+import numpy as np
+from collection_scheduler import CollectionScheduler
+
+'''
+
+Live quotes held in memory
+
+'''
+
+class StaleQuoteError(RuntimeError):
+    """Raised when the latest quote of a ticker is missing or older than the staleness bound."""
+
+class QuoteFeed(ABC):
+    """
+    Interface for upstream quote sources polled by QuoteService.
+    """
+
+    @abstractmethod
+    def fetch(self, tickers):
+        """
+        Latest trade of each ticker.
+
+        Returns:
+        dict: ticker -> (epoch seconds, price) for the tickers that have a quote.
+        """
+
+class ProviderQuoteFeed(QuoteFeed):
+    """
+    Polls a MarketDataProvider's latest 1-minute bar for the whole watchlist at
+    once, through a CollectionScheduler (bounded concurrency and rate limit).
+
+    Quotes carry the bar's own time rather than the poll time, so a provider
+    serving an old bar shows up as stale in QuoteService.
+    """
+
+    def __init__(self, provider=None, max_workers=8, rate=5.0):
+        self.scheduler = CollectionScheduler(provider, max_workers=max_workers, rate=rate, max_retries=1)
+
+    def fetch(self, tickers):
+        return {ticker: (float(stamp), float(price))
+                for ticker, (stamp, price) in self.scheduler.get_latest_bars(tickers).items()}
+
+class SimulatedFeed(QuoteFeed):
+    """
+    Local random-walk feed for tests, benchmarks and offline screening.
+
+    Every fetch moves each ticker's price by a normal step of `volatility` (relative).
+    """
+
+    def __init__(self, start_prices=None, volatility=0.0005, seed=0):
+        self.prices = dict(start_prices or {})
+        self.volatility = volatility
+        self._rng = np.random.default_rng(seed)
+
+    def fetch(self, tickers):
+        now = time.time()
+        steps = np.exp(self._rng.normal(0.0, self.volatility, len(tickers)))
+        quotes = {}
+        for ticker, step in zip(tickers, steps):
+            price = self.prices.get(ticker, 20.0 + zlib.crc32(ticker.encode()) % 480) * step
+            self.prices[ticker] = price
+            quotes[ticker] = (now, price)
+        return quotes
+
+class QuoteService:
+    """
+    Keeps the last `capacity` ticks of every watched ticker in NumPy ring buffers.
+
+    All tickers share two (tickers x capacity) arrays of timestamps and prices
+    plus a write position per ticker. A background thread polls the feed every
+    `interval` seconds; lookups only read the arrays, so get_price and
+    get_prices answer in microseconds. Quotes older than `max_age` seconds
+    count as stale.
+    """
+
+    def __init__(self, feed, tickers=(), capacity=1024, interval=1.0, max_age=5.0):
+        self.feed = feed
+        self.capacity = capacity
+        self.interval = interval
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._times = np.zeros((0, capacity))
+        self._prices = np.zeros((0, capacity))
+        self._heads = np.zeros(0, dtype=np.int64)    # total ticks written per ticker
+        self._stop = threading.Event()
+        self._thread = None
+        self.errors = 0
+        self.add_tickers(tickers)
+
+    @property
+    def tickers(self):
+        return list(self._rows)
+
+    def add_tickers(self, tickers):
+        """Start tracking more tickers (buffers grow by one row each)."""
+        with self._lock:
+            new = [t for t in dict.fromkeys(tickers) if t not in self._rows]
+            if not new:
+                return
+            for ticker in new:
+                self._rows[ticker] = len(self._rows)
+            pad = ((0, len(new)), (0, 0))
+            self._times = np.pad(self._times, pad)
+            self._prices = np.pad(self._prices, pad, constant_values=np.nan)
+            self._heads = np.pad(self._heads, (0, len(new)))
+
+    def push(self, quotes):
+        """
+        Append ticks to the buffers.
+
+        Args:
+        quotes (dict): ticker -> (epoch seconds, price); unknown tickers are added.
+        """
+        self.add_tickers(quotes)
+        with self._lock:
+            rows = np.fromiter((self._rows[t] for t in quotes), dtype=np.int64, count=len(quotes))
+            values = np.array(list(quotes.values()), dtype=np.float64).reshape(-1, 2)
+            slots = self._heads[rows] % self.capacity
+            self._times[rows, slots] = values[:, 0]
+            self._prices[rows, slots] = values[:, 1]
+            self._heads[rows] += 1
+
+    def poll_once(self):
+        """Fetch the watchlist from the feed once and store the quotes."""
+        try:
+            quotes = self.feed.fetch(self.tickers)
+        except Exception as e:
+            self.errors += 1
+            print(f"❌ Quote poll failed: {e}")
+            return 0
+        if quotes:
+            self.push(quotes)
+        return len(quotes)
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.poll_once()
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def start(self):
+        """Start polling in a daemon thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='quote-poller', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the polling thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def _latest(self, rows):
+        slots = (self._heads[rows] - 1) % self.capacity
+        return self._times[rows, slots], self._prices[rows, slots]
+
+    def get_price(self, ticker, max_age=None):
+        """
+        Latest price of a ticker.
+
+        Raises:
+        StaleQuoteError: When there is no quote, or it is older than max_age (default: self.max_age) seconds.
+        """
+        row = self._rows.get(ticker)
+        with self._lock:
+            if row is None or self._heads[row] == 0:
+                raise StaleQuoteError(f"No quote for {ticker}")
+            slot = (self._heads[row] - 1) % self.capacity
+            stamp, price = self._times[row, slot], self._prices[row, slot]
+        age = time.time() - stamp
+        if age > (self.max_age if max_age is None else max_age):
+            raise StaleQuoteError(f"Quote for {ticker} is {age:.1f}s old")
+        return float(price)
+
+    def get_prices(self, tickers, max_age=None):
+        """
+        Latest prices of many tickers in one vectorized lookup.
+
+        Returns:
+        np.array: Prices aligned with tickers; NaN where a quote is missing or stale.
+        """
+        rows = np.fromiter((self._rows.get(t, -1) for t in tickers), dtype=np.int64, count=len(tickers))
+        known = rows >= 0
+        prices = np.full(len(tickers), np.nan)
+        with self._lock:
+            stamps, latest = self._latest(rows[known])
+            has_quote = self._heads[rows[known]] > 0
+        fresh = has_quote & (time.time() - stamps <= (self.max_age if max_age is None else max_age))
+        prices[np.flatnonzero(known)[fresh]] = latest[fresh]
+        return prices
+
+    def history(self, ticker, n=None):
+        """
+        Up to the last n ticks of a ticker, oldest first.
+
+        Returns:
+        tuple: (timestamps, prices) arrays.
+        """
+        row = self._rows[ticker]
+        with self._lock:
+            head = self._heads[row]
+            count = min(head, self.capacity, n or self.capacity)
+            slots = np.arange(head - count, head) % self.capacity
+            return self._times[row, slots].copy(), self._prices[row, slots].copy()
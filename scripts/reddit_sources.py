@@ -0,0 +1,145 @@
+import os
+import threading
+from abc import ABC, abstractmethod
+import time
+import zlib
+import numpy as np
+
+'''
+
+Reddit sources
+
+'''
+
+# Credentials for the praw client, read from the environment (never commit them)
+REDDIT_CREDENTIALS = {
+    'client_id': os.environ.get('REDDIT_CLIENT_ID'),
+    'client_secret': os.environ.get('REDDIT_CLIENT_SECRET'),
+    'user_agent': os.environ.get('REDDIT_USER_AGENT', 'myTrendProjectBot v1.0'),
+}
+
+class RedditSource(ABC):
+    """
+    Interface for the Reddit calls the collector makes.
+
+    Submissions and comments are plain dicts so the collector and the database
+    code do not depend on praw objects.
+    Submission: id, subreddit, created_utc, title, body, url, score, author, num_comments.
+    Comment: id, parent_id (the submission id), created_utc, body, score, author.
+    """
+
+    @abstractmethod
+    def submissions(self, subreddit, after=None, limit=None):
+        """Submissions of a subreddit, newest first; `after` continues below that submission id."""
+
+    @abstractmethod
+    def comments(self, submission_id):
+        """Every comment of a submission (flattened)."""
+
+class PrawSource(RedditSource):
+    """Source backed by one shared praw client."""
+
+    def __init__(self, client_id=None, client_secret=None, user_agent=None, replace_more_limit=0):
+        client_id = client_id or REDDIT_CREDENTIALS['client_id']
+        client_secret = client_secret or REDDIT_CREDENTIALS['client_secret']
+        if not client_id or not client_secret:
+            raise RuntimeError("Reddit credentials missing: set REDDIT_CLIENT_ID and REDDIT_CLIENT_SECRET "
+                               "(or pass client_id and client_secret)")
+        import praw
+        self._reddit = praw.Reddit(
+            client_id=client_id,
+            client_secret=client_secret,
+            user_agent=user_agent or REDDIT_CREDENTIALS['user_agent'],
+        )
+        self.replace_more_limit = replace_more_limit
+
+    def submissions(self, subreddit, after=None, limit=None):
+        params = {'after': f't3_{after}'} if after else None
+        for submission in self._reddit.subreddit(subreddit).new(limit=limit, params=params):
+            yield {
+                'id': submission.id,
+                'subreddit': subreddit,
+                'created_utc': int(submission.created_utc),
+                'title': submission.title,
+                'body': submission.selftext,
+                'url': submission.url,
+                'score': submission.score,
+                'author': submission.author.name if submission.author else None,
+                'num_comments': submission.num_comments,
+            }
+
+    def comments(self, submission_id):
+        submission = self._reddit.submission(id=submission_id)
+        # Remove "More comments" stubs (limit=0 keeps only the comments already loaded)
+        submission.comments.replace_more(limit=self.replace_more_limit)
+        return [{
+            'id': comment.id,
+            'parent_id': submission_id,
+            'created_utc': int(comment.created_utc),
+            'body': comment.body,
+            'score': comment.score,
+            'author': comment.author.name if comment.author else None,
+        } for comment in submission.comments.list()]
+
+class FakeRedditSource(RedditSource):
+    """
+    Deterministic synthetic subreddit for tests and benchmarks.
+
+    Submissions are spaced `interval` seconds apart going back from `now`,
+    mention random tickers from `tickers`, and carry `comments_per_post`
+    comments each. `latency` simulates the round trip of a comment-tree fetch.
+    """
+
+    WORDS = ['calls', 'puts', 'moon', 'earnings', 'guidance', 'bought', 'sold', 'bagholder', 'squeeze',
+             'great', 'terrible', 'yolo', 'rally', 'crash', 'love', 'hate', 'dip', 'tendies']
+
+    def __init__(self, n_submissions=1000, comments_per_post=5, tickers=('SPY', 'AMD', 'TSLA', 'NVDA', 'AAPL'),
+                 interval=600, now=1704067200, latency=0.0, seed=0):
+        self.n_submissions = n_submissions
+        self.comments_per_post = comments_per_post
+        self.tickers = list(tickers)
+        self.interval = interval
+        self.now = now
+        self.latency = latency
+        self.seed = seed
+        self.comment_calls = 0
+        self._lock = threading.Lock()
+
+    def _text(self, rng, n_words):
+        words = list(rng.choice(self.WORDS, n_words))
+        words.insert(int(rng.integers(0, n_words)), ('$' if rng.random() < 0.5 else '') + str(rng.choice(self.tickers)))
+        return ' '.join(words)
+
+    def submissions(self, subreddit, after=None, limit=None):
+        start = 0 if after is None else int(after, 36) + 1
+        stop = self.n_submissions if limit is None else min(self.n_submissions, start + limit)
+        for i in range(start, stop):
+            rng = np.random.default_rng([self.seed, zlib.crc32(subreddit.encode()), i])
+            yield {
+                'id': np.base_repr(i, 36).lower(),
+                'subreddit': subreddit,
+                'created_utc': self.now - i * self.interval,
+                'title': self._text(rng, 4),
+                'body': self._text(rng, 12),
+                'url': f'https://reddit.example/{i}',
+                'score': int(rng.integers(0, 500)),
+                'author': f'user{int(rng.integers(0, 100))}',
+                'num_comments': self.comments_per_post,
+            }
+
+    def comments(self, submission_id):
+        with self._lock:
+            self.comment_calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        i = int(submission_id, 36)
+        rng = np.random.default_rng([self.seed, i, 1])
+        created = self.now - i * self.interval
+        return [{
+            'id': f'{submission_id}_{j}',
+            'parent_id': submission_id,
+            'created_utc': created + 60 * (j + 1),
+            'body': self._text(rng, 8),
+            'score': int(rng.integers(0, 100)),
+            'author': f'user{int(rng.integers(0, 100))}',
+        } for j in range(self.comments_per_post)]
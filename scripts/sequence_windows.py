@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from sklearn.preprocessing import MinMaxScaler
+from features import group_starts
+
+'''
+
+Lookback windows for sequence models
+
+'''
+
+def sliding_windows(values, lookback):
+    """
+    Zero-copy lookback windows over a (rows, features) array.
+
+    Args:
+    values (np.array): 2-D array of rows x features.
+    lookback (int): Rows per window.
+
+    Returns:
+    np.array: Read-only view of shape (rows - lookback + 1, lookback, features);
+        window s covers rows s .. s + lookback - 1.
+    """
+    return sliding_window_view(values, lookback, axis=0).transpose(0, 2, 1)
+
+class WindowDataset:
+    """
+    Lookback windows over a single series or a (ticker, date) panel.
+
+    Windows are strided views over one float32 array of raw feature values;
+    only the rows of a requested batch are gathered and scaled, so memory use
+    is one copy of the data plus one batch. A window never crosses tickers.
+    Windows are split by the date of their target row, and the scaler is
+    fitted on the rows before the split date only.
+    """
+
+    def __init__(self, df, features=['Close'], target='Close', lookback=60, by=None, train_fraction=0.8,
+                 feature_range=(0, 1)):
+        """
+        Args:
+        df (pd.DataFrame): Date-indexed frame, or panel sorted by `by`, then date.
+        features (list): Input columns.
+        target (str): Column predicted from each window (must be one of the features).
+        lookback (int): Rows per window.
+        by (str): Ticker column of a panel.
+        train_fraction (float): Share of distinct dates used for training.
+        feature_range (tuple): MinMaxScaler output range.
+        """
+        self.features = list(features)
+        self.lookback = lookback
+        self.target_index = self.features.index(target)
+        self.values = np.ascontiguousarray(df[self.features].to_numpy(dtype=np.float32))
+        self.windows = sliding_windows(self.values, lookback)
+        dates = pd.to_datetime(df.index).to_numpy()
+
+        # Window s predicts row s + lookback; keep it only when that row belongs to the same ticker
+        n_windows = max(len(self.values) - lookback, 0)
+        starts = np.arange(n_windows)
+        if by is not None:
+            groups = group_starts(df[by].to_numpy())
+            starts = starts[groups[starts] == groups[starts + lookback]]
+        target_dates = dates[starts + lookback]
+
+        unique_dates = np.unique(dates)
+        cut = int(len(unique_dates) * train_fraction)
+        self.split_date = unique_dates[cut] if cut < len(unique_dates) else unique_dates[-1] + np.timedelta64(1, 'D')
+        self.index = {
+            'train': starts[target_dates < self.split_date],
+            'test': starts[target_dates >= self.split_date],
+        }
+
+        train_rows = dates < self.split_date
+        self.scaler = MinMaxScaler(feature_range=feature_range).fit(self.values[train_rows])
+        self._scale = self.scaler.scale_.astype(np.float32)
+        self._offset = self.scaler.min_.astype(np.float32)
+
+    def __len__(self):
+        return len(self.index['train']) + len(self.index['test'])
+
+    def n_batches(self, split='train', batch_size=256):
+        return -(-len(self.index[split]) // batch_size)
+
+    def take(self, positions):
+        """
+        Gather and scale the windows starting at the given rows.
+
+        Returns:
+        tuple: X of shape (len(positions), lookback, features) and y of shape (len(positions),).
+        """
+        X = self.windows[positions] * self._scale + self._offset
+        t = self.target_index
+        y = self.values[positions + self.lookback, t] * self._scale[t] + self._offset[t]
+        return X, y
+
+    def batches(self, split='train', batch_size=256, shuffle=False, seed=None, repeat=False):
+        """
+        Lazily yields (X, y) mini-batches of one split.
+
+        Args:
+        split (str): 'train' or 'test'.
+        batch_size (int): Windows per batch.
+        shuffle (bool): Shuffle window order (each pass when repeating).
+        seed (int): Shuffle seed.
+        repeat (bool): Loop forever (for Keras fit with steps_per_epoch).
+
+        Yields:
+        tuple: (X, y) float32 arrays.
+        """
+        rng = np.random.default_rng(seed)
+        while True:
+            positions = rng.permutation(self.index[split]) if shuffle else self.index[split]
+            for start in range(0, len(positions), batch_size):
+                yield self.take(positions[start:start + batch_size])
+            if not repeat:
+                return
+
+    def arrays(self, split='train'):
+        """Every window of a split as dense arrays (for data that fits in memory)."""
+        return self.take(self.index[split])
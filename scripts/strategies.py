@@ -0,0 +1,279 @@
+import numpy as np
+import pandas as pd
+from analysis import lower_pair_indices, top_k_rows
+from option_chain import OptionChain
+
+'''
+
+Multi-strategy options analytics on a shared strike grid
+
+'''
+
+class StrikeGrid:
+    '''
+    Sorted strike/price grid for every (ticker, expiration) in an option chain.
+
+    All groups live in one set of flat arrays sorted by (ticker, expiration, strike),
+    so each group is a contiguous segment and strategies can evaluate every group
+    with the same array operations. Call and put quotes share a row per strike;
+    missing quotes are NaN.
+    '''
+
+    def __init__(self, keys, group, strike, call_bid, call_ask, put_bid, put_ask):
+        self.keys = keys
+        self.group = group
+        self.strike = strike
+        self.call_bid = call_bid
+        self.call_ask = call_ask
+        self.put_bid = put_bid
+        self.put_ask = put_ask
+
+    def __len__(self):
+        return len(self.strike)
+
+    def spot_per_row(self, spot):
+        '''
+        Broadcast the underlying price to every row.
+
+        Args:
+        spot (float or dict): One price, or a price per ticker.
+        '''
+        if isinstance(spot, dict):
+            tickers = self.keys['ticker'].to_numpy()[self.group]
+            return pd.Series(tickers).map(spot).to_numpy(dtype=np.float64)
+        return np.full(len(self), float(spot))
+
+def build_strike_grid(option_chain, ticker=None):
+    '''
+    Builds the shared strike grid from a combined options chain.
+
+    Args:
+    option_chain (OptionChain or pd.DataFrame): Chain from preprocess_options_data, or a frame with
+        strike, bid, ask, option_type and expiration columns, optionally with a ticker column.
+    ticker (str): Ticker to use when the chain has no ticker column.
+
+    Returns:
+    StrikeGrid: The grid covering every (ticker, expiration) in the chain.
+    '''
+    if isinstance(option_chain, OptionChain):
+        option_chain = option_chain.to_frame()
+    chain = option_chain[['strike', 'bid', 'ask', 'option_type', 'expiration']].copy()
+    chain['ticker'] = option_chain['ticker'] if 'ticker' in option_chain else (ticker or '')
+
+    # One grouped unstack lines up call and put quotes on a single row per strike
+    grid = (chain.groupby(['ticker', 'expiration', 'strike', 'option_type'])[['bid', 'ask']]
+            .first()
+            .unstack('option_type'))
+    grid = grid.reindex(columns=pd.MultiIndex.from_product([['bid', 'ask'], ['call', 'put']]))
+
+    index = grid.index
+    keys = index.droplevel('strike').unique().to_frame(index=False)
+    group = index.droplevel('strike').factorize(sort=True)[0]
+
+    def column(price, option_type):
+        return grid[(price, option_type)].to_numpy(dtype=np.float64)
+
+    return StrikeGrid(keys, group, index.get_level_values('strike').to_numpy(dtype=np.float64),
+                      column('bid', 'call'), column('ask', 'call'),
+                      column('bid', 'put'), column('ask', 'put'))
+
+def _vertical_pairs(grid, mask, max_width):
+    '''
+    Every (upper, lower) strike pair within a group among the rows selected by mask.
+
+    Returns:
+    np.array, np.array: Grid row indices of the higher and lower strike of each pair.
+    '''
+    rows = np.flatnonzero(mask)
+    upper, lower = lower_pair_indices(grid.group[rows], grid.strike[rows], max_width)
+    return rows[upper], rows[lower]
+
+def _spread_frame(grid, group, columns):
+    '''
+    Attach ticker and expiration to a dict of result arrays.
+    '''
+    keys = grid.keys.iloc[group].reset_index(drop=True)
+    result = pd.DataFrame(columns)
+    result.insert(0, 'Ticker', keys['ticker'].to_numpy())
+    result.insert(1, 'Expiration', keys['expiration'].to_numpy())
+    return result
+
+def _credit_columns(width, credit):
+    collateral = width * 100
+    with np.errstate(divide='ignore', invalid='ignore'):
+        roi = np.where(collateral > 0, credit * 100 / collateral * 100, np.nan)
+    return {
+        'Credit': credit * 100,
+        'Collateral': collateral,
+        'Max Loss': collateral - credit * 100,
+        'ROI': roi,
+    }
+
+def put_credit_spreads(grid, spot=None, max_width=None, top_k=None):
+    '''
+    Sell a higher strike put (at the bid) and buy a lower strike put (at the ask).
+
+    Args:
+    grid (StrikeGrid): Shared strike grid.
+    spot (float or dict): Underlying price(s); when given only OTM puts are used.
+    max_width (float): Widest spread (in strike points) to evaluate.
+    top_k (int): Keep only the top_k spreads by ROI (default: all).
+
+    Returns:
+    pd.DataFrame: One row per spread.
+    '''
+    mask = ~np.isnan(grid.put_bid) & ~np.isnan(grid.put_ask)
+    if spot is not None:
+        mask &= grid.strike < grid.spot_per_row(spot)
+
+    short, long = _vertical_pairs(grid, mask, max_width)
+    credit = grid.put_bid[short] - grid.put_ask[long]
+    result = _spread_frame(grid, grid.group[short], {
+        'Short Strike': grid.strike[short],
+        'Long Strike': grid.strike[long],
+        **_credit_columns(grid.strike[short] - grid.strike[long], credit),
+    })
+    return top_k_rows(result, 'ROI', top_k)
+
+def call_credit_spreads(grid, spot=None, max_width=None, top_k=None):
+    '''
+    Sell a lower strike call (at the bid) and buy a higher strike call (at the ask).
+
+    Args:
+    grid (StrikeGrid): Shared strike grid.
+    spot (float or dict): Underlying price(s); when given only OTM calls are used.
+    max_width (float): Widest spread (in strike points) to evaluate.
+    top_k (int): Keep only the top_k spreads by ROI (default: all).
+
+    Returns:
+    pd.DataFrame: One row per spread.
+    '''
+    mask = ~np.isnan(grid.call_bid) & ~np.isnan(grid.call_ask)
+    if spot is not None:
+        mask &= grid.strike > grid.spot_per_row(spot)
+
+    long, short = _vertical_pairs(grid, mask, max_width)
+    credit = grid.call_bid[short] - grid.call_ask[long]
+    result = _spread_frame(grid, grid.group[short], {
+        'Short Strike': grid.strike[short],
+        'Long Strike': grid.strike[long],
+        **_credit_columns(grid.strike[long] - grid.strike[short], credit),
+    })
+    return top_k_rows(result, 'ROI', top_k)
+
+def debit_verticals(grid, max_width=None, top_k=None):
+    '''
+    Bull call spreads (buy lower call, sell higher call) and bear put spreads
+    (buy higher put, sell lower put), paying the ask and receiving the bid.
+
+    Args:
+    grid (StrikeGrid): Shared strike grid.
+    max_width (float): Widest spread (in strike points) to evaluate.
+    top_k (int): Keep only the top_k spreads by ROI (default: all).
+
+    Returns:
+    pd.DataFrame: One row per spread with debit, max profit and ROI on the debit paid.
+    '''
+    frames = []
+    calls = ~np.isnan(grid.call_bid) & ~np.isnan(grid.call_ask)
+    upper, lower = _vertical_pairs(grid, calls, max_width)
+    frames.append(('bull_call', upper, lower, lower, upper,
+                   grid.call_ask[lower] - grid.call_bid[upper]))
+
+    puts = ~np.isnan(grid.put_bid) & ~np.isnan(grid.put_ask)
+    upper, lower = _vertical_pairs(grid, puts, max_width)
+    frames.append(('bear_put', upper, lower, upper, lower,
+                   grid.put_ask[upper] - grid.put_bid[lower]))
+
+    results = []
+    for kind, upper, lower, long, short, debit in frames:
+        width = grid.strike[upper] - grid.strike[lower]
+        max_profit = (width - debit) * 100
+        with np.errstate(divide='ignore', invalid='ignore'):
+            roi = np.where(debit > 0, max_profit / (debit * 100) * 100, np.nan)
+        results.append(_spread_frame(grid, grid.group[long], {
+            'Strategy': kind,
+            'Long Strike': grid.strike[long],
+            'Short Strike': grid.strike[short],
+            'Debit': debit * 100,
+            'Max Profit': max_profit,
+            'ROI': roi,
+        }))
+    return top_k_rows(pd.concat(results, ignore_index=True), 'ROI', top_k)
+
+def iron_condors(grid, spot, max_width=None, candidates=20, top_k=None, put_spreads=None, call_spreads=None):
+    '''
+    Pair OTM put credit spreads with OTM call credit spreads of the same expiration.
+
+    Only the best `candidates` spreads by ROI on each side of every expiration are
+    combined, which bounds the cross product.
+
+    Args:
+    grid (StrikeGrid): Shared strike grid.
+    spot (float or dict): Underlying price(s).
+    max_width (float): Widest wing (in strike points) to evaluate.
+    candidates (int): Spreads kept per side and expiration before pairing.
+    top_k (int): Keep only the top_k condors by ROI (default: all).
+    put_spreads (pd.DataFrame): Every put credit spread for this spot and max_width, when
+        already computed (put_credit_spreads without top_k).
+    call_spreads (pd.DataFrame): Same for the call side.
+
+    Returns:
+    pd.DataFrame: One row per condor; collateral is the wider wing.
+    '''
+    def best(spreads):
+        spreads = spreads.sort_values('ROI', ascending=False, na_position='last')
+        return spreads.groupby(['Ticker', 'Expiration'], sort=False).head(candidates)
+
+    if put_spreads is None:
+        put_spreads = put_credit_spreads(grid, spot, max_width)
+    if call_spreads is None:
+        call_spreads = call_credit_spreads(grid, spot, max_width)
+    puts = best(put_spreads)
+    calls = best(call_spreads)
+    condors = puts.merge(calls, on=['Ticker', 'Expiration'], suffixes=(' Put', ' Call'))
+    condors = condors[condors['Short Strike Put'] < condors['Short Strike Call']]
+
+    credit = condors['Credit Put'].to_numpy() + condors['Credit Call'].to_numpy()
+    collateral = np.maximum(condors['Collateral Put'].to_numpy(), condors['Collateral Call'].to_numpy())
+    with np.errstate(divide='ignore', invalid='ignore'):
+        roi = np.where(collateral > 0, credit / collateral * 100, np.nan)
+
+    result = pd.DataFrame({
+        'Ticker': condors['Ticker'].to_numpy(),
+        'Expiration': condors['Expiration'].to_numpy(),
+        'Long Put': condors['Long Strike Put'].to_numpy(),
+        'Short Put': condors['Short Strike Put'].to_numpy(),
+        'Short Call': condors['Short Strike Call'].to_numpy(),
+        'Long Call': condors['Long Strike Call'].to_numpy(),
+        'Credit': credit,
+        'Collateral': collateral,
+        'Max Loss': collateral - credit,
+        'ROI': roi,
+    })
+    return top_k_rows(result, 'ROI', top_k)
+
+def screen_strategies(option_chain, spot, ticker=None, max_width=None, top_k=10):
+    '''
+    Builds the strike grid once and evaluates every strategy against it.
+
+    Args:
+    option_chain (OptionChain or pd.DataFrame): Combined chain for one or more tickers and expirations.
+    spot (float or dict): Underlying price, or a price per ticker.
+    ticker (str): Ticker to use when the chain has no ticker column.
+    max_width (float): Widest spread (in strike points) to evaluate.
+    top_k (int): Number of best results to keep per strategy.
+
+    Returns:
+    dict: Strategy name -> DataFrame of the top_k results by ROI.
+    '''
+    grid = build_strike_grid(option_chain, ticker)
+    # Every credit spread is enumerated once; the condors pair up the same frames
+    puts = put_credit_spreads(grid, spot, max_width)
+    calls = call_credit_spreads(grid, spot, max_width)
+    return {
+        'put_credit_spread': top_k_rows(puts, 'ROI', top_k),
+        'call_credit_spread': top_k_rows(calls, 'ROI', top_k),
+        'iron_condor': iron_condors(grid, spot, max_width, top_k=top_k, put_spreads=puts, call_spreads=calls),
+        'debit_vertical': debit_verticals(grid, max_width, top_k),
+    }
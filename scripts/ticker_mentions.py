@@ -0,0 +1,161 @@
+import re
+from collections import Counter
+import pandas as pd
+from database import get_reddit_posts, replace_ticker_mentions
+
+'''
+
+Ticker mention extraction
+
+'''
+
+# Symbols that are also everyday words or WSB slang only count as cashtags ($ON, $ALL, ...)
+COMMON_WORDS = {
+    'A', 'AI', 'ALL', 'AM', 'AN', 'ANY', 'ARE', 'AT', 'ATH', 'BE', 'BEAT', 'BIG', 'BY', 'CAN', 'CAR', 'CASH',
+    'CAT', 'CEO', 'CFO', 'DD', 'DO', 'EDIT', 'EOD', 'EPS', 'EV', 'FOR', 'FUN', 'GDP', 'GO', 'GOOD', 'HAS',
+    'HE', 'HOLD', 'HUGE', 'I', 'IMO', 'IPO', 'IRS', 'IS', 'IT', 'ITM', 'LOL', 'LOVE', 'ME', 'MOON', 'NEW',
+    'NOW', 'OF', 'ON', 'ONE', 'OPEN', 'OR', 'OTM', 'OUT', 'PLAY', 'PM', 'RH', 'RUN', 'SAVE', 'SEC', 'SEE',
+    'SO', 'TA', 'TO', 'TV', 'UK', 'UP', 'US', 'USA', 'WELL', 'YOLO',
+}
+
+# Suffixes dropped from company names when deriving aliases
+_NAME_SUFFIXES = re.compile(
+    r'[,.]?\s+(inc|incorporated|corp|corporation|co|company|ltd|limited|plc|holdings|group|'
+    r'class [a-c]|common stock|n\.?v|s\.?a|ag)\.?$', re.IGNORECASE)
+
+def trie_pattern(words, space=r'\s+'):
+    """
+    Compiles a list of words into one regex alternation shaped like a trie.
+
+    Shared prefixes are matched once, so the regex engine walks a single
+    branch per character instead of trying every word in turn, and longer
+    words win over their prefixes.
+
+    Args:
+    words (iterable): Literal strings.
+    space (str): Pattern used for spaces inside words.
+
+    Returns:
+    str: Regex source (without boundaries).
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def emit(node):
+        branches = [(space if ch == ' ' else re.escape(ch)) + emit(child)
+                    for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            return f'(?:{body})?'
+        return body
+
+    return emit(trie)
+
+def company_alias(name):
+    """'Advanced Micro Devices, Inc.' -> 'advanced micro devices'."""
+    alias = name.strip()
+    while True:
+        stripped = _NAME_SUFFIXES.sub('', alias)
+        if stripped == alias:
+            break
+        alias = stripped
+    return ' '.join(alias.lower().split())
+
+class TickerMatcher:
+    """
+    Finds ticker mentions in free text with one compiled trie regex.
+
+    Three kinds of mention are recognized in a single scan:
+    cashtags ($amd, any case), bare upper-case symbols (AMD, except the
+    symbols in cashtag_only) and company aliases (case-insensitive, e.g.
+    'nvidia'). Matching runs on the raw text, since clean_post strips $ and
+    lower-cases.
+    """
+
+    def __init__(self, symbols, aliases=None, cashtag_only=None):
+        """
+        Args:
+        symbols (iterable): Ticker symbols (upper case).
+        aliases (dict): Alias text -> symbol (e.g. {'advanced micro devices': 'AMD'}).
+        cashtag_only (set): Symbols that only count with a $ (default: COMMON_WORDS and one-letter symbols).
+        """
+        self.symbols = sorted({s.upper() for s in symbols})
+        self.aliases = {' '.join(a.lower().split()): s.upper() for a, s in (aliases or {}).items()}
+        cashtag_only = COMMON_WORDS if cashtag_only is None else set(cashtag_only)
+        bare = [s for s in self.symbols if s not in cashtag_only and len(s) > 1]
+
+        alternatives = [rf'\$(?P<cash>(?i:{trie_pattern(self.symbols)}))']
+        if bare:
+            alternatives.append(f'(?P<sym>{trie_pattern(bare)})')
+        if self.aliases:
+            alternatives.append(f'(?P<alias>(?i:{trie_pattern(self.aliases)}))')
+        self.pattern = re.compile(r'(?<![\w$])(?:' + '|'.join(alternatives) + r')(?![\w])')
+
+    @classmethod
+    def from_names(cls, names, cashtag_only=None):
+        """
+        Matcher for a {symbol: company name} universe, with aliases derived from the names.
+        """
+        aliases = {company_alias(name): symbol for symbol, name in names.items() if name}
+        return cls(names.keys(), aliases, cashtag_only)
+
+    def _ticker(self, match):
+        group = match.lastgroup
+        text = match.group(group)
+        return self.aliases[' '.join(text.lower().split())] if group == 'alias' else text.upper()
+
+    def search(self, text):
+        """True when the text mentions any ticker."""
+        return self.pattern.search(text) is not None
+
+    def extract(self, text):
+        """
+        Returns:
+        Counter: ticker -> number of mentions in the text.
+        """
+        return Counter(self._ticker(m) for m in self.pattern.finditer(text))
+
+    def extract_many(self, ids, texts):
+        """
+        Builds the inverted index for many texts.
+
+        Args:
+        ids (iterable): Row ids (e.g. reddit post/comment ids).
+        texts (iterable): Raw texts.
+
+        Returns:
+        pd.DataFrame: Rows of (post_id, ticker, count), one per mentioned ticker per text.
+        """
+        post_ids, tickers, counts = [], [], []
+        for post_id, text in zip(ids, texts):
+            if not isinstance(text, str):
+                continue
+            for ticker, count in self.extract(text).items():
+                post_ids.append(post_id)
+                tickers.append(ticker)
+                counts.append(count)
+        return pd.DataFrame({'post_id': post_ids, 'ticker': tickers, 'count': counts})
+
+def index_ticker_mentions(matcher, start_date, end_date):
+    """
+    Scans collected reddit posts and comments in a date range and stores their mentions.
+
+    Each scanned post's previous mentions are replaced, so re-indexing after an
+    edit (or with a new matcher) leaves no stale rows.
+
+    Returns:
+    pd.DataFrame: The (post_id, ticker, count) rows written.
+    """
+    posts = get_reddit_posts(start_date, end_date)
+    if posts.empty:
+        return pd.DataFrame(columns=['post_id', 'ticker', 'count'])
+    texts = posts['title'].fillna('') + '\n' + posts['body'].fillna('')
+    mentions = matcher.extract_many(posts['id'], texts)
+    replace_ticker_mentions(posts['id'].tolist(), mentions)
+    return mentions
@@ -0,0 +1,161 @@
+import itertools
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.arima.model import ARIMA
+
+'''
+
+ARIMA modelling for a ticker universe
+
+'''
+
+# Orders searched by default: p in 0..3, d in 0..1, q in 0..2
+ORDER_GRID = [order for order in itertools.product(range(4), range(2), range(3)) if order != (0, 0, 0)]
+
+def _as_values(series):
+    """Float64 values of a Close series; dates stay with the caller so statsmodels needs no frequency."""
+    return np.asarray(series, dtype=np.float64)
+
+def _fit_order(values, order, start_params=None):
+    """
+    Fit one ARIMA order (run in a worker process).
+
+    Standard errors are skipped (cov_type='none'): order selection and
+    forecasting only need the parameters and the likelihood.
+
+    Returns:
+    tuple: (order, aic, params); aic is inf and params None when the fit fails.
+    """
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            result = ARIMA(values, order=order).fit(start_params=start_params, cov_type='none')
+        return order, result.aic, result.params
+    except Exception:
+        return order, np.inf, None
+
+def _apply_params(values, order, params):
+    """Rebuild a results object from known parameters with one Kalman filter pass (no optimization)."""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return ARIMA(values, order=order).filter(params, cov_type='none')
+
+class ArimaService:
+    """
+    Fits, updates and forecasts one ARIMA model per ticker.
+
+    fit() searches a grid of orders for every ticker across a process pool and
+    keeps the order with the lowest AIC. update() applies new bars to the
+    existing parameters (a filter pass), and refit=True re-estimates them
+    starting from the previous parameters, which converges in a few iterations.
+    Forecasts are cached until the ticker's next bar arrives.
+    """
+
+    def __init__(self, orders=ORDER_GRID, workers=None):
+        self.orders = [tuple(order) for order in orders]
+        self.workers = workers
+        self.models = {}
+        self._forecasts = {}
+
+    def _run(self, tasks):
+        """Run _fit_order tasks (values, order, start_params) through the pool."""
+        if self.workers == 0:
+            return [_fit_order(*task) for task in tasks]
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(_fit_order, *zip(*tasks), chunksize=max(1, len(tasks) // 64)))
+
+    def _store(self, ticker, series, order, aic, params):
+        self.models[ticker] = {
+            'order': order,
+            'aic': aic,
+            'results': _apply_params(_as_values(series), order, params),
+            'last_date': pd.Timestamp(series.index[-1]),
+            'index': pd.DatetimeIndex(series.index),
+        }
+        self._forecasts.pop(ticker, None)
+
+    def fit(self, series_by_ticker):
+        """
+        Order search for every ticker; every (ticker, order) pair is one pool task.
+
+        Args:
+        series_by_ticker (dict): ticker -> date-indexed Close series.
+
+        Returns:
+        pd.DataFrame: Chosen order and AIC per ticker.
+        """
+        tickers = list(series_by_ticker)
+        tasks = [(_as_values(series_by_ticker[t]), order, None) for t in tickers for order in self.orders]
+        results = self._run(tasks)
+
+        for i, ticker in enumerate(tickers):
+            fits = results[i * len(self.orders):(i + 1) * len(self.orders)]
+            order, aic, params = min(fits, key=lambda fit: fit[1])
+            if params is None:
+                print(f"❌ No ARIMA order could be fitted for {ticker}")
+                continue
+            self._store(ticker, series_by_ticker[ticker], order, aic, params)
+        return self.summary()
+
+    def update(self, series_by_ticker, refit=False):
+        """
+        Bring models up to date with bars after their last date.
+
+        Args:
+        series_by_ticker (dict): ticker -> date-indexed Close series (full history or just new bars).
+        refit (bool): Re-estimate parameters (warm-started from the current ones, in the pool)
+            instead of only applying the new observations.
+
+        Returns:
+        dict: ticker -> number of new bars applied.
+        """
+        applied, tasks = {}, []
+        for ticker, series in series_by_ticker.items():
+            model = self.models.get(ticker)
+            if model is None:
+                continue
+            new = series[pd.DatetimeIndex(series.index) > model['last_date']]
+            applied[ticker] = len(new)
+            if new.empty:
+                continue
+            if refit:
+                values = np.concatenate((model['results'].model.endog[:, 0], _as_values(new)))
+                tasks.append((ticker, new, values, model['order'], model['results'].params))
+            else:
+                model['results'] = model['results'].append(_as_values(new))
+                model['last_date'] = pd.Timestamp(new.index[-1])
+                model['index'] = model['index'].append(pd.DatetimeIndex(new.index))
+                self._forecasts.pop(ticker, None)
+
+        if tasks:
+            fits = self._run([(values, order, params) for _, _, values, order, params in tasks])
+            for (ticker, new, values, order, _), (_, aic, params) in zip(tasks, fits):
+                if params is None:
+                    print(f"❌ Refit failed for {ticker}; keeping previous parameters")
+                    params = self.models[ticker]['results'].params
+                index = self.models[ticker]['index'].append(pd.DatetimeIndex(new.index))
+                self._store(ticker, pd.Series(values, index=index), order, aic, params)
+        return applied
+
+    def forecast(self, ticker, steps=5):
+        """
+        Forecast the next `steps` closes, reusing the cached forecast until a new bar arrives.
+
+        Returns:
+        np.array: Forecast values.
+        """
+        model = self.models[ticker]
+        key = (model['last_date'], steps)
+        cached = self._forecasts.get(ticker)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        values = np.asarray(model['results'].forecast(steps))
+        self._forecasts[ticker] = (key, values)
+        return values
+
+    def summary(self):
+        """Order, AIC and last date of every fitted ticker."""
+        return pd.DataFrame([{'ticker': t, 'order': m['order'], 'aic': m['aic'], 'last_date': m['last_date']}
+                             for t, m in self.models.items()])
@@ -0,0 +1,6 @@
+import os
+import sys
+
+_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+for _folder in ('scripts', 'mvp'):
+    sys.path.append(os.path.join(_root, _folder))
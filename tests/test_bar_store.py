@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import database
+from bar_store import insert_minute_bars, get_bars
+
+@pytest.fixture
+def db(tmp_path):
+    database.configure_database(str(tmp_path / 'test.db'))
+    database.create_database()
+    yield
+    database.configure_database()
+
+def _bars(n=120):
+    index = pd.date_range('2024-01-02 14:30', periods=n, freq='min', tz='UTC')
+    close = 100 + np.arange(n) * 0.01
+    return pd.DataFrame({'Open': close, 'High': close + 0.05, 'Low': close - 0.05, 'Close': close,
+                         'Volume': np.full(n, 10.0)}, index=index)
+
+def test_nan_volume_counts_as_zero(db):
+    bars = _bars()
+    bars.iloc[[3, 7, 61], bars.columns.get_loc('Volume')] = np.nan
+    insert_minute_bars('X', bars)
+    five = get_bars('X', '2024-01-02', '2024-01-03', '5m')
+    assert five['Volume'].tolist()[:2] == [40, 40]
+    assert get_bars('X', '2024-01-02', '2024-01-03', '1h')['Volume'].tolist() == [280, 590, 300]
+
+def test_incremental_rollups_match_resample(db):
+    bars = _bars(390)
+    for start in range(0, len(bars), 37):
+        insert_minute_bars('X', bars.iloc[start:start + 37])
+    expected = bars.resample('15min').agg({'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last',
+                                           'Volume': 'sum'})
+    got = get_bars('X', '2024-01-02', '2024-01-03', '15m')
+    np.testing.assert_allclose(got.to_numpy(dtype=float), expected.to_numpy(dtype=float))
@@ -0,0 +1,25 @@
+import pandas as pd
+import pytest
+
+import database
+
+@pytest.fixture
+def db(tmp_path):
+    database.configure_database(str(tmp_path / 'test.db'))
+    database.create_database()
+    yield
+    database.configure_database()
+
+def test_hot_queries_use_indexes(db):
+    assert database.check_query_plans() == {}
+
+def test_range_readers_share_hot_statements(db):
+    index = pd.bdate_range('2024-01-02', periods=5, name='Date')
+    stock = pd.DataFrame({'Open': 1.0, 'High': 2.0, 'Low': 0.5, 'Close': 1.5, 'Volume': 100}, index=index)
+    for ticker in ('SPY', 'QQQ'):
+        database.bulk_insert_stock_data(ticker, stock)
+    assert len(database.get_stock_data('SPY', '2024-01-02', '2024-01-08')) == 5
+    assert database.get_stock_data_range(['SPY', 'QQQ'], '2024-01-03', '2024-01-04')['ticker'].tolist() == \
+        ['QQQ', 'QQQ', 'SPY', 'SPY']
+    assert len(database.get_stock_data_range(None, '2024-01-02', '2024-01-08')) == 10
+    assert database.get_options_strike_window('SPY', 'put', 0, 1000, start_expiration='2024-01-01').empty
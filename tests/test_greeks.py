@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+from providers import FakeProvider
+from data_preprocessing import preprocess_options_data, calculate_greek
+
+def _chain():
+    expiration = (pd.Timestamp.now() + pd.Timedelta(days=30)).strftime('%Y-%m-%d')
+    raw = FakeProvider(strikes_per_side=10).option_chain('SPY', expiration)
+    return preprocess_options_data(raw, expiration, 'SPY').to_frame(), float(raw.underlying['regularMarketPrice'])
+
+def test_cache_hit_for_same_inputs():
+    chain, spot = _chain()
+    quote_time = pd.Timestamp.now().floor('min')
+    first = calculate_greek(chain, spot, quote_time=quote_time, ticker='SPY')
+    second = calculate_greek(chain, spot, quote_time=quote_time, ticker='SPY')
+    np.testing.assert_array_equal(first['iv'], second['iv'])
+
+def test_cache_keyed_on_spot_and_rate():
+    chain, spot = _chain()
+    quote_time = pd.Timestamp.now().floor('min')
+    base = calculate_greek(chain, spot, quote_time=quote_time, ticker='SPY')
+    for kwargs in ({'spot': spot * 1.05}, {'spot': spot, 'rate': 0.08}, {'spot': spot, 'dividend_yield': 0.03}):
+        cached = calculate_greek(chain, quote_time=quote_time, ticker='SPY', **kwargs)
+        fresh = calculate_greek(chain, **kwargs, quote_time=quote_time)
+        np.testing.assert_allclose(cached['delta'], fresh['delta'])
+        assert not np.allclose(cached['delta'], base['delta'], equal_nan=True)
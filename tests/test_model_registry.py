@@ -0,0 +1,28 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from model_registry import save_model, load_model, list_versions, BatchPredictor
+
+def _model():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 2))
+    return RandomForestClassifier(n_estimators=10, n_jobs=-1, random_state=0).fit(X, X[:, 0] > 0)
+
+def test_batch_predictor_leaves_cached_model_untouched(tmp_path):
+    version = save_model(_model(), 'rf', ['a', 'b'], root=str(tmp_path))
+    predictor = BatchPredictor('rf', version, root=str(tmp_path))
+    cached, _ = load_model('rf', version, root=str(tmp_path))
+    assert predictor.model.n_jobs == 1
+    assert cached.n_jobs == -1
+    rows = pd.DataFrame({'a': [1.0, -1.0], 'b': [0.0, 0.0]})
+    np.testing.assert_allclose(predictor.predict(rows), cached.predict_proba(rows.to_numpy())[:, -1])
+
+def test_concurrent_saves_get_distinct_versions(tmp_path):
+    model = _model()
+    with ThreadPoolExecutor(8) as pool:
+        versions = list(pool.map(lambda i: save_model(model, 'rf', ['a', 'b'], root=str(tmp_path)), range(16)))
+    assert sorted(versions) == list(range(1, 17))
+    assert list_versions('rf', root=str(tmp_path)) == list(range(1, 17))
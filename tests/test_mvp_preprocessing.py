@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import database
+import dataset_store
+from providers import FakeProvider
+from mvp_preprocessing import build_mvp_dataset
+from ticker_mentions import TickerMatcher, index_ticker_mentions
+
+@pytest.fixture
+def empty_db(tmp_path, monkeypatch):
+    database.configure_database(str(tmp_path / 'test.db'))
+    database.create_database()
+    monkeypatch.setattr(dataset_store, 'DATASET_DIR', str(tmp_path / 'datasets'))
+    yield
+    database.configure_database()
+
+def test_build_mvp_dataset_without_stored_sentiment(empty_db):
+    panel, path = build_mvp_dataset(['AMD', 'SPY'], '2023-01-01', '2023-06-01', workers=0,
+                                    provider=FakeProvider(), rate=1000.0)
+    assert set(panel['ticker']) == {'AMD', 'SPY'}
+    assert (panel['Sentiment'] == 0.0).all()
+    assert (panel['Post_Count'] == 0).all()
+    assert np.isfinite(panel[['MA_7', 'MA_14']].to_numpy()).all()
+
+def test_build_mvp_dataset_scores_stored_posts(empty_db):
+    day = pd.Timestamp('2023-03-15', tz='UTC')
+    posts = [{'id': 'a', 'kind': 'post', 'submission_id': 'a', 'created_utc': int(day.timestamp()) + 3600,
+              'title': 'AMD is great, love it', 'body': 'amazing gains'},
+             {'id': 'b', 'kind': 'comment', 'submission_id': 'a', 'created_utc': int(day.timestamp()) + 7200,
+              'title': None, 'body': 'AMD and SPY are terrible, awful losses'}]
+    database.bulk_insert_reddit_posts(posts)
+    index_ticker_mentions(TickerMatcher(['AMD', 'SPY']), '2023-03-01', '2023-03-31')
+
+    panel, _ = build_mvp_dataset(['AMD', 'SPY'], '2023-01-01', '2023-06-01', workers=0,
+                                 provider=FakeProvider(), rate=1000.0)
+    on_day = panel.loc['2023-03-15'].set_index('ticker')
+    assert on_day.loc['AMD', 'Post_Count'] == 2 and on_day.loc['SPY', 'Post_Count'] == 1
+    assert on_day.loc['SPY', 'Sentiment'] < 0
+    assert (panel.loc[panel.index < '2023-03-15', 'Post_Count'] == 0).all()
+    assert len(database.get_daily_sentiment(['AMD', 'SPY'], '2023-03-15', '2023-03-15')) == 2
@@ -0,0 +1,40 @@
+import numpy as np
+
+from option_chain import OptionChain
+from analysis import _otm_puts
+
+def _chain(strikes, in_the_money=None):
+    n = len(strikes)
+    return OptionChain.from_columns(['2030-01-18'] * (2 * n), ['call'] * n + ['put'] * n, list(strikes) * 2,
+                                    {'bid': np.ones(2 * n), 'ask': np.ones(2 * n)}, in_the_money)
+
+def test_exclusive_bounds_at_strikes_with_inexact_floats():
+    chain = _chain([0.28, 0.29, 0.30, 0.57, 1.15])
+    assert chain.select(option_type='put', min_strike=0.29, inclusive=False)['strike'].tolist() == [0.30, 0.57, 1.15]
+    assert chain.select(option_type='put', max_strike=0.57, inclusive=False)['strike'].tolist() == [0.28, 0.29, 0.30]
+    assert chain.select(option_type='put', min_strike=0.29, max_strike=0.57)['strike'].tolist() == [0.29, 0.30, 0.57]
+
+def test_otm_puts_matches_frame_path():
+    strikes = np.round(np.arange(0.05, 5.0, 0.01), 2)
+    chain = _chain(strikes)
+    frame = chain.to_frame()
+    for open_price, height in [(1.29, 1.0), (2.5, 1.25), (3.0, 0.71), (2.345, 1.0)]:
+        expected = frame[(frame['strike'] > open_price - height) & (frame['strike'] < open_price)
+                         & (frame['option_type'] == 'put')]['strike'].to_numpy()
+        np.testing.assert_array_equal(_otm_puts(chain, open_price, height)['strike'], expected)
+
+def test_otm_puts_drops_in_the_money_rows_on_both_paths():
+    strikes = np.arange(90.0, 111.0)
+    # Spot at 100 after the open: puts struck above it are in the money
+    itm = np.r_[strikes < 100, strikes > 100]
+    chain = _chain(strikes, itm)
+    frame = chain.to_frame()
+    from_chain = _otm_puts(chain, 105.0, 10)['strike']
+    np.testing.assert_array_equal(from_chain, _otm_puts(frame, 105.0, 10)['strike'].to_numpy())
+    np.testing.assert_array_equal(from_chain, np.arange(96.0, 101.0))
+
+def test_single_expiration_select_is_a_view():
+    chain = _chain([10.0, 11.0, 12.0])
+    puts = chain.select(expiration='2030-01-18', option_type='put', min_strike=10.5)
+    assert np.shares_memory(puts.strike, chain.strike)
+    assert puts['strike'].tolist() == [11.0, 12.0]
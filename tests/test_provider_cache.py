@@ -0,0 +1,31 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from providers import FakeProvider
+from provider_cache import CachingProvider
+
+def test_cached_chain_keeps_underlying(tmp_path):
+    cache = CachingProvider(FakeProvider(), cache_dir=str(tmp_path))
+    expiration = FakeProvider().options_expirations('SPY')[0]
+    fresh = cache.option_chain('SPY', expiration)
+    cached = cache.option_chain('SPY', expiration)
+    assert cache.stats()['hits'] == 1
+    assert cached.underlying == fresh.underlying
+    assert cached.underlying['regularMarketPrice'] > 0
+    pd.testing.assert_frame_equal(cached.puts, fresh.puts)
+
+def test_concurrent_hits_survive_eviction(tmp_path):
+    # A cache too small for the working set keeps evicting files other threads are reading
+    cache = CachingProvider(FakeProvider(), cache_dir=str(tmp_path), max_bytes=15_000)
+    tickers = [f'T{i}' for i in range(3)]
+
+    def fetch(i):
+        return len(cache.download(tickers[i % len(tickers)], '2020-01-01', '2020-03-01'))
+
+    with ThreadPoolExecutor(8) as pool:
+        lengths = list(pool.map(fetch, range(120)))
+    assert set(lengths) == {len(FakeProvider().download('T0', '2020-01-01', '2020-03-01'))}
+    stats = cache.stats()
+    assert stats['hits'] + stats['misses'] == 120
+    assert stats['hits'] > 0 and stats['evictions'] > 0
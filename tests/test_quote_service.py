@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from providers import FakeProvider
+from quote_service import ProviderQuoteFeed, QuoteService, StaleQuoteError
+
+class LaggingProvider(FakeProvider):
+    """Serves minute bars ending `lag` ago (tz-aware for FRESH, naive UTC otherwise)."""
+
+    def __init__(self, lag):
+        super().__init__()
+        self.lag = lag
+
+    def history(self, ticker, period='1d', interval='1m'):
+        end = pd.Timestamp.now(tz='UTC').floor('min') - self.lag
+        index = pd.date_range(end=end, periods=5, freq='min')
+        if ticker != 'FRESH':
+            index = index.tz_localize(None)
+        return self.bars(ticker, index)
+
+def test_quotes_carry_the_bar_time():
+    feed = ProviderQuoteFeed(LaggingProvider(pd.Timedelta(hours=1)), rate=1000.0)
+    service = QuoteService(feed, ['OLD'], max_age=300)
+    service.poll_once()
+    with pytest.raises(StaleQuoteError):
+        service.get_price('OLD')
+
+    feed = ProviderQuoteFeed(LaggingProvider(pd.Timedelta(0)), rate=1000.0)
+    service = QuoteService(feed, ['FRESH', 'NAIVE'], max_age=300)
+    service.poll_once()
+    assert np.isfinite(service.get_prices(['FRESH', 'NAIVE'])).all()
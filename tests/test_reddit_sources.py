@@ -0,0 +1,15 @@
+import pytest
+
+import reddit_sources
+from reddit_sources import RedditSource, PrawSource, FakeRedditSource
+
+def test_praw_source_requires_credentials(monkeypatch):
+    monkeypatch.setitem(reddit_sources.REDDIT_CREDENTIALS, 'client_id', None)
+    monkeypatch.setitem(reddit_sources.REDDIT_CREDENTIALS, 'client_secret', None)
+    with pytest.raises(RuntimeError, match='REDDIT_CLIENT_ID'):
+        PrawSource()
+
+def test_reddit_source_is_abstract():
+    with pytest.raises(TypeError):
+        RedditSource()
+    assert next(iter(FakeRedditSource(n_submissions=1).submissions('wallstreetbets')))['id']
@@ -0,0 +1,17 @@
+import pandas as pd
+
+from providers import FakeProvider
+from data_preprocessing import preprocess_options_data
+from option_chain import OptionChain
+from strategies import build_strike_grid, iron_condors, screen_strategies
+
+def test_screen_reuses_credit_spreads_for_condors():
+    provider = FakeProvider(n_expirations=2, strikes_per_side=15)
+    expirations = provider.options_expirations('SPY')
+    chain = OptionChain.concat([preprocess_options_data(provider.option_chain('SPY', e), e, 'SPY') for e in expirations])
+    spot = float(provider.option_chain('SPY', expirations[0]).underlying['regularMarketPrice'])
+
+    screen = screen_strategies(chain, spot, max_width=None, top_k=10)
+    standalone = iron_condors(build_strike_grid(chain), spot, max_width=None, top_k=10)
+    assert len(screen['iron_condor']) == 10
+    pd.testing.assert_frame_equal(screen['iron_condor'].reset_index(drop=True), standalone.reset_index(drop=True))
@@ -0,0 +1,25 @@
+import pytest
+
+import database
+from ticker_mentions import TickerMatcher, index_ticker_mentions
+
+@pytest.fixture
+def db(tmp_path):
+    database.configure_database(str(tmp_path / 'test.db'))
+    database.create_database()
+    yield
+    database.configure_database()
+
+def _post(post_id, title, body):
+    return {'id': post_id, 'kind': 'post', 'submission_id': post_id, 'created_utc': 1704200000,
+            'title': title, 'body': body}
+
+def test_reindex_drops_mentions_no_longer_matched(db):
+    matcher = TickerMatcher(['AMD', 'NVDA'])
+    database.bulk_insert_reddit_posts([_post('a', 'AMD and NVDA', ''), _post('b', 'NVDA', '')])
+    index_ticker_mentions(matcher, '2024-01-01', '2024-01-31')
+
+    database.bulk_insert_reddit_posts([_post('a', 'only AMD now', ''), _post('b', 'nothing here', '')])
+    index_ticker_mentions(matcher, '2024-01-01', '2024-01-31')
+    posts = database.get_ticker_posts(['AMD', 'NVDA'], '2024-01-01', '2024-01-31')
+    assert list(zip(posts['ticker'], posts['id'])) == [('AMD', 'a')]